@@ -0,0 +1,138 @@
+"""
+WorkloadTestPool 할당기 경합 벤치마크.
+동시 요청자 수(기본 1,16,64)별로 claim(K대) → release 를 반복해 초당 할당 VM 수를 측정하고,
+같은 VM 이 동시에 두 요청자에게 할당되는지(double-assign) 검사. 결과는 JSON.
+
+    python benchmarks/bench_allocator.py --pool-size 20000 --k 3 --duration 5
+    python benchmarks/bench_allocator.py --db-url postgresql://user:pw@localhost:5432/bench --cache
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def seed_pool(engine, pool_model, size: int) -> None:
+    from sqlalchemy import delete
+    from sqlalchemy.orm import Session
+
+    with Session(engine) as db:
+        db.execute(delete(pool_model))
+        rows = [
+            {"vm_name": f"WKLD-{i}", "ip_address": f"192.168.{40 + i // 250}.{i % 250 + 1}",
+             "is_used": False, "project_id": None, "occupy_user": None}
+            for i in range(size)
+        ]
+        for start in range(0, size, 5000):
+            db.bulk_insert_mappings(pool_model, rows[start:start + 5000])
+        db.commit()
+
+
+def run_level(engine, pool_model, requesters: int, k: int, duration: float, use_cache: bool) -> dict:
+    from sqlalchemy.orm import sessionmaker
+    from services.allocator import VMAllocator, VMPoolExhausted
+
+    allocator = VMAllocator(pool_model, use_cache=use_cache)
+    Session = sessionmaker(bind=engine)
+    held = set()
+    held_lock = threading.Lock()
+    stats = {"allocations": 0, "claims": 0, "exhausted": 0, "errors": 0, "double_assigned": 0}
+    stats_lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(n: int):
+        db = Session()
+        project_id = 1_000_000 + n
+        try:
+            while time.perf_counter() < deadline:
+                try:
+                    vms = allocator.claim(db, project_id, f"bench-{n}", k)
+                except VMPoolExhausted:
+                    with stats_lock:
+                        stats["exhausted"] += 1
+                    continue
+                except Exception:
+                    with stats_lock:
+                        stats["errors"] += 1
+                    db.rollback()
+                    continue
+                ids = {v["id"] for v in vms}
+                with held_lock:
+                    overlap = held & ids
+                    held.update(ids)
+                with stats_lock:
+                    stats["allocations"] += len(ids)
+                    stats["claims"] += 1
+                    stats["double_assigned"] += len(overlap)
+                with held_lock:
+                    held.difference_update(ids)
+                allocator.release(db, project_id)
+        finally:
+            db.close()
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(requesters)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    return {
+        "requesters": requesters,
+        **stats,
+        "elapsed_seconds": round(elapsed, 3),
+        "allocations_per_second": round(stats["allocations"] / elapsed, 1) if elapsed else 0.0,
+        "claims_per_second": round(stats["claims"] / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def main_cli():
+    p = argparse.ArgumentParser(description="VM allocator contention benchmark")
+    p.add_argument("--db-url", default=None, help="기본: 임시 SQLite 파일")
+    p.add_argument("--pool-size", type=int, default=10000)
+    p.add_argument("--k", type=int, default=3, help="claim 당 VM 수")
+    p.add_argument("--levels", default="1,16,64", type=lambda s: [int(x) for x in s.split(",") if x])
+    p.add_argument("--duration", type=float, default=3.0, help="레벨당 실행 시간(초)")
+    p.add_argument("--cache", action="store_true", help="메모리 free-list 캐시 사용")
+    p.add_argument("--output", default=None)
+    args = p.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="cmp-bench-alloc-")
+    db_url = args.db_url or f"sqlite:///{os.path.join(tmpdir, 'alloc.db')}"
+    os.environ["CMP_DATABASE_URL"] = db_url
+    os.environ["CMP_SQLITE_URL"] = f"sqlite:///{os.path.join(tmpdir, 'fallback.db')}"
+    os.chdir(ROOT)
+
+    import main
+
+    engine = main.db_manager.connect()
+    if engine.dialect.name == "sqlite":
+        # 동시 쓰기 시 잠금 대기 (SQLITE_BUSY 즉시 실패 방지)
+        from sqlalchemy import create_engine
+        engine = create_engine(db_url, connect_args={"check_same_thread": False, "timeout": 30},
+                               pool_size=max(args.levels) + 1, max_overflow=0)
+    seed_pool(engine, main.WorkloadTestPool, args.pool_size)
+
+    report = {
+        "db_url": str(engine.url),
+        "pool_size": args.pool_size,
+        "k": args.k,
+        "cache": args.cache,
+        "levels": [run_level(engine, main.WorkloadTestPool, n, args.k, args.duration, args.cache) for n in args.levels],
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,296 @@
+"""
+provisioning / monitoring API 부하 벤치마크.
+main.app 을 프로세스 안에서(httpx ASGITransport) 띄우고, 로컬 SQLite(기본: 임시 파일) 또는
+--db-url 로 지정한 로컬 Postgres 에 대해 동시 요청을 보낸 뒤 결과를 JSON 으로 출력.
+- Prometheus 는 로컬 stub 서버 (instance 수 --prom-instances, 응답 지연 --prom-latency-ms)
+- CONFIG["mock_step_delay_seconds"] = 0 (provisioning 단계 대기 없음)
+- 지표: throughput(req/s), p50/p95/p99 지연(ms), SQL 문 수, peak RSS(KB)
+
+    python benchmarks/bench_api.py --workload all --concurrency 32 --requests 500
+    python benchmarks/bench_api.py --workload history --history-sizes 1000,10000,50000 --output bench_output.txt
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+# ==========================================
+# Prometheus stub
+# ==========================================
+def start_prometheus_stub(instances: int, latency_ms: float) -> ThreadingHTTPServer:
+    body = json.dumps({
+        "status": "success",
+        "data": {
+            "resultType": "vector",
+            "result": [
+                {"metric": {"instance": f"192.168.{40 + i // 250}.{i % 250 + 1}:9100"}, "value": [time.time(), f"{random.uniform(1, 99):.2f}"]}
+                for i in range(instances)
+            ],
+        },
+    }).encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if latency_ms:
+                time.sleep(latency_ms / 1000.0)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# ==========================================
+# 측정 유틸
+# ==========================================
+def percentile(sorted_values, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, int(round(pct / 100.0 * (len(sorted_values) - 1)))))
+    return sorted_values[k]
+
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+
+async def drive(client, make_request, total: int, concurrency: int, counter: StatementCounter) -> dict:
+    """make_request(client, i) 를 total 번, 동시에 concurrency 개씩 실행."""
+    latencies = []
+    errors = 0
+    next_i = 0
+    start_statements = counter.count
+
+    async def worker():
+        nonlocal next_i, errors
+        while next_i < total:
+            i = next_i
+            next_i += 1
+            t0 = time.perf_counter()
+            try:
+                resp = await make_request(client, i)
+                if resp.status_code >= 400:
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append((time.perf_counter() - t0) * 1000.0)
+
+    t_start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - t_start
+    latencies.sort()
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "errors": errors,
+        "elapsed_seconds": round(elapsed, 4),
+        "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 3),
+            "p95": round(percentile(latencies, 95), 3),
+            "p99": round(percentile(latencies, 99), 3),
+            "max": round(latencies[-1], 3) if latencies else 0.0,
+        },
+        "db_statements": counter.count - start_statements,
+        "db_statements_per_request": round((counter.count - start_statements) / total, 2) if total else 0.0,
+    }
+
+
+# ==========================================
+# 워크로드
+# ==========================================
+def provision_body(i: int) -> dict:
+    return {
+        "serviceName": f"bench-{i}",
+        "userName": "admin",
+        "config": {"template": random.choice(["single", "standard", "enterprise", "k8s_small"])},
+        "targetInfra": {},
+    }
+
+
+async def wait_until_drained(main, timeout: float = 120.0) -> float:
+    """모든 프로젝트가 종료 상태가 될 때까지 대기, 걸린 시간 반환."""
+    done = (main.CONFIG["status_completed"], main.CONFIG["status_failed"])
+    t0 = time.perf_counter()
+    while time.perf_counter() - t0 < timeout:
+        db = main.SessionLocal()
+        try:
+            pending = db.query(main.ProjectHistory).filter(main.ProjectHistory.status.notin_(done)).count()
+        finally:
+            db.close()
+        if pending == 0:
+            break
+        await asyncio.sleep(0.05)
+    return time.perf_counter() - t0
+
+
+async def workload_provision(main, client, args, counter):
+    res = await drive(client, lambda c, i: c.post("/api/provision", json=provision_body(i)), args.requests, args.concurrency, counter)
+    res["drain_seconds"] = round(await wait_until_drained(main), 4)
+    return res
+
+
+def seed_history(main, rows: int) -> None:
+    """projects 테이블을 rows 행까지 채움 (bulk insert)."""
+    db = main.SessionLocal()
+    try:
+        existing = db.query(main.ProjectHistory).count()
+        batch = []
+        for i in range(existing, rows):
+            batch.append({
+                "service_name": f"seed-{i}",
+                "status": main.CONFIG["status_completed"],
+                "assigned_ip": f"10.99.{(i // 254) % 254}.{i % 254 + 1}",
+                "template_type": "single",
+                "created_at": datetime.now(),
+                "details": {"input": {"serviceName": f"seed-{i}"}, "config": {"template": "single"}, "infra": {},
+                            "status": main.CONFIG["status_completed"], "resources": None, "error": None},
+            })
+            if len(batch) >= 5000:
+                db.bulk_insert_mappings(main.ProjectHistory, batch)
+                db.commit()
+                batch = []
+        if batch:
+            db.bulk_insert_mappings(main.ProjectHistory, batch)
+            db.commit()
+    finally:
+        db.close()
+
+
+async def workload_history(main, client, args, counter):
+    results = {}
+    for size in args.history_sizes:
+        seed_history(main, size)
+        res = await drive(client, lambda c, i: c.get("/api/history"), args.requests, args.concurrency, counter)
+        probe = await client.get("/api/history")
+        res["response_bytes"] = len(probe.content)
+        results[str(size)] = res
+    return results
+
+
+async def workload_monitoring(main, client, args, counter):
+    return await drive(client, lambda c, i: c.get("/api/monitoring/my-resources"), args.requests, args.concurrency, counter)
+
+
+async def workload_mixed(main, client, args, counter):
+    async def mixed(c, i):
+        r = i % 10
+        if r == 0:
+            return await c.post("/api/provision", json=provision_body(i))
+        if r < 5:
+            return await c.get("/api/monitoring/my-resources")
+        return await c.get("/api/history")
+
+    res = await drive(client, mixed, args.requests, args.concurrency, counter)
+    res["drain_seconds"] = round(await wait_until_drained(main), 4)
+    return res
+
+
+WORKLOADS = {
+    "provision": workload_provision,
+    "history": workload_history,
+    "monitoring": workload_monitoring,
+    "mixed": workload_mixed,
+}
+
+
+# ==========================================
+# main
+# ==========================================
+async def run(args) -> dict:
+    import httpx
+    from sqlalchemy import event
+
+    import main
+
+    counter = StatementCounter()
+    # 엔진은 lifespan 에서 만들어지고 PostgreSQL 복귀 시 교체될 수 있으므로 정해질 때마다 리스너 등록
+    main.db_manager.add_swap_listener(lambda engine: event.listen(engine, "after_cursor_execute", counter))
+    main.db_manager.connect()
+
+    report = {
+        "started_at": datetime.now().isoformat(),
+        "db_url": str(main.db_manager.engine.url),
+        "python": sys.version.split()[0],
+        "params": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "prom_instances": args.prom_instances,
+            "prom_latency_ms": args.prom_latency_ms,
+        },
+        "workloads": {},
+    }
+    names = list(WORKLOADS) if args.workload == "all" else [args.workload]
+    async with main.app.router.lifespan_context(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for name in names:
+                report["workloads"][name] = await WORKLOADS[name](main, client, args, counter)
+    report["peak_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return report
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="CMP backend API benchmark")
+    p.add_argument("--workload", choices=["all"] + list(WORKLOADS), default="all")
+    p.add_argument("--requests", type=int, default=200)
+    p.add_argument("--concurrency", type=int, default=16)
+    p.add_argument("--history-sizes", default="1000,10000",
+                   type=lambda s: [int(x) for x in s.split(",") if x])
+    p.add_argument("--db-url", default=None, help="기본: 임시 SQLite 파일. 예) postgresql://user:pw@localhost:5432/bench")
+    p.add_argument("--prom-instances", type=int, default=200)
+    p.add_argument("--prom-latency-ms", type=float, default=5.0)
+    p.add_argument("--output", default=None, help="결과 JSON 저장 경로 (기본: stdout)")
+    return p.parse_args()
+
+
+def main_cli():
+    args = parse_args()
+    tmpdir = tempfile.mkdtemp(prefix="cmp-bench-")
+    db_url = args.db_url or f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    os.environ["CMP_DATABASE_URL"] = db_url
+    os.environ["CMP_SQLITE_URL"] = f"sqlite:///{os.path.join(tmpdir, 'fallback.db')}"
+
+    stub = start_prometheus_stub(args.prom_instances, args.prom_latency_ms)
+    from config import CONFIG
+    CONFIG["mock_step_delay_seconds"] = 0
+    CONFIG["prometheus_urls"] = [f"http://127.0.0.1:{stub.server_port}"]
+
+    # StaticFiles(directory="templates") 가 상대 경로이므로 저장소 루트에서 실행
+    os.chdir(ROOT)
+    report = asyncio.run(run(args))
+    stub.shutdown()
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,107 @@
+"""
+모니터링 차트 다운샘플링 처리량 벤치마크 (services.downsample).
+random-walk 시계열(기본 100만 포인트)을 방법(lttb / lttb-no-prefilter / minmax)과 출력 폭별로
+반복 실행해 중앙값 시간과 초당 처리 포인트 수를 JSON 으로 출력.
+LTTB 결과가 순수 Python 참조 구현과 같은지도 작은 입력으로 확인.
+
+    python benchmarks/bench_downsample.py
+    python benchmarks/bench_downsample.py --points 1000000,5000000 --widths 500,2000 --runs 7
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from services.downsample import lttb_indices, minmax_indices, _lttb  # noqa: E402
+
+
+def reference_lttb(x, y, n_out):
+    """원 논문 형태의 bucket 루프 (검증용, 느림)."""
+    n = len(x)
+    edges = [int(v) for v in np.linspace(1, n - 1, n_out - 1)]
+    out = [0]
+    a = 0
+    for i in range(n_out - 2):
+        s, e = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            ns, ne = edges[i + 1], edges[i + 2]
+            cx = sum(x[ns:ne]) / (ne - ns)
+            cy = sum(y[ns:ne]) / (ne - ns)
+        else:
+            cx, cy = x[-1], y[-1]
+        best, best_area = s, -1.0
+        for j in range(s, e):
+            area = abs((x[a] - cx) * (y[j] - y[a]) - (x[a] - x[j]) * (cy - y[a]))
+            if area > best_area:
+                best, best_area = j, area
+        a = best
+        out.append(a)
+    out.append(n - 1)
+    return out
+
+
+def random_walk(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    x = np.arange(n, dtype=np.float64) * 15.0 + 1.7e9  # 15초 간격 타임스탬프
+    y = np.clip(50 + rng.standard_normal(n).cumsum() * 0.5, 0, 100)
+    return x, y
+
+
+def time_it(fn, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples)
+
+
+def main_cli():
+    p = argparse.ArgumentParser(description="LTTB / minmax downsampling throughput benchmark")
+    p.add_argument("--points", default="1000000", type=lambda s: [int(v) for v in s.split(",") if v])
+    p.add_argument("--widths", default="500,2000", type=lambda s: [int(v) for v in s.split(",") if v])
+    p.add_argument("--runs", type=int, default=5)
+    p.add_argument("--output", default=None)
+    args = p.parse_args()
+
+    x, y = random_walk(20000, seed=1)
+    verified = list(_lttb(x, y, 300)) == reference_lttb(x.tolist(), y.tolist(), 300)
+
+    methods = {
+        "lttb": lambda x, y, w: lttb_indices(x, y, w),
+        "lttb-no-prefilter": lambda x, y, w: _lttb(x, y, w),
+        "minmax": lambda x, y, w: minmax_indices(y, w // 2),
+    }
+    results = []
+    for n in args.points:
+        x, y = random_walk(n)
+        for width in args.widths:
+            for name, fn in methods.items():
+                seconds = time_it(lambda: fn(x, y, width), args.runs)
+                results.append({
+                    "points": n,
+                    "width": width,
+                    "method": name,
+                    "output_points": int(len(fn(x, y, width))),
+                    "median_ms": round(seconds * 1000, 2),
+                    "mpoints_per_second": round(n / seconds / 1e6, 1),
+                })
+
+    report = {"numpy": np.__version__, "lttb_matches_reference": verified, "runs": args.runs, "results": results}
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,92 @@
+"""
+main 모듈 import 시간 벤치마크.
+새 인터프리터에서 `python -X importtime -c "import main"` 를 반복 실행해 wall time 중앙값과
+누적(cumulative) import 시간이 큰 모듈 상위 N개를 JSON 으로 출력.
+DB 엔진 생성/연결은 lifespan 으로 옮겨졌으므로 PostgreSQL 이 없어도 import 는 connect_timeout 을 기다리지 않아야 함.
+
+    python benchmarks/bench_import.py --runs 5 --top 15
+    python benchmarks/bench_import.py --db-url postgresql://user:pw@10.0.0.1:15432/db   # 응답 없는 호스트
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_importtime(stderr: str) -> dict:
+    """'import time: self [us] | cumulative | imported package' 출력 → {module: cumulative_us} (최대값)."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        try:
+            _, cumulative_us, name = line[len("import time:"):].split("|")
+            cumulative = int(cumulative_us)
+        except ValueError:
+            continue
+        name = name.strip()
+        modules[name] = max(modules.get(name, 0), cumulative)
+    return modules
+
+
+def run_once(env: dict) -> tuple:
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    elapsed = time.perf_counter() - t0
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr else "import main 실패")
+    return elapsed, parse_importtime(proc.stderr)
+
+
+def main_cli():
+    p = argparse.ArgumentParser(description="main import-time benchmark")
+    p.add_argument("--runs", type=int, default=5)
+    p.add_argument("--top", type=int, default=15)
+    p.add_argument("--db-url", default=None, help="CMP_DATABASE_URL 로 전달 (기본: 환경 그대로)")
+    p.add_argument("--output", default=None)
+    args = p.parse_args()
+
+    env = dict(os.environ)
+    if args.db_url:
+        env["CMP_DATABASE_URL"] = args.db_url
+
+    walls = []
+    cumulative = {}
+    for _ in range(args.runs):
+        elapsed, modules = run_once(env)
+        walls.append(elapsed)
+        for name, us in modules.items():
+            cumulative.setdefault(name, []).append(us)
+
+    top = sorted(
+        ((name, statistics.median(values)) for name, values in cumulative.items()),
+        key=lambda item: item[1], reverse=True,
+    )[:args.top]
+    report = {
+        "python": sys.version.split()[0],
+        "runs": args.runs,
+        "wall_seconds": {
+            "median": round(statistics.median(walls), 4),
+            "min": round(min(walls), 4),
+            "max": round(max(walls), 4),
+        },
+        "top_cumulative_ms": [{"module": name, "ms": round(us / 1000.0, 2)} for name, us in top],
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main_cli()
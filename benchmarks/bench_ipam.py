@@ -0,0 +1,121 @@
+"""
+IPAM(services.ipam) 처리량 벤치마크.
+1) 메모리 비트맵: /16 풀에서 템플릿 크기(1/3/5)별 할당·반납 반복 (초당 할당 주소 수, 빈 주소 탐색 비용)
+2) DB 포함: 임시 SQLite 파일에서 allocate(INSERT ... ON CONFLICT RETURNING) / release 반복.
+   매 건 commit(디스크 fsync 가 상한) / 100 건마다 commit 을 비교하고,
+   같은 DB 를 보는 두 번째 manager(다른 워커 역할)를 섞어 충돌 재시도 경로도 측정
+결과는 JSON 으로 출력.
+
+    python benchmarks/bench_ipam.py
+    python benchmarks/bench_ipam.py --cidr 10.0.0.0/16 --projects 5000 --output ipam.json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from config import CONFIG  # noqa: E402
+from main import Base, IpAllocation  # noqa: E402
+from services.ipam import IPAddressManager, IPPool  # noqa: E402
+
+
+def bench_bitmap(cidr: str, size: int, rounds: int, contiguous: bool) -> dict:
+    pool = IPPool("bench", [cidr])
+    held = []
+    t0 = time.perf_counter()
+    allocated = 0
+    # 풀을 거의 채운 뒤 무작위 반납/재할당 (단편화된 상태의 탐색 비용)
+    while pool.free >= size:
+        held.append(pool.take(size, contiguous=contiguous))
+        allocated += size
+    fill_seconds = time.perf_counter() - t0
+    rng = random.Random(0)
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        i = rng.randrange(len(held))
+        for addr in held[i]:
+            pool.unmark(addr)
+        held[i] = pool.take(size, contiguous=contiguous)
+    churn_seconds = time.perf_counter() - t0
+    return {
+        "cidr": cidr,
+        "template_size": size,
+        "contiguous": contiguous,
+        "filled_addresses": allocated,
+        "fill_addresses_per_second": round(allocated / fill_seconds),
+        "churn_allocations_per_second": round(rounds / churn_seconds),
+        "bitmap_bytes": sum(len(s.bits) for s in pool.subnets),
+    }
+
+
+def bench_db(cidr: str, projects: int, sizes, workers: int, batch: int) -> dict:
+    """workers: 같은 DB 를 보는 manager 수 (2 이상이면 충돌 재시도 경로 포함). batch: 몇 건마다 commit 할지."""
+    pools = {"bench": {"cidrs": [cidr]}}
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'ipam.db')}")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine)
+        managers = [IPAddressManager(IpAllocation, pools, "bench") for _ in range(workers)]
+        db = Session()
+        t0 = time.perf_counter()
+        addresses = 0
+        for pid in range(1, projects + 1):
+            addresses += len(managers[pid % workers].allocate(db, pid, sizes[pid % len(sizes)], commit=pid % batch == 0))
+        db.commit()
+        alloc_seconds = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        released = 0
+        for pid in range(1, projects + 1, 2):
+            managers[0].release(db, pid, commit=pid % batch == 0)
+            released += 1
+        db.commit()
+        release_seconds = time.perf_counter() - t0
+        db.close()
+        engine.dispose()
+    return {
+        "cidr": cidr,
+        "workers": workers,
+        "commit_every": batch,
+        "projects": projects,
+        "addresses": addresses,
+        "allocations_per_second": round(projects / alloc_seconds),
+        "addresses_per_second": round(addresses / alloc_seconds),
+        "releases_per_second": round(released / release_seconds),
+    }
+
+
+def main_cli():
+    p = argparse.ArgumentParser(description="IPAM bitmap / DB allocation benchmark")
+    p.add_argument("--cidr", default="10.0.0.0/16")
+    p.add_argument("--rounds", type=int, default=20000)
+    p.add_argument("--projects", type=int, default=3000)
+    p.add_argument("--output", default=None)
+    args = p.parse_args()
+
+    sizes = sorted(set(CONFIG["template_map"].values()))
+    report = {
+        "bitmap": [bench_bitmap(args.cidr, size, args.rounds, contiguous) for size in sizes for contiguous in (True, False)],
+        "sqlite": [
+            bench_db(args.cidr, args.projects, sizes, workers, batch)
+            for workers in (1, 2) for batch in (1, 100)
+        ],
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main_cli()
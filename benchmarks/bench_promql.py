@@ -0,0 +1,119 @@
+"""
+모니터링 메트릭 조회 범위 벤치마크: 전체 인스턴스 쿼리 vs instance matcher 로 좁힌 쿼리 (services.promql).
+Prometheus 없이, 각 방식에서 Prometheus 가 돌려줄 응답 JSON 을 만들어
+응답 크기(bytes)와 클라이언트 처리 시간(json 파싱 + {ip: {cpu, memory}} 변환 + 사용자 VM 선택)을 비교.
+- fleet: 기존 방식. CPU/메모리 쿼리 2개 × 전체 인스턴스, 파이썬에서 사용자 IP 만 사용
+- scoped: 합친 쿼리(cmp_metric 라벨) × 사용자 VM, IP chunk 수만큼
+
+    python benchmarks/bench_promql.py
+    python benchmarks/bench_promql.py --fleet 20000 --vms 10,100,1000 --chunk-size 50
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from services.prometheus import parse_metrics  # noqa: E402
+from services.promql import InstanceScope  # noqa: E402
+
+
+def fleet_ips(n: int):
+    return [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(1, n + 1)]
+
+
+def vector_body(series) -> bytes:
+    return json.dumps({"status": "success", "data": {"resultType": "vector", "result": series}}).encode()
+
+
+def fleet_bodies(ips):
+    """기존 CPU / 메모리 쿼리 응답 (메모리 쿼리는 집계하지 않아 job 라벨까지 그대로)."""
+    cpu = [{"metric": {"instance": f"{ip}:9100"}, "value": [1700000000.0, "12.3456789"]} for ip in ips]
+    mem = [{"metric": {"instance": f"{ip}:9100", "job": "node"}, "value": [1700000000.0, "45.678901"]} for ip in ips]
+    return [vector_body(cpu), vector_body(mem)]
+
+
+def scoped_bodies(scope: InstanceScope, chunk_size: int):
+    bodies = []
+    for i in range(0, len(scope.ips), chunk_size):
+        series = []
+        for ip in scope.ips[i:i + chunk_size]:
+            series.append({"metric": {"instance": f"{ip}:9100", "cmp_metric": "cpu"}, "value": [1700000000.0, "12.3456789"]})
+            series.append({"metric": {"instance": f"{ip}:9100", "cmp_metric": "memory"}, "value": [1700000000.0, "45.678901"]})
+        bodies.append(vector_body(series))
+    return bodies
+
+
+def client_fleet(bodies, user_ips):
+    metrics_map = {}
+    for body, kind in zip(bodies, ("cpu", "memory")):
+        parse_metrics(json.loads(body)["data"]["result"], kind, metrics_map)
+    return {ip: metrics_map.get(ip, {}) for ip in user_ips}
+
+
+def client_scoped(bodies, scope: InstanceScope):
+    metrics_map = {}
+    for body in bodies:
+        scope.parse(json.loads(body)["data"]["result"], metrics_map)
+    return {ip: metrics_map.get(ip, {}) for ip in scope.ips}
+
+
+def time_it(fn, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples)
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="fleet-wide vs instance-scoped PromQL payload/parse benchmark")
+    p.add_argument("--fleet", type=int, default=20000, help="Prometheus 가 수집하는 전체 인스턴스 수")
+    p.add_argument("--vms", type=lambda s: [int(v) for v in s.split(",")], default=[10, 100, 1000],
+                   help="사용자 VM 수 (쉼표 구분)")
+    p.add_argument("--chunk-size", type=int, default=50)
+    p.add_argument("--runs", type=int, default=7)
+    p.add_argument("--output", default=None, help="결과 JSON 저장 경로 (기본: stdout)")
+    return p.parse_args()
+
+
+def main_cli():
+    args = parse_args()
+    ips = fleet_ips(args.fleet)
+    fleet = fleet_bodies(ips)
+    results = []
+    for n in args.vms:
+        user_ips = ips[:: max(1, args.fleet // n)][:n]
+        scope = InstanceScope(user_ips, args.chunk_size)
+        scoped = scoped_bodies(scope, args.chunk_size)
+        assert client_fleet(fleet, user_ips) == client_scoped(scoped, scope)
+        fleet_s = time_it(lambda: client_fleet(fleet, user_ips), args.runs)
+        scoped_s = time_it(lambda: client_scoped(scoped, scope), args.runs)
+        results.append({
+            "user_vms": n,
+            "fleet": {"queries": len(fleet), "bytes": sum(map(len, fleet)), "client_ms": round(fleet_s * 1000, 3)},
+            "scoped": {
+                "queries": len(scope.queries),
+                "bytes": sum(map(len, scoped)),
+                "query_chars": sum(map(len, scope.queries)),
+                "client_ms": round(scoped_s * 1000, 3),
+            },
+            "speedup": round(fleet_s / scoped_s, 1) if scoped_s else None,
+        })
+
+    report = {"fleet_instances": args.fleet, "chunk_size": args.chunk_size, "runs": args.runs, "results": results}
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main_cli()
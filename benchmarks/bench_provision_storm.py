@@ -0,0 +1,166 @@
+"""
+provisioning 폭주(storm) 재현: sim runner(가상 시계)로 수천~수만 건을 실제 영속 계층에 대해 실행.
+main.app 을 프로세스 안에서(httpx ASGITransport) 띄워 POST /api/provision 으로 job 을 넣고,
+모든 프로젝트가 COMPLETED/FAILED 가 될 때까지 기다린 뒤 실제/가상 소요 시간, 결과 수, 스케줄러 대기,
+DB 부작용(provision_logs / ip_allocations / project_resources 행 수)을 JSON 으로 출력.
+DB 는 기본 임시 SQLite 파일, --db-url 로 로컬 Postgres 지정 가능.
+
+    python benchmarks/bench_provision_storm.py --projects 2000 --concurrency 2000 --clock discrete
+    python benchmarks/bench_provision_storm.py --projects 10000 --concurrency 10000 --clock scaled --time-scale 600 --failure-rate 0.02
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+TEMPLATES = ["single", "standard", "enterprise", "k8s_small"]
+
+
+async def submit_all(client, total: int, concurrency: int) -> float:
+    """POST /api/provision total 건 (동시 concurrency), 걸린 시간 반환."""
+    counter = iter(range(total))
+    rng = random.Random(0)
+
+    async def worker():
+        for i in counter:
+            r = await client.post("/api/provision", json={
+                "serviceName": f"storm-{i}",
+                "userName": f"user-{i % 50}",
+                "config": {"template": rng.choice(TEMPLATES)},
+                "targetInfra": {},
+            })
+            r.raise_for_status()
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - t0
+
+
+async def wait_until_drained(main, timeout: float, progress: bool) -> float:
+    from sqlalchemy import func, select
+
+    done = (main.CONFIG["status_completed"], main.CONFIG["status_failed"])
+    t0 = time.perf_counter()
+    while time.perf_counter() - t0 < timeout:
+        async with main.AsyncSessionLocal() as db:
+            pending = (await db.execute(
+                select(func.count(main.ProjectHistory.id)).where(main.ProjectHistory.status.notin_(done))
+            )).scalar()
+        if progress:
+            print(f"[{time.perf_counter() - t0:7.1f}s] pending={pending} {main.provision_scheduler.stats()['running']} running",
+                  file=sys.stderr)
+        if pending == 0:
+            break
+        await asyncio.sleep(1.0)
+    return time.perf_counter() - t0
+
+
+async def count_rows(main) -> dict:
+    from sqlalchemy import func, select
+
+    out = {}
+    async with main.AsyncSessionLocal() as db:
+        for name, model in (("projects", main.ProjectHistory), ("provision_logs", main.ProvisionLog),
+                            ("ip_allocations", main.IpAllocation), ("project_resources", main.ProjectResource)):
+            out[name] = (await db.execute(select(func.count()).select_from(model))).scalar()
+        rows = (await db.execute(
+            select(main.ProjectHistory.status, func.count(main.ProjectHistory.id)).group_by(main.ProjectHistory.status)
+        )).all()
+        out["projects_by_status"] = {status: n for status, n in rows}
+    return out
+
+
+async def run(args) -> dict:
+    import httpx
+
+    import main
+    from services.runners.sim_runner import sim_clock, sim_stats
+
+    report = {
+        "started_at": datetime.now().isoformat(),
+        "params": {
+            "projects": args.projects,
+            "concurrency": args.concurrency,
+            "clock": args.clock,
+            "time_scale": args.time_scale,
+            "failure_rate": args.failure_rate,
+            "seed": args.seed,
+        },
+    }
+    async with main.app.router.lifespan_context(main.app):
+        report["db_url"] = str(main.db_manager.engine.url)
+        sim_clock.configure(args.clock, args.time_scale)
+        sim_stats.reset()
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://storm", timeout=None) as client:
+            t0 = time.perf_counter()
+            report["submit_seconds"] = round(await submit_all(client, args.projects, args.submit_concurrency), 3)
+            await wait_until_drained(main, args.timeout, args.progress)
+            real = time.perf_counter() - t0
+        report["real_seconds"] = round(real, 3)
+        report["virtual_seconds"] = round(sim_clock.elapsed(), 3)
+        report["compression"] = round(sim_clock.elapsed() / real, 1) if real else None
+        report["simulation"] = sim_stats.summary()
+        report["scheduler"] = main.provision_scheduler.stats()
+        report["rows"] = await count_rows(main)
+    report["peak_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return report
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="provisioning storm replay with the simulation runner")
+    p.add_argument("--projects", type=int, default=2000)
+    p.add_argument("--concurrency", type=int, default=2000, help="스케줄러 전역/템플릿별 동시 실행 수")
+    p.add_argument("--submit-concurrency", type=int, default=32, help="POST /api/provision 동시 요청 수")
+    p.add_argument("--clock", choices=["scaled", "discrete"], default="discrete")
+    p.add_argument("--time-scale", type=float, default=600.0, help="scaled 모드 배속")
+    p.add_argument("--failure-rate", type=float, default=None, help="SIM_FAILURE_RATE 덮어쓰기")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--timeout", type=float, default=1800.0)
+    p.add_argument("--db-url", default=None, help="기본: 임시 SQLite 파일. 예) postgresql://user:pw@localhost:5432/storm")
+    p.add_argument("--progress", action="store_true", help="대기 중 진행 상황을 stderr 로")
+    p.add_argument("--output", default=None, help="결과 JSON 저장 경로 (기본: stdout)")
+    return p.parse_args()
+
+
+def main_cli():
+    args = parse_args()
+    tmpdir = tempfile.mkdtemp(prefix="cmp-storm-")
+    os.environ["CMP_DATABASE_URL"] = args.db_url or f"sqlite:///{os.path.join(tmpdir, 'storm.db')}"
+    os.environ["CMP_SQLITE_URL"] = f"sqlite:///{os.path.join(tmpdir, 'fallback.db')}"
+
+    # 스케줄러/runner 는 main import 시점의 CONFIG 로 만들어지므로 먼저 설정
+    from config import CONFIG
+    CONFIG["provision_runner"] = "sim"
+    CONFIG["sim_clock_mode"] = args.clock
+    CONFIG["sim_time_scale"] = args.time_scale
+    CONFIG["sim_seed"] = args.seed
+    if args.failure_rate is not None:
+        CONFIG["sim_failure_rate"] = args.failure_rate
+    CONFIG["provision_max_concurrency"] = args.concurrency
+    CONFIG["provision_template_concurrency"] = {}
+    CONFIG["provision_default_template_concurrency"] = args.concurrency
+    CONFIG["prometheus_urls"] = []
+
+    os.chdir(ROOT)
+    report = asyncio.run(run(args))
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -33,6 +33,151 @@ MOCK_LOG_STEPS = [
 # Mock 각 단계 대기 시간(초) - 시뮬레이션
 MOCK_STEP_DELAY_SECONDS = 0.8
 
+# Prometheus (SSH 터널링된 로컬 포트 가정). 여러 개면 동시에 조회 후 결과 병합
+# HARDCODED CONFIG START -- TODO: 나중에 실제 Prometheus URL로 교체
+PROMETHEUS_URLS = ["http://localhost:19090"]
+# HARDCODED CONFIG END
+PROMETHEUS_QUERY_TIMEOUT_SECONDS = 2.0
+PROMETHEUS_MAX_CONNECTIONS = 20
+# 연속 실패 N회 시 일정 시간 해당 엔드포인트 호출 생략 (서킷 브레이커)
+PROMETHEUS_BREAKER_FAILURES = 3
+PROMETHEUS_BREAKER_RESET_SECONDS = 10.0
+# CPU/메모리 쿼리에 넣는 instance=~"(ip1|ip2|...):.*" matcher 하나당 IP 수. 넘으면 쿼리를 나눠 동시에 평가
+# (GET URL 길이 제한: 합친 쿼리에 matcher 가 3번 들어가므로 IP 50개 ≈ 인코딩 후 5KB)
+PROMETHEUS_INSTANCE_CHUNK_SIZE = 50
+
+# 모니터링 백그라운드 폴러: 주기마다 CPU/메모리 쿼리 1회, 스냅샷 TTL 초과 시 요청 경로에서 갱신
+METRICS_POLL_INTERVAL_SECONDS = 5.0
+METRICS_SNAPSHOT_TTL_SECONDS = 15.0
+# 모니터링 히스토리 ring buffer 보관 시간(초). 시리즈당 메모리 = 4 bytes x (보관 시간 / 폴링 주기)
+METRICS_HISTORY_RETENTION_SECONDS = 3600
+# /api/monitoring/series (Prometheus query_range + 서버 다운샘플링)
+# step 은 최소 MIN_STEP, 시리즈당 원본 포인트가 MAX_POINTS 를 넘지 않게 자동으로 키움 (Prometheus 기본 한도 11000)
+MONITORING_SERIES_MAX_RANGE_SECONDS = 30 * 24 * 3600
+MONITORING_SERIES_MIN_STEP_SECONDS = 15
+MONITORING_SERIES_MAX_POINTS = 11000
+MONITORING_SERIES_MAX_WIDTH = 4000
+
+# provisioning 이벤트 스트림 (SSE / WebSocket)
+# 이벤트 id = provision_logs.seq: 재접속(Last-Event-ID)은 DB 에서 이어 읽음
+EVENT_SUBSCRIBER_BUFFER_SIZE = 256   # 구독자별 큐 크기. 넘치면 다시 구독하고 빠진 구간은 DB 에서 채움
+EVENT_POLL_INTERVAL_SECONDS = 1.0    # job 이 이 프로세스에서 실행 중이 아닐 때(다른 워커) DB 확인 주기
+EVENT_KEEPALIVE_SECONDS = 15.0
+
+# provisioning 스케줄러: 전역 / 템플릿별(TEMPLATE_MAP 키) 동시 실행 수
+PROVISION_MAX_CONCURRENCY = 16
+PROVISION_TEMPLATE_CONCURRENCY = {
+    "single": 8,
+    "standard": 4,
+    "enterprise": 2,
+    "k8s_small": 2,
+}
+PROVISION_DEFAULT_TEMPLATE_CONCURRENCY = 4  # TEMPLATE_MAP 에 없는 템플릿
+
+# DB 작업 큐 (provision_jobs): lease 만료 시 다른 워커가 회수, heartbeat 로 연장
+JOB_LEASE_SECONDS = 30.0
+JOB_HEARTBEAT_SECONDS = 10.0
+JOB_POLL_INTERVAL_SECONDS = 1.0
+JOB_MAX_ATTEMPTS = 3
+
+# WorkloadTestPool 할당기: 빈 VM id 를 메모리 free-list 로 캐시 (단일 프로세스/SQLite 에서 유리)
+VM_ALLOCATOR_CACHE = False
+
+# IPAM (services.ipam): Mock runner 가 리소스 IP 를 할당하는 풀.
+# reserved 는 단일 IP / CIDR / "시작-끝" 범위. 각 CIDR 의 네트워크·브로드캐스트 주소는 자동 예약
+IPAM_POOLS = {
+    "mock": {
+        "cidrs": [f"{MOCK_IP_BASE}.0.0/16"],
+        "reserved": [f"{MOCK_IP_BASE}.{MOCK_IP_SECOND_OCTET}.1", f"{MOCK_IP_BASE}.255.0/24"],
+    },
+}
+IPAM_DEFAULT_POOL = "mock"
+# 템플릿의 VM 들을 연속된 주소로 할당 (연속 구간이 없으면 흩어진 주소로 채움)
+IPAM_PREFER_CONTIGUOUS = True
+
+# DB 시작: PostgreSQL 연결을 기다리는 최대 시간(초). 넘으면 SQLite 로 시작 후 주기적으로 재연결 시도
+DB_STARTUP_BUDGET_SECONDS = 2.0
+DB_RECONNECT_INTERVAL_SECONDS = 15.0
+
+# SystemSetting 캐시: 다른 워커의 설정 변경(settings.version)을 확인하는 주기(초)
+SETTINGS_CHECK_INTERVAL_SECONDS = 5.0
+
+# 폴링 API(/api/history, /api/monitoring/my-resources) ETag 용 데이터 버전:
+# 다른 워커의 변경을 반영하기 위해 버전 행을 확인하는 주기(초)
+DATA_VERSION_CHECK_INTERVAL_SECONDS = 1.0
+
+# Provisioning runner 선택: "mock" (기본, 가짜 리소스) / "ansible" (ansible-playbook 실행)
+# / "sim" (mock 과 같은 DB 기록 + 가상 시계, 부하 테스트용)
+PROVISION_RUNNER = "mock"
+
+# Simulation runner (services.runners.sim_runner)
+# 가상 시계: "scaled" (가상 시간이 SIM_TIME_SCALE 배속) / "discrete" (실행 중인 job 이 모두 대기 중이면 다음 사건 시각으로 즉시 이동)
+SIM_CLOCK_MODE = "scaled"
+SIM_TIME_SCALE = 60.0
+SIM_SEED = 0
+# 모든 단계에 추가로 적용하는 실패 확률 (단계별 fail_rate 와 별개)
+SIM_FAILURE_RATE = 0.0
+# 템플릿별 단계 프로파일 (없는 템플릿은 "default"). latency 는 가상 초:
+# 숫자(고정) 또는 {"dist": "fixed|uniform|normal|lognormal|exponential", ...분포 인자, "max": 상한}
+# per_vm: VM(TEMPLATE_MAP 수) 마다 지연을 뽑아 가장 느린 VM 까지 대기
+SIM_STEP_PROFILES = {
+    "default": [
+        {"message": MOCK_LOG_STEPS[0], "latency": {"dist": "lognormal", "median": 2.0, "sigma": 0.3}},
+        {"message": MOCK_LOG_STEPS[1], "latency": {"dist": "lognormal", "median": 90.0, "sigma": 0.4, "max": 900.0},
+         "per_vm": True, "fail_rate": 0.01},
+        {"message": MOCK_LOG_STEPS[2], "latency": {"dist": "lognormal", "median": 120.0, "sigma": 0.5, "max": 900.0},
+         "fail_rate": 0.01},
+        {"message": MOCK_LOG_STEPS[3], "latency": {"dist": "uniform", "low": 10.0, "high": 30.0}},
+        {"message": MOCK_LOG_STEPS[4], "latency": {"dist": "exponential", "mean": 5.0}, "per_vm": True},
+        {"message": MOCK_LOG_STEPS[5], "latency": 0},
+    ],
+    "k8s_small": [
+        {"message": MOCK_LOG_STEPS[0], "latency": {"dist": "lognormal", "median": 2.0, "sigma": 0.3}},
+        {"message": "Creating control plane...", "latency": {"dist": "lognormal", "median": 180.0, "sigma": 0.4, "max": 1200.0},
+         "fail_rate": 0.02},
+        {"message": "Joining worker nodes...", "latency": {"dist": "lognormal", "median": 120.0, "sigma": 0.5, "max": 1200.0},
+         "per_vm": True, "fail_rate": 0.02},
+        {"message": "Installing CNI...", "latency": {"dist": "normal", "mean": 40.0, "stddev": 10.0}},
+        {"message": MOCK_LOG_STEPS[4], "latency": {"dist": "exponential", "mean": 5.0}, "per_vm": True},
+        {"message": MOCK_LOG_STEPS[5], "latency": 0},
+    ],
+}
+
+# Ansible Runner
+# ansible-playbook 실행 명령 (공백으로 인자 구분, 환경변수 CMP_ANSIBLE_PLAYBOOK 로 덮어쓰기 가능)
+ANSIBLE_PLAYBOOK_CMD = "ansible-playbook"
+# 이벤트를 한 줄에 JSON 하나씩 즉시 출력하는 stdout callback (전체 출력을 모았다가 내보내는 json callback 대신)
+ANSIBLE_STDOUT_CALLBACK = "ansible.posix.jsonl"
+# 템플릿별 VM 생성 playbook (VM 마다 한 번씩, 동시에 실행)
+ANSIBLE_TEMPLATE_PLAYBOOKS = {
+    "single": "deploy_linux_web.yml",
+    "standard": "deploy_linux_web.yml",
+    "enterprise": "deploy_linux_web.yml",
+    "k8s_small": "deploy_k8s_cluster.yml",
+}
+ANSIBLE_DEFAULT_PLAYBOOK = "deploy_linux_web.yml"
+ANSIBLE_JUMPHOST_PLAYBOOK = "deploy_windows_jumphost.yml"   # config.jumphost=true 일 때 추가
+ANSIBLE_CONFIGURE_PLAYBOOK = "configure_workload.yml"       # config.packages 가 있을 때 VM 생성 후 실행
+ANSIBLE_MAX_PARALLEL = 8            # project 당 동시에 실행하는 ansible-playbook 프로세스 수
+ANSIBLE_SHARD_SIZE = 10             # configure 단계에서 프로세스 하나가 맡는 VM 수
+ANSIBLE_PLAYBOOK_TIMEOUT_SECONDS = 1800.0
+ANSIBLE_LOG_FLUSH_LINES = 20        # 로그를 이 줄 수 또는 아래 주기마다 모아서 DB 에 기록
+ANSIBLE_LOG_FLUSH_SECONDS = 0.5
+
+# UI 템플릿 제공: True 면 요청마다 파일 변경을 확인해 다시 읽음 (개발용)
+TEMPLATES_RELOAD = False
+# /templates 정적 마운트의 Cache-Control max-age(초)
+TEMPLATES_STATIC_MAX_AGE_SECONDS = 86400
+
+# 진단 도구 (기본 꺼짐, 꺼져 있으면 미들웨어/엔진 이벤트를 설치하지 않음)
+# - PROFILING_ENABLED: 관리자가 X-Profile: 1 헤더(또는 ?_profile=1)를 붙인 요청만 cProfile. PROFILE_DIR 이 있으면 .prof 저장
+# - SLOW_QUERY_THRESHOLD_MS: 0 보다 크면 이 시간을 넘긴 SQL 을 로그 + /api/admin/slow-queries 에 기록
+PROFILING_ENABLED = False
+PROFILE_DIR = None
+PROFILE_KEEP = 20
+SLOW_QUERY_THRESHOLD_MS = 0
+SLOW_QUERY_KEEP = 200
+
 # 상태값 (기존 UI 배지와 맞춤: COMPLETED=녹색, FAILED=빨강)
 STATUS_PENDING = "PENDING"
 STATUS_RUNNING = "RUNNING"
@@ -47,6 +192,61 @@ CONFIG = {
     "mock_db_vip_suffix": MOCK_DB_VIP_SUFFIX,
     "mock_log_steps": MOCK_LOG_STEPS,
     "mock_step_delay_seconds": MOCK_STEP_DELAY_SECONDS,
+    "prometheus_urls": PROMETHEUS_URLS,
+    "prometheus_query_timeout_seconds": PROMETHEUS_QUERY_TIMEOUT_SECONDS,
+    "prometheus_max_connections": PROMETHEUS_MAX_CONNECTIONS,
+    "prometheus_breaker_failures": PROMETHEUS_BREAKER_FAILURES,
+    "prometheus_breaker_reset_seconds": PROMETHEUS_BREAKER_RESET_SECONDS,
+    "prometheus_instance_chunk_size": PROMETHEUS_INSTANCE_CHUNK_SIZE,
+    "metrics_poll_interval_seconds": METRICS_POLL_INTERVAL_SECONDS,
+    "metrics_snapshot_ttl_seconds": METRICS_SNAPSHOT_TTL_SECONDS,
+    "metrics_history_retention_seconds": METRICS_HISTORY_RETENTION_SECONDS,
+    "monitoring_series_max_range_seconds": MONITORING_SERIES_MAX_RANGE_SECONDS,
+    "monitoring_series_min_step_seconds": MONITORING_SERIES_MIN_STEP_SECONDS,
+    "monitoring_series_max_points": MONITORING_SERIES_MAX_POINTS,
+    "monitoring_series_max_width": MONITORING_SERIES_MAX_WIDTH,
+    "event_subscriber_buffer_size": EVENT_SUBSCRIBER_BUFFER_SIZE,
+    "event_poll_interval_seconds": EVENT_POLL_INTERVAL_SECONDS,
+    "event_keepalive_seconds": EVENT_KEEPALIVE_SECONDS,
+    "provision_max_concurrency": PROVISION_MAX_CONCURRENCY,
+    "provision_template_concurrency": PROVISION_TEMPLATE_CONCURRENCY,
+    "provision_default_template_concurrency": PROVISION_DEFAULT_TEMPLATE_CONCURRENCY,
+    "job_lease_seconds": JOB_LEASE_SECONDS,
+    "job_heartbeat_seconds": JOB_HEARTBEAT_SECONDS,
+    "job_poll_interval_seconds": JOB_POLL_INTERVAL_SECONDS,
+    "job_max_attempts": JOB_MAX_ATTEMPTS,
+    "vm_allocator_cache": VM_ALLOCATOR_CACHE,
+    "ipam_pools": IPAM_POOLS,
+    "ipam_default_pool": IPAM_DEFAULT_POOL,
+    "ipam_prefer_contiguous": IPAM_PREFER_CONTIGUOUS,
+    "db_startup_budget_seconds": DB_STARTUP_BUDGET_SECONDS,
+    "db_reconnect_interval_seconds": DB_RECONNECT_INTERVAL_SECONDS,
+    "settings_check_interval_seconds": SETTINGS_CHECK_INTERVAL_SECONDS,
+    "data_version_check_interval_seconds": DATA_VERSION_CHECK_INTERVAL_SECONDS,
+    "provision_runner": PROVISION_RUNNER,
+    "sim_clock_mode": SIM_CLOCK_MODE,
+    "sim_time_scale": SIM_TIME_SCALE,
+    "sim_seed": SIM_SEED,
+    "sim_failure_rate": SIM_FAILURE_RATE,
+    "sim_step_profiles": SIM_STEP_PROFILES,
+    "ansible_playbook_cmd": ANSIBLE_PLAYBOOK_CMD,
+    "ansible_stdout_callback": ANSIBLE_STDOUT_CALLBACK,
+    "ansible_template_playbooks": ANSIBLE_TEMPLATE_PLAYBOOKS,
+    "ansible_default_playbook": ANSIBLE_DEFAULT_PLAYBOOK,
+    "ansible_jumphost_playbook": ANSIBLE_JUMPHOST_PLAYBOOK,
+    "ansible_configure_playbook": ANSIBLE_CONFIGURE_PLAYBOOK,
+    "ansible_max_parallel": ANSIBLE_MAX_PARALLEL,
+    "ansible_shard_size": ANSIBLE_SHARD_SIZE,
+    "ansible_playbook_timeout_seconds": ANSIBLE_PLAYBOOK_TIMEOUT_SECONDS,
+    "ansible_log_flush_lines": ANSIBLE_LOG_FLUSH_LINES,
+    "ansible_log_flush_seconds": ANSIBLE_LOG_FLUSH_SECONDS,
+    "templates_reload": TEMPLATES_RELOAD,
+    "templates_static_max_age_seconds": TEMPLATES_STATIC_MAX_AGE_SECONDS,
+    "profiling_enabled": PROFILING_ENABLED,
+    "profile_dir": PROFILE_DIR,
+    "profile_keep": PROFILE_KEEP,
+    "slow_query_threshold_ms": SLOW_QUERY_THRESHOLD_MS,
+    "slow_query_keep": SLOW_QUERY_KEEP,
     "status_pending": STATUS_PENDING,
     "status_running": STATUS_RUNNING,
     "status_completed": STATUS_COMPLETED,
@@ -0,0 +1,69 @@
+"""
+테스트용 가짜 ansible-playbook.
+실제 playbook 을 실행하지 않고 ansible.posix.jsonl callback 형식의 이벤트를 한 줄씩 출력.
+
+    CMP_ANSIBLE_PLAYBOOK="python fake_ansible_playbook.py" uvicorn main:app
+    python fake_ansible_playbook.py deploy_linux_web.yml -e '{"target_vm_name": "WKLD-1"}'
+
+환경변수
+- FAKE_ANSIBLE_TASK_DELAY: task 하나당 대기 시간(초), 기본 0.1
+- FAKE_ANSIBLE_TASKS: task 수, 기본 3
+- FAKE_ANSIBLE_FAIL_HOST: 이 문자열이 들어간 host 는 마지막 task 에서 실패 (exit 2)
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+
+def emit(event: dict) -> None:
+    event.setdefault("_timestamp", time.strftime("%Y-%m-%dT%H:%M:%S"))
+    sys.stdout.write(json.dumps(event, ensure_ascii=False) + "\n")
+    sys.stdout.flush()
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("playbook")
+    p.add_argument("-e", "--extra-vars", default="{}")
+    p.add_argument("-i", "--inventory", default=None)
+    args, _ = p.parse_known_args()
+
+    extra = json.loads(args.extra_vars)
+    if args.inventory:
+        hosts = [h for h in args.inventory.split(",") if h]
+    elif extra.get("target_vm_name"):
+        hosts = [extra["target_vm_name"]]
+    else:
+        hosts = ["localhost"]
+
+    delay = float(os.environ.get("FAKE_ANSIBLE_TASK_DELAY", "0.1"))
+    tasks = int(os.environ.get("FAKE_ANSIBLE_TASKS", "3"))
+    fail_host = os.environ.get("FAKE_ANSIBLE_FAIL_HOST")
+    name = os.path.basename(args.playbook)
+
+    print(f"[WARNING]: fake ansible-playbook ({name})", file=sys.stderr)
+    emit({"_event": "v2_playbook_on_play_start", "play": {"name": name}})
+    stats = {h: {"ok": 0, "changed": 0, "failed": 0, "unreachable": 0} for h in hosts}
+    failed = False
+    for n in range(1, tasks + 1):
+        emit({"_event": "v2_playbook_on_task_start", "task": {"name": f"task {n}"}})
+        time.sleep(delay)
+        for h in hosts:
+            if fail_host and fail_host in h and n == tasks:
+                emit({"_event": "v2_runner_on_failed", "hosts": {h: {"msg": "simulated failure"}}, "task": {"name": f"task {n}"}})
+                stats[h]["failed"] += 1
+                failed = True
+            else:
+                emit({"_event": "v2_runner_on_ok", "hosts": {h: {"changed": n == 1}}, "task": {"name": f"task {n}"}})
+                stats[h]["ok"] += 1
+                stats[h]["changed"] += int(n == 1)
+    emit({"_event": "v2_playbook_on_stats", "stats": stats})
+    if failed:
+        print("fatal: simulated failure", file=sys.stderr)
+    sys.exit(2 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Ansible 동적 inventory 스크립트: CMP 백엔드의 /api/inventory 를 읽어 출력.
+
+    ansible-playbook -i inventory.py deploy_linux_web.yml
+    CMP_INVENTORY_PROJECT=12 ansible-playbook -i inventory.py configure_workload.yml
+    python inventory.py --list
+    python inventory.py --host WKLD-20
+
+Ansible 은 playbook 실행마다(때로는 호스트마다 --host 로) 이 스크립트를 부르므로
+- 응답 본문을 ETag 와 함께 파일로 캐시하고, CMP_INVENTORY_MAX_AGE 초 안의 재호출은 서버에 묻지 않음
+- 그보다 오래됐으면 If-None-Match 로 확인해 304 면 캐시 파일 사용 (서버도 데이터 버전이 같으면 DB 를 안 읽음)
+- --host 는 캐시된 _meta.hostvars 에서 답함 (호스트 수만큼 HTTP 요청하지 않음)
+- 서버에 닿지 않으면 캐시가 있으면 그것을 사용
+
+환경변수
+- CMP_INVENTORY_URL: 기본 http://localhost:8000/api/inventory
+- CMP_INVENTORY_PROJECT: 이 프로젝트의 호스트만
+- CMP_INVENTORY_MAX_AGE: 서버 확인 없이 캐시를 쓰는 시간(초), 기본 5
+- CMP_INVENTORY_CACHE_DIR: 캐시 디렉터리, 기본 임시 디렉터리/cmp-inventory
+- CMP_INVENTORY_TIMEOUT: 요청 타임아웃(초), 기본 10
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+
+def inventory_url() -> str:
+    url = os.environ.get("CMP_INVENTORY_URL", "http://localhost:8000/api/inventory")
+    project = os.environ.get("CMP_INVENTORY_PROJECT")
+    if project:
+        url += ("&" if "?" in url else "?") + urllib.parse.urlencode({"project_id": project})
+    return url
+
+
+def cache_paths(url: str):
+    directory = os.environ.get("CMP_INVENTORY_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "cmp-inventory")
+    os.makedirs(directory, exist_ok=True)
+    key = hashlib.sha1(url.encode()).hexdigest()[:16]
+    return os.path.join(directory, f"{key}.json"), os.path.join(directory, f"{key}.etag")
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    # 병렬로 실행된 ansible 프로세스가 반쯤 쓴 파일을 읽지 않도록 rename 으로 교체
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def load_inventory() -> bytes:
+    url = inventory_url()
+    body_path, etag_path = cache_paths(url)
+    max_age = float(os.environ.get("CMP_INVENTORY_MAX_AGE", "5"))
+    cached = None
+    if os.path.exists(body_path):
+        with open(body_path, "rb") as f:
+            cached = f.read()
+        if time.time() - os.path.getmtime(body_path) < max_age:
+            return cached
+
+    req = urllib.request.Request(url, headers={"Accept": "application/json"})
+    if cached is not None and os.path.exists(etag_path):
+        with open(etag_path, "r", encoding="utf-8") as f:
+            req.add_header("If-None-Match", f.read().strip())
+    try:
+        with urllib.request.urlopen(req, timeout=float(os.environ.get("CMP_INVENTORY_TIMEOUT", "10"))) as resp:
+            body = resp.read()
+            etag = resp.headers.get("ETag")
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and cached is not None:
+            os.utime(body_path)  # max_age 동안 다시 묻지 않음
+            return cached
+        raise
+    except urllib.error.URLError as e:
+        if cached is not None:
+            print(f"inventory: {url} 에 연결 실패 ({e.reason}), 캐시 사용", file=sys.stderr)
+            return cached
+        raise
+
+    _write_atomic(body_path, body)
+    if etag:
+        _write_atomic(etag_path, etag.encode())
+    elif os.path.exists(etag_path):
+        os.remove(etag_path)
+    return body
+
+
+def main():
+    p = argparse.ArgumentParser(description="CMP dynamic inventory for Ansible")
+    p.add_argument("--list", action="store_true")
+    p.add_argument("--host", default=None)
+    args = p.parse_args()
+
+    inventory = json.loads(load_inventory())
+    if args.host is not None:
+        out = inventory.get("_meta", {}).get("hostvars", {}).get(args.host, {})
+    else:
+        out = inventory
+    json.dump(out, sys.stdout)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+WorkloadTestPool VM 할당기.
+- claim: 빈 VM K대를 UPDATE 한 문장으로 원자적으로 점유 (모자라면 전부 롤백, VMPoolExhausted).
+  Postgres: 후보 SELECT 에 FOR UPDATE SKIP LOCKED → 동시 요청이 같은 행을 기다리지 않고 서로 다른 행을 가져감.
+  SQLite: DB 쓰기가 어차피 직렬화되므로 프로세스 내 락으로 줄 세워 BUSY 재시도 없이 바로 실행.
+- release: 프로젝트의 VM 을 UPDATE 한 번으로 반납.
+- use_cache=True: 빈 VM id 를 메모리 free-list 에 미리 읽어 두고 그 id 들로 바로 UPDATE
+  (매번 빈 행을 찾는 스캔 생략). 다른 프로세스가 먼저 가져간 id 는 UPDATE 조건(is_used=false)에서 걸러지고 재시도.
+  free-list 락은 메모리 연산만 보호 (채우기 위한 DB 조회는 락 밖).
+ORM 클래스는 생성 시 주입 (순환 import 방지).
+"""
+import threading
+from collections import deque
+from typing import Dict, Any, List
+
+from sqlalchemy import select, update, func
+
+from services.lease import check_lease
+
+
+class VMPoolExhausted(Exception):
+    """요청한 수만큼 빈 VM 이 없음."""
+
+
+class VMAllocator:
+    def __init__(self, pool_model, use_cache: bool = False, cache_refill_size: int = 256, max_retries: int = 3):
+        self.pool_model = pool_model
+        self.use_cache = use_cache
+        self.cache_refill_size = cache_refill_size
+        self.max_retries = max_retries
+        self._sqlite_lock = threading.Lock()
+        self._cache_lock = threading.Lock()
+        self._free_ids: deque = deque()
+
+    # ---------- public API ----------
+    def claim(self, db, project_id: int, user: str, count: int) -> List[Dict[str, Any]]:
+        """
+        빈 VM count 대를 project_id/user 로 점유하고 commit.
+        [{id, vm_name, ip_address}, ...] 반환. 부족하면 롤백 후 VMPoolExhausted.
+        """
+        if count <= 0:
+            return []
+        if db.bind.dialect.name == "sqlite":
+            with self._sqlite_lock:
+                return self._claim(db, project_id, user, count)
+        return self._claim(db, project_id, user, count)
+
+    def release(self, db, project_id: int, commit: bool = True) -> int:
+        """프로젝트가 점유한 VM 을 한 번에 반납. 반납한 대수 반환."""
+        m = self.pool_model
+        rows = db.execute(
+            update(m)
+            .where(m.project_id == project_id)
+            .values(is_used=False, project_id=None, occupy_user=None)
+            .returning(m.id)
+        ).scalars().all()
+        if commit:
+            db.commit()
+        if self.use_cache and rows:
+            with self._cache_lock:
+                self._free_ids.extend(rows)
+        return len(rows)
+
+    # ---------- internals ----------
+    def _claim(self, db, project_id: int, user: str, count: int) -> List[Dict[str, Any]]:
+        try:
+            if self.use_cache:
+                claimed = self._claim_from_cache(db, project_id, user, count)
+            else:
+                claimed = self._claim_scan(db, project_id, user, count)
+            if len(claimed) < count:
+                raise VMPoolExhausted(f"빈 VM 부족 (요청 {count}대, 확보 {len(claimed)}대)")
+            check_lease(db)
+            db.commit()
+            return claimed
+        except Exception:
+            db.rollback()
+            raise
+
+    def _update_returning(self, db, where_ids, project_id: int, user: str) -> List[Dict[str, Any]]:
+        m = self.pool_model
+        stmt = (
+            update(m)
+            .where(m.id.in_(where_ids), m.is_used == False)
+            .values(is_used=True, project_id=project_id, occupy_user=user)
+            .returning(m.id, m.vm_name, m.ip_address)
+        )
+        return [{"id": r[0], "vm_name": r[1], "ip_address": r[2]} for r in db.execute(stmt).all()]
+
+    def _claim_scan(self, db, project_id: int, user: str, count: int) -> List[Dict[str, Any]]:
+        m = self.pool_model
+        candidates = select(m.id).where(m.is_used == False).order_by(m.id).limit(count)
+        if db.bind.dialect.name == "postgresql":
+            candidates = candidates.with_for_update(skip_locked=True)
+        return self._update_returning(db, candidates, project_id, user)
+
+    def _pop_cached(self, n: int) -> List[int]:
+        with self._cache_lock:
+            return [self._free_ids.popleft() for _ in range(min(n, len(self._free_ids)))]
+
+    def _take_cached_ids(self, db, n: int) -> List[int]:
+        """
+        free-list 에서 n 개. 모자라면 DB 에서 빈 id 를 다시 읽어 채움 (DB 조회는 락 밖).
+        읽는 사이 다른 스레드가 가져간 id 가 다시 들어와도 UPDATE 조건(is_used=false)이 한쪽만 통과시킴.
+        """
+        ids = self._pop_cached(n)
+        if len(ids) >= n:
+            return ids
+        m = self.pool_model
+        with self._cache_lock:
+            cached = len(self._free_ids)
+        fresh = db.execute(
+            select(m.id).where(m.is_used == False).order_by(m.id)
+            .limit(max(n, self.cache_refill_size) + cached + len(ids))
+        ).scalars().all()
+        with self._cache_lock:
+            known = set(self._free_ids)
+            known.update(ids)
+            self._free_ids.extend(i for i in fresh if i not in known)
+        return ids + self._pop_cached(n - len(ids))
+
+    def _claim_from_cache(self, db, project_id: int, user: str, count: int) -> List[Dict[str, Any]]:
+        claimed: List[Dict[str, Any]] = []
+        for _ in range(self.max_retries):
+            need = count - len(claimed)
+            ids = self._take_cached_ids(db, need)
+            if not ids:
+                break
+            claimed.extend(self._update_returning(db, ids, project_id, user))
+            if len(claimed) >= count:
+                break
+        return claimed
+
+    def invalidate_cache(self) -> None:
+        with self._cache_lock:
+            self._free_ids.clear()
+
+    def free_count(self, db) -> int:
+        m = self.pool_model
+        return db.execute(select(func.count(m.id)).where(m.is_used == False)).scalar() or 0
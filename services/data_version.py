@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+폴링되는 JSON API(/api/history, /api/monitoring/my-resources)용 데이터 버전.
+- 프로젝트 데이터가 바뀌는 트랜잭션(update_provision_status, create_infrastructure, delete_project)은
+  같은 트랜잭션에서 data_versions 행의 version 을 1 올리고(bump), commit 후 observe() 로 로컬에 알림.
+- 다른 워커/프로세스의 변경은 백그라운드 루프가 check_interval 마다 행 하나를 읽어 반영.
+- 요청 경로는 메모리의 (epoch, version) 만 보고 ETag 를 만들므로, 클라이언트가 최신이면
+  DB 조회/직렬화 없이 304.
+- epoch: 행을 만들 때 정한 임의 값. DB 가 바뀌면(SQLite 폴백 ↔ PostgreSQL) version 이 겹쳐도 ETag 가 달라짐.
+ORM 클래스/세션 팩토리는 bind() 로 주입 (순환 import 방지).
+"""
+import asyncio
+import logging
+import threading
+import uuid
+from typing import Optional, Tuple
+
+from sqlalchemy import select, update, insert
+from sqlalchemy.exc import IntegrityError
+
+from config import CONFIG
+
+logger = logging.getLogger("uvicorn.error")
+
+PROJECTS = "projects"
+
+Version = Tuple[str, int]  # (epoch, version)
+
+
+class DataVersionTracker:
+    def __init__(self, name: str, check_interval: float):
+        self.name = name
+        self.check_interval = check_interval
+        self.version_model = None
+        self.session_factory = None  # AsyncSession 팩토리
+        self._current: Optional[Version] = None
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def bind(self, version_model, session_factory) -> None:
+        self.version_model = version_model
+        self.session_factory = session_factory
+
+    # ---------- 쓰기 경로 (동기 세션, 호출 측 트랜잭션 안에서) ----------
+    def ensure_row(self, bind) -> None:
+        """버전 행이 없으면 생성 (스키마 초기화 때 호출)."""
+        m = self.version_model
+        with bind.begin() as conn:
+            exists = conn.execute(select(m.name).where(m.name == self.name)).first()
+            if exists is None:
+                try:
+                    conn.execute(insert(m).values(name=self.name, version=0, epoch=uuid.uuid4().hex[:8]))
+                except IntegrityError:
+                    pass  # 다른 워커가 먼저 생성
+
+    def bump(self, db) -> Optional[Version]:
+        """version += 1 (commit 은 호출 측). commit 후 observe(반환값) 호출."""
+        m = self.version_model
+        if m is None:  # bind() 전 (앱 밖에서 서비스 함수만 쓰는 경우)
+            return None
+        row = db.execute(
+            update(m).where(m.name == self.name).values(version=m.version + 1).returning(m.epoch, m.version)
+        ).first()
+        return (row[0], row[1]) if row is not None else None
+
+    def observe(self, version: Optional[Version]) -> None:
+        """commit 된 버전을 로컬에 반영 (같은 epoch 안에서는 커지기만 함)."""
+        if version is None:
+            return
+        with self._lock:
+            cur = self._current
+            if cur is None or cur[0] != version[0] or version[1] > cur[1]:
+                self._current = version
+
+    def invalidate(self) -> None:
+        """DB 교체 시: 다음 확인까지 ETag 를 쓰지 않음."""
+        with self._lock:
+            self._current = None
+
+    # ---------- 읽기 경로 ----------
+    @property
+    def current(self) -> Optional[Version]:
+        return self._current
+
+    def etag(self, prefix: str, *extra) -> Optional[str]:
+        """현재 버전 기반 ETag. 아직 버전을 모르면 None (ETag 없이 응답)."""
+        cur = self._current
+        if cur is None:
+            return None
+        parts = [prefix, cur[0], str(cur[1])] + [str(x) for x in extra]
+        return '"' + "-".join(parts) + '"'
+
+    # ---------- lifecycle ----------
+    async def start(self) -> None:
+        try:
+            await self.refresh()
+        except Exception as e:
+            logger.warning("⚠️ 데이터 버전 조회 실패: %r", e)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning("⚠️ 데이터 버전 조회 실패: %r", e)
+
+    async def refresh(self) -> None:
+        m = self.version_model
+        async with self.session_factory() as db:
+            row = (await db.execute(select(m.epoch, m.version).where(m.name == self.name))).first()
+        if row is None:
+            self.invalidate()
+        else:
+            self.observe((row[0], row[1]))
+
+
+data_versions = DataVersionTracker(PROJECTS, check_interval=CONFIG["data_version_check_interval_seconds"])
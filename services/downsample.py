@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+차트용 시계열 다운샘플링 (NumPy).
+- lttb_indices: Largest-Triangle-Three-Buckets. 첫/마지막 점은 유지하고, 가운데를 n_out-2 개 bucket 으로 나눠
+  bucket 마다 (직전 선택점, 다음 bucket 평균점)과 만드는 삼각형 넓이가 가장 큰 점을 고름.
+  다음 bucket 평균은 np.add.reduceat 으로 한 번에 계산하고, bucket 안의 넓이 계산도 벡터 연산.
+  (직전 선택점에 의존하므로 bucket 단위 루프는 남음 → 반복 횟수는 n_out 개)
+- minmax_indices: bucket 마다 최솟값/최댓값 위치. 2차원으로 reshape 해 완전 벡터화.
+- 입력이 n_out 의 PREFILTER_RATIO 배보다 크면 minmax 로 먼저 후보를 줄인 뒤 LTTB (MinMaxLTTB)
+  → 100만 포인트도 LTTB 루프가 보는 점은 n_out x PREFILTER_RATIO 개.
+x 는 오름차순(타임스탬프)이라고 가정.
+"""
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+PREFILTER_RATIO = 4
+
+
+def minmax_indices(y: np.ndarray, n_buckets: int) -> np.ndarray:
+    """bucket(거의 같은 크기) 마다 argmin/argmax 위치를 정렬해 반환 (최대 2 x n_buckets 개)."""
+    n = len(y)
+    if n_buckets <= 0 or n == 0:
+        return np.empty(0, dtype=np.intp)
+    if 2 * n_buckets >= n:
+        return np.arange(n, dtype=np.intp)
+    size = -(-n // n_buckets)  # ceil
+    padded_len = size * n_buckets
+    if padded_len != n:
+        # 마지막 bucket 을 가장자리 값으로 채움 (argmin/argmax 결과가 바뀌지 않음)
+        y = np.concatenate([y, np.full(padded_len - n, y[-1], dtype=y.dtype)])
+    grid = y.reshape(n_buckets, size)
+    offsets = np.arange(n_buckets, dtype=np.intp) * size
+    lo = grid.argmin(axis=1) + offsets
+    hi = grid.argmax(axis=1) + offsets
+    idx = np.unique(np.concatenate([lo, hi]))
+    return idx[idx < n]
+
+
+def _lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    n = len(x)
+    # 가운데 bucket 경계: [1, n-1) 을 n_out-2 등분
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    starts = edges[:-1]
+    ends = edges[1:]
+    counts = np.maximum(ends - starts, 1)
+    # bucket 별 평균점 (다음 bucket 의 기준점). 마지막 bucket 다음은 마지막 점
+    x_avg = np.add.reduceat(x, starts) / counts
+    y_avg = np.add.reduceat(y, starts) / counts
+    c_x = np.append(x_avg[1:], x[-1])
+    c_y = np.append(y_avg[1:], y[-1])
+
+    out = np.empty(n_out, dtype=np.intp)
+    out[0] = 0
+    out[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        s, e = starts[i], ends[i]
+        if e <= s:
+            e = s + 1
+        ax, ay = x[a], y[a]
+        # 삼각형 넓이 x2 (상수배는 argmax 에 영향 없음)
+        area = np.abs((ax - c_x[i]) * (y[s:e] - ay) - (ax - x[s:e]) * (c_y[i] - ay))
+        a = s + int(area.argmax())
+        out[i + 1] = a
+    return out
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """LTTB 로 고른 점의 인덱스 (오름차순, 최대 n_out 개)."""
+    n = len(x)
+    if n_out >= n or n <= 2:
+        return np.arange(n, dtype=np.intp)
+    if n_out < 3:
+        return np.array([0, n - 1], dtype=np.intp)[:max(n_out, 0)]
+    if n > n_out * PREFILTER_RATIO:
+        # 첫/마지막 점은 항상 후보에 포함
+        candidates = minmax_indices(y[1:-1], n_out * PREFILTER_RATIO // 2) + 1
+        candidates = np.concatenate([[0], candidates, [n - 1]])
+        return candidates[_lttb(x[candidates], y[candidates], n_out)]
+    return _lttb(x, y, n_out)
+
+
+def downsample(x: np.ndarray, y: np.ndarray, n_out: int, method: str = "lttb") -> Tuple[np.ndarray, np.ndarray]:
+    """(x, y) 를 n_out 포인트 안팎으로 줄임. 유한하지 않은 값(NaN/Inf)은 먼저 제거."""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    finite = np.isfinite(y)
+    if not finite.all():
+        x, y = x[finite], y[finite]
+    if method == "minmax":
+        idx = minmax_indices(y, max(1, n_out // 2))
+    elif method == "lttb":
+        idx = lttb_indices(x, y, n_out)
+    else:
+        raise ValueError(f"unknown downsample method: {method}")
+    return x[idx], y[idx]
+
+
+def downsample_series_map(series_map: Dict[str, Dict[str, Tuple[np.ndarray, np.ndarray]]], width: int,
+                          method: str = "lttb") -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """{ip: {metric: (ts, values)}} → {ip: {metric: {"t": [...], "v": [...], "raw_points": n}}} (JSON 용 리스트)."""
+    out: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for ip, metrics in series_map.items():
+        for metric, (ts, values) in metrics.items():
+            t, v = downsample(ts, values, width, method)
+            out.setdefault(ip, {})[metric] = {"t": t.tolist(), "v": np.round(v, 2).tolist(), "raw_points": len(ts)}
+    return out
@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+"""
+프로젝트별 provisioning 이벤트 스트림 (SSE / WebSocket).
+- 이벤트 id = provision_logs.seq (로그 이벤트만 id 를 가짐, 상태 이벤트는 id 없음 → EventSource 의 lastEventId 유지).
+  재접속 시 Last-Event-ID 이후의 로그를 DB(get_provision_logs since=)에서 읽으므로 재시작/다른 워커와 무관하게 이어 받음.
+- 실시간 전달: update_provision_status 가 commit 후 publish 하는 로그/상태를 프로세스 내 broker 로 push.
+  job 이 이 프로세스에서 실행 중이 아니면(다른 워커, 아직 claim 전) poll_interval 마다 DB 에서 새 로그/상태를 읽음.
+- 구독자마다 크기가 제한된 asyncio.Queue. 가득 차면(느린 소비자) 다시 구독하고 빠진 구간은 DB 에서 채움.
+  push 된 로그 seq 가 건너뛰면(다른 경로의 쓰기) 역시 DB 에서 채움 → seq 순서로 빠짐/중복 없이 전달.
+- publish 는 어느 스레드에서 호출해도 됨 (구독자 루프로 call_soon_threadsafe).
+"""
+import asyncio
+import json
+import threading
+from typing import Dict, Any, Optional, List, Callable, Awaitable, Tuple, AsyncIterator
+
+from config import CONFIG
+
+_CLOSED = object()  # 구독 종료 표식
+
+# (project_id, since, limit) → (status, assigned_ip, seq > since 인 로그 최대 limit 개). 프로젝트가 없으면 status None
+LoadEvents = Callable[[int, int, int], Awaitable[Tuple[Optional[str], Optional[str], List[Dict[str, Any]]]]]
+
+
+class ProvisionEvent:
+    __slots__ = ("id", "event", "data")
+
+    def __init__(self, id: Optional[int], event: str, data: Dict[str, Any]):
+        self.id = id
+        self.event = event
+        self.data = data
+
+
+class Subscription:
+    """단일 구독자. 종료/overflow 시 반복이 끝남 (overflowed 로 구분)."""
+
+    def __init__(self, broker: "ProvisionEventBroker", project_id: int, buffer_size: int):
+        self._broker = broker
+        self.project_id = project_id
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=buffer_size)
+        self.overflowed = False
+        self.closed = False
+
+    def _offer(self, item) -> None:
+        # 구독자 루프 스레드에서만 실행됨
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            self.closed = True
+            self._broker._unsubscribe(self)
+            while True:
+                try:
+                    self.queue.put_nowait(_CLOSED)
+                    return
+                except asyncio.QueueFull:
+                    self.queue.get_nowait()
+
+    async def get(self, timeout: float) -> Optional[ProvisionEvent]:
+        """timeout 동안 이벤트가 없으면 None. overflow 로 끊겼으면 StopAsyncIteration."""
+        try:
+            item = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if item is _CLOSED:
+            raise StopAsyncIteration
+        return item
+
+    def close(self) -> None:
+        self.closed = True
+        self._broker._unsubscribe(self)
+
+
+class ProvisionEventBroker:
+    """프로세스 내 fan-out (보관하지 않음: 재개는 DB 기준)."""
+
+    def __init__(self, buffer_size: int):
+        self.buffer_size = buffer_size
+        self._lock = threading.Lock()
+        self._topics: Dict[int, List[Subscription]] = {}
+
+    def publish(self, project_id: int, event: str, data: Dict[str, Any], final: bool = False) -> None:
+        """이벤트 발행 (구독자가 없으면 아무것도 안 함). 로그 이벤트의 id 는 data["seq"]."""
+        with self._lock:
+            subscribers = list(self._topics.get(project_id, ()))
+        if not subscribers:
+            return
+        evt = ProvisionEvent(data.get("seq") if event == "log" else None, event, data)
+        item = (evt, final)
+        for sub in subscribers:
+            try:
+                sub.loop.call_soon_threadsafe(sub._offer, item)
+            except RuntimeError:
+                # 구독자 루프가 이미 닫힘
+                self._unsubscribe(sub)
+
+    def subscribe(self, project_id: int) -> Subscription:
+        sub = Subscription(self, project_id, self.buffer_size)
+        with self._lock:
+            self._topics.setdefault(project_id, []).append(sub)
+        return sub
+
+    def _unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            subs = self._topics.get(sub.project_id)
+            if subs is not None and sub in subs:
+                subs.remove(sub)
+                if not subs:
+                    del self._topics[sub.project_id]
+
+    def subscriber_count(self, project_id: int) -> int:
+        with self._lock:
+            return len(self._topics.get(project_id, ()))
+
+
+def _is_final(status: Optional[str]) -> bool:
+    return status in (CONFIG["status_completed"], CONFIG["status_failed"])
+
+
+class ProjectEventStream:
+    """
+    연결 하나의 이벤트 스트림: DB 재생(since 이후) → 로컬 push 또는 DB 폴링.
+    open() 이 False 면 프로젝트 없음. events() 는 ProvisionEvent 또는 keep-alive 시점에 None 을 내고,
+    최종 상태(COMPLETED/FAILED)를 보낸 뒤 끝남.
+    """
+
+    def __init__(self, project_id: int, since: int, load: LoadEvents, is_local: Callable[[int], bool],
+                 broker: "ProvisionEventBroker", poll_interval: float, page_size: int = 500):
+        self.project_id = project_id
+        self.last_seq = max(0, since or 0)
+        self.load = load
+        self.is_local = is_local
+        self.broker = broker
+        self.poll_interval = poll_interval
+        self.page_size = page_size
+        self.finished = False
+        self._status: Optional[Tuple[Optional[str], Optional[str]]] = None
+        self._pending: List[ProvisionEvent] = []
+        self._sub: Optional[Subscription] = None
+
+    async def open(self) -> bool:
+        # 먼저 구독해야 DB 를 읽는 사이의 publish 를 놓치지 않음 (중복은 seq 로 거름)
+        self._sub = self.broker.subscribe(self.project_id)
+        status, assigned_ip, logs = await self.load(self.project_id, self.last_seq, self.page_size)
+        if status is None:
+            self.close()
+            return False
+        self._pending = await self._absorb(status, assigned_ip, logs)
+        return True
+
+    def close(self) -> None:
+        if self._sub is not None:
+            self._sub.close()
+            self._sub = None
+
+    async def _absorb(self, status, assigned_ip, logs) -> List[ProvisionEvent]:
+        """DB 에서 읽은 (상태, 로그 한 페이지)를 이벤트로. 페이지가 가득 차면 나머지 로그도 이어서 읽음."""
+        out: List[ProvisionEvent] = []
+        while True:
+            for log in logs:
+                if log["seq"] > self.last_seq:
+                    out.append(ProvisionEvent(log["seq"], "log", log))
+                    self.last_seq = log["seq"]
+            if len(logs) < self.page_size or status is None:
+                break
+            status, assigned_ip, logs = await self.load(self.project_id, self.last_seq, self.page_size)
+        if status is None:
+            # 스트림 도중 프로젝트가 삭제됨
+            self.finished = True
+            return out
+        if (status, assigned_ip) != self._status:
+            self._status = (status, assigned_ip)
+            out.append(ProvisionEvent(None, "status", {"status": status, "assigned_ip": assigned_ip}))
+        if _is_final(status):
+            self.finished = True
+        return out
+
+    async def _catch_up(self) -> List[ProvisionEvent]:
+        return await self._absorb(*(await self.load(self.project_id, self.last_seq, self.page_size)))
+
+    def _take_status(self, evt: ProvisionEvent) -> None:
+        prev_ip = self._status[1] if self._status else None
+        self._status = (evt.data.get("status"), evt.data.get("assigned_ip", prev_ip))
+
+    async def events(self, keepalive: float) -> AsyncIterator[Optional[ProvisionEvent]]:
+        idle = 0.0
+        for evt in self._pending:
+            yield evt
+        self._pending = []
+        while not self.finished:
+            local = self.is_local(self.project_id)
+            wait = keepalive if local else min(self.poll_interval, keepalive)
+            try:
+                item = await self._sub.get(wait)
+            except StopAsyncIteration:
+                # 느린 소비자로 overflow → 다시 구독하고 빠진 구간은 DB 에서
+                self._sub = self.broker.subscribe(self.project_id)
+                for evt in await self._catch_up():
+                    yield evt
+                continue
+            if item is None:
+                got = False
+                if not local:
+                    for evt in await self._catch_up():
+                        got = True
+                        yield evt
+                idle = 0.0 if got else idle + wait
+                if idle >= keepalive:
+                    idle = 0.0
+                    yield None
+                continue
+            idle = 0.0
+            evt, final = item
+            if evt.event == "log":
+                if evt.id is None or evt.id <= self.last_seq:
+                    continue
+                if evt.id == self.last_seq + 1:
+                    self.last_seq = evt.id
+                    yield evt
+                else:
+                    for e in await self._catch_up():
+                        yield e
+                continue
+            if final:
+                # 최종 상태 전에 빠진 로그가 있으면 DB 에서 채움 (상태 이벤트는 resources/error 가 있는 push 본을 보냄)
+                for e in await self._catch_up():
+                    if e.event == "log":
+                        yield e
+                self.finished = True
+            self._take_status(evt)
+            yield evt
+
+
+def format_sse(evt: ProvisionEvent) -> str:
+    """text/event-stream 한 건. 로그만 id(seq)를 달아 재접속 시 Last-Event-ID 로 돌아옴."""
+    head = f"id: {evt.id}\n" if evt.id is not None else ""
+    return f"{head}event: {evt.event}\ndata: {json.dumps(evt.data, ensure_ascii=False)}\n\n"
+
+
+provision_events = ProvisionEventBroker(buffer_size=CONFIG["event_subscriber_buffer_size"])
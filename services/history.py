@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+/api/history 페이지 조회.
+id 기준 keyset(cursor) 페이지네이션 + sparse fieldset(fields=) + 상태/템플릿/날짜 필터.
+details(JSON) 는 fields 에 명시했을 때만 읽음 → 기본 응답은 작은 컬럼들만.
+ORM 클래스는 호출 측에서 주입 (순환 import 방지).
+"""
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+HISTORY_FIELDS = ("id", "service_name", "status", "assigned_ip", "template_type", "created_at", "details")
+DEFAULT_HISTORY_FIELDS = ("id", "service_name", "status", "assigned_ip", "template_type", "created_at")
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    """'id,status,details' → 컬럼 이름 리스트. 알 수 없는 필드는 ValueError. id 는 커서용으로 항상 포함."""
+    if not fields:
+        return list(DEFAULT_HISTORY_FIELDS)
+    names = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in names if f not in HISTORY_FIELDS]
+    if unknown:
+        raise ValueError(f"알 수 없는 필드: {', '.join(unknown)}")
+    if "id" not in names:
+        names.insert(0, "id")
+    return list(dict.fromkeys(names))
+
+
+def list_history_page(
+    db,
+    project_model,
+    fields: List[str],
+    cursor: Optional[int] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    status: Optional[str] = None,
+    template: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """
+    id 내림차순 한 페이지. cursor 는 직전 페이지의 next_cursor (그 id 미만부터).
+    limit+1 개를 읽어 다음 페이지 존재 여부를 판단 → COUNT 쿼리 없음.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    columns = [getattr(project_model, f) for f in fields]
+    q = db.query(*columns)
+    if cursor is not None:
+        q = q.filter(project_model.id < cursor)
+    if status:
+        q = q.filter(project_model.status == status)
+    if template:
+        q = q.filter(project_model.template_type == template)
+    if date_from is not None:
+        q = q.filter(project_model.created_at >= date_from)
+    if date_to is not None:
+        q = q.filter(project_model.created_at < date_to)
+    rows = q.order_by(project_model.id.desc()).limit(limit + 1).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    items = [dict(zip(fields, row)) for row in rows]
+    return {
+        "items": items,
+        "next_cursor": items[-1]["id"] if has_more else None,
+    }
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+Ansible 동적 inventory (JSON, _meta.hostvars 포함) 생성 + 데이터 버전 캐시 (/api/inventory, inventory.py).
+- 호스트
+  - WorkloadTestPool VM: inventory 이름 = vm_name, ansible_host = ip_address. 점유 중이면 프로젝트 그룹에 소속.
+  - project_resources 의 ssh 항목 (details.resources.ssh_targets): 이름 = 주소, ansible_host/port/user.
+    주소가 같은 프로젝트의 풀 VM 과 같으면(ansible runner) 그 VM 호스트에 합침.
+- 그룹: project_<id> (vars: alb_ip / web_url / db_vip), template_<template>, tier_<tier>, owner_<user>,
+  workload_pool (풀 VM 전체), pool_free (빈 VM)
+  tier: ssh target 의 tier 값, 없으면 템플릿 규칙 (k8s_* 는 첫 호스트 control_plane / 나머지 worker, 그 외 web).
+- SQL 2개 (풀 VM LEFT JOIN projects, project_resources LEFT JOIN projects) 로 전체를 만든 뒤 JSON bytes 로 보관.
+- 캐시 키는 data_versions 의 (epoch, version): 프로젝트 생성/상태 변경/삭제가 버전을 올리면 다음 요청에서 한 번만 다시 빌드.
+  동시에 들어온 요청은 lock 에서 그 한 번의 빌드를 기다림 (병렬 배포에서 호스트 수만큼 DB 를 치지 않음).
+  프로젝트별 / 호스트별 응답도 같은 버전 안에서 memoize.
+  VM 점유/반납은 ansible runner 가 직접 버전을 올리므로(data_changed=True, _release_vms) 그때 반영.
+- 버전을 아직 모르면(시작 직후, DB 교체 직후) 캐시 없이 매번 빌드.
+ORM 클래스/세션 팩토리는 생성 시 주입 (순환 import 방지).
+"""
+import asyncio
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from services.data_version import data_versions
+from services.responses import json_bytes
+
+POOL_GROUP = "workload_pool"
+FREE_GROUP = "pool_free"
+_PROJECT_VARS = {"alb": "alb_ip", "web": "web_url", "db": "db_vip"}
+
+
+def group_name(prefix: str, value: Any) -> str:
+    """Ansible 그룹 이름으로 쓸 수 있게 (영문/숫자/_ 만)."""
+    return re.sub(r"[^A-Za-z0-9_]", "_", f"{prefix}_{value}")
+
+
+def default_tier(template: Optional[str], index: int) -> str:
+    if (template or "").startswith("k8s"):
+        return "control_plane" if index == 0 else "worker"
+    return "web"
+
+
+class _Builder:
+    def __init__(self):
+        self.hostvars: Dict[str, Dict[str, Any]] = {}
+        self.groups: Dict[str, Dict[str, Any]] = {}
+
+    def group(self, name: str) -> Dict[str, Any]:
+        g = self.groups.get(name)
+        if g is None:
+            g = self.groups[name] = {"hosts": []}
+        return g
+
+    def add(self, group: str, host: str) -> None:
+        hosts = self.group(group)["hosts"]
+        if host not in hosts:
+            hosts.append(host)
+
+    def project(self, project_id: int, name: Optional[str], template: Optional[str], owner: Optional[str]) -> str:
+        g = group_name("project", project_id)
+        if g not in self.groups:
+            self.group(g)["vars"] = {
+                "cmp_project_id": project_id,
+                "cmp_project_name": name,
+                "cmp_template": template,
+                "cmp_owner": owner,
+            }
+        return g
+
+    def attach(self, host: str, project_id: int, name, template, owner, tier: Optional[str]) -> None:
+        self.add(self.project(project_id, name, template, owner), host)
+        if template:
+            self.add(group_name("template", template), host)
+        if owner:
+            self.add(group_name("owner", owner), host)
+        if tier:
+            self.add(group_name("tier", tier), host)
+        self.hostvars[host].update({
+            "cmp_project_id": project_id,
+            "cmp_project_name": name,
+            "cmp_template": template,
+            "cmp_owner": owner,
+            **({"cmp_tier": tier} if tier else {}),
+        })
+
+    def result(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"all": {"children": sorted(self.groups)}}
+        out.update(self.groups)
+        out["_meta"] = {"hostvars": self.hostvars}
+        return out
+
+
+def build_inventory(db, pool_model, project_model, resource_model) -> Dict[str, Any]:
+    """풀 VM + 프로젝트 ssh target 으로 Ansible JSON inventory 전체를 만듦 (SQL 2개)."""
+    b = _Builder()
+    p, pm, r = pool_model, project_model, resource_model
+
+    vm_by_ip: Dict[Tuple[int, str], str] = {}
+    rows = db.execute(
+        select(p.vm_name, p.ip_address, p.is_used, p.project_id, p.occupy_user, pm.service_name, pm.template_type)
+        .outerjoin(pm, pm.id == p.project_id)
+        .order_by(p.id)
+    ).all()
+    for vm_name, ip, is_used, project_id, occupy_user, service_name, template in rows:
+        host = vm_name or ip
+        if not host:
+            continue
+        b.hostvars[host] = {"ansible_host": ip, "cmp_vm_name": vm_name}
+        b.add(POOL_GROUP, host)
+        if not is_used:
+            b.add(FREE_GROUP, host)
+        elif project_id is not None:
+            b.attach(host, project_id, service_name, template, occupy_user, None)
+            vm_by_ip[(project_id, ip)] = host
+
+    ssh_index: Dict[int, int] = {}
+    rows = db.execute(
+        select(r.project_id, r.kind, r.address, r.owner, r.project_name, r.attrs, pm.template_type)
+        .outerjoin(pm, pm.id == r.project_id)
+        .order_by(r.project_id, r.seq)
+    ).all()
+    for project_id, kind, address, owner, project_name, attrs, template in rows:
+        if kind in _PROJECT_VARS:
+            g = b.project(project_id, project_name, template, owner)
+            b.groups[g]["vars"][_PROJECT_VARS[kind]] = address
+            continue
+        if kind != "ssh":
+            continue
+        attrs = attrs or {}
+        index = ssh_index[project_id] = ssh_index.get(project_id, -1) + 1
+        tier = attrs.get("tier") or default_tier(template, index)
+        host = vm_by_ip.get((project_id, address))
+        if host is None:
+            host = address
+            b.hostvars.setdefault(host, {"ansible_host": address})
+        if attrs.get("port"):
+            b.hostvars[host]["ansible_port"] = attrs["port"]
+        if attrs.get("user"):
+            b.hostvars[host]["ansible_user"] = attrs["user"]
+        b.attach(host, project_id, project_name, template, owner, tier)
+    return b.result()
+
+
+def subset_inventory(inventory: Dict[str, Any], hosts: List[str], keep_vars_of: Optional[str] = None) -> Dict[str, Any]:
+    """hosts 만 남긴 inventory (빈 그룹은 빼되 keep_vars_of 그룹은 vars 때문에 유지)."""
+    wanted = set(hosts)
+    out: Dict[str, Any] = {}
+    for name, group in inventory.items():
+        if name in ("all", "_meta"):
+            continue
+        members = [h for h in group.get("hosts", []) if h in wanted]
+        if members or name == keep_vars_of:
+            out[name] = {**group, "hosts": members}
+    hostvars = inventory["_meta"]["hostvars"]
+    return {
+        "all": {"children": sorted(out)},
+        **out,
+        "_meta": {"hostvars": {h: hostvars[h] for h in hosts if h in hostvars}},
+    }
+
+
+class _Entry:
+    __slots__ = ("version", "inventory", "rendered")
+
+    def __init__(self, version, inventory: Dict[str, Any]):
+        self.version = version
+        self.inventory = inventory
+        self.rendered: Dict[Tuple[Optional[int], Optional[str]], bytes] = {}
+
+    def render(self, project_id: Optional[int], host: Optional[str]) -> bytes:
+        key = (project_id, host)
+        body = self.rendered.get(key)
+        if body is None:
+            body = self.rendered[key] = json_bytes(self._view(project_id, host))
+        return body
+
+    def _view(self, project_id: Optional[int], host: Optional[str]) -> Dict[str, Any]:
+        inv = self.inventory
+        if host is not None:
+            # --host 프로토콜: 그 호스트의 변수만
+            return inv["_meta"]["hostvars"].get(host, {})
+        if project_id is not None:
+            g = group_name("project", project_id)
+            return subset_inventory(inv, inv.get(g, {}).get("hosts", []), keep_vars_of=g)
+        return inv
+
+
+class InventoryCache:
+    def __init__(self, pool_model, project_model, resource_model, session_factory, versions=data_versions):
+        self.models = (pool_model, project_model, resource_model)
+        self.session_factory = session_factory
+        self.versions = versions
+        self._entry: Optional[_Entry] = None
+        self._lock = asyncio.Lock()
+        self.builds = 0
+
+    def etag(self) -> Optional[str]:
+        """버전 기반 ETag (쿼리 파라미터가 달라도 같은 버전이면 같은 값, 캐시는 URL 별로 보관됨)."""
+        return self.versions.etag("inv")
+
+    def invalidate(self) -> None:
+        self._entry = None
+
+    async def get(self, project_id: Optional[int] = None, host: Optional[str] = None) -> bytes:
+        entry = self._fresh_entry()
+        if entry is None:
+            async with self._lock:
+                entry = self._fresh_entry()  # 기다리는 동안 다른 요청이 빌드했으면 그대로 사용
+                if entry is None:
+                    version = self.versions.current  # 빌드 전에 읽음 → 빌드 결과는 이 버전 이상
+                    entry = _Entry(version, await self._build())
+                    if version is not None:
+                        self._entry = entry
+        return entry.render(project_id, host)
+
+    def _fresh_entry(self) -> Optional[_Entry]:
+        entry = self._entry
+        version = self.versions.current
+        if entry is not None and version is not None and entry.version == version:
+            return entry
+        return None
+
+    async def _build(self) -> Dict[str, Any]:
+        self.builds += 1
+        async with self.session_factory() as db:
+            return await db.run_sync(build_inventory, *self.models)
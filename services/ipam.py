@@ -0,0 +1,409 @@
+# -*- coding: utf-8 -*-
+"""
+IP 주소 관리 (IPAM): 설정된 풀(CIDR 목록 + 예약 범위)에서 프로젝트별 IP 를 할당/반납.
+- 서브넷마다 비트맵(bytearray, 주소 1개 = 1비트, 1 = 사용 중) → /16 도 8KB.
+  네트워크/브로드캐스트 주소와 예약 범위는 처음부터 1.
+- 빈 주소 찾기: 커서부터 0xFF 가 아닌 바이트를 정규식으로 검색 (C 루프, 바이트 단위) 후 바이트 안의 빈 비트는 표로 조회.
+  "커서 앞 바이트는 전부 가득 참" 을 유지 (반납 시 커서를 당김) → 할당/반납 모두 amortized O(1).
+- 연속 할당 (템플릿 VM 들을 붙은 주소로): n ≤ 8 이면 "빈 비트 n 개가 연속인 바이트", 그보다 크면 0x00 바이트 연속을 검색
+  (바이트 경계를 넘는 연속 구간은 찾지 않음). 연속 구간이 없으면 흩어진 주소로 채움.
+- DB 영속화: ip_allocations 의 (pool, address_int) unique.
+  후보를 INSERT ... ON CONFLICT DO NOTHING RETURNING 한 문장으로 점유하고, 돌아오지 않은 주소(다른 워커가 먼저 가져감)는
+  비트맵에 사용 중으로 둔 채 모자란 만큼 다시 고름. 그래도 모자라면 롤백 후 IPPoolExhausted (VMAllocator 와 같은 규칙).
+- 다른 워커의 할당은 후보가 충돌할 때 id 증가분만 읽어 반영하고, 반납은 빈 주소가 모자랄 때 비트맵을 통째로 다시 읽어 반영.
+- 비트맵은 메모리 연산만 락으로 보호 (DB I/O 는 락 밖: run_sync 안에서 호출되어도 이벤트 루프를 막지 않음).
+ORM 클래스는 생성 시 주입 (순환 import 방지).
+"""
+import bisect
+import ipaddress
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select, delete, insert, func, bindparam
+
+from services.lease import check_lease
+
+_NOT_FULL = re.compile(rb"[^\xff]")
+
+# 바이트 값 → 빈 비트 위치 (LSB = 낮은 주소)
+_FREE_BITS: Tuple[Tuple[int, ...], ...] = tuple(
+    tuple(bit for bit in range(8) if not value >> bit & 1) for value in range(256)
+)
+
+
+def _first_run(value: int, n: int) -> int:
+    """바이트 value 안에서 빈 비트 n 개가 연속인 첫 위치 (없으면 -1)."""
+    mask = (1 << n) - 1
+    for bit in range(9 - n):
+        if not value >> bit & mask:
+            return bit
+    return -1
+
+
+# n(1..8) → (해당 바이트들만 매칭하는 정규식, 바이트 값 → 시작 비트)
+_RUN_IN_BYTE: Dict[int, Tuple["re.Pattern", Tuple[int, ...]]] = {}
+for _n in range(1, 9):
+    _offsets = tuple(_first_run(v, _n) for v in range(256))
+    _class = b"".join(re.escape(bytes([v])) for v in range(256) if _offsets[v] >= 0)
+    _RUN_IN_BYTE[_n] = (re.compile(b"[" + _class + b"]"), _offsets)
+_ZERO_RUNS: Dict[int, "re.Pattern"] = {}
+
+
+class IPPoolExhausted(Exception):
+    """요청한 수만큼 빈 IP 가 없음."""
+
+
+def parse_range(spec: str) -> Tuple[int, int]:
+    """예약 범위 "10.0.0.1" / "10.0.0.0/28" / "10.0.0.10-10.0.0.20" → (시작, 끝) 정수 (끝 포함)."""
+    spec = spec.strip()
+    if "-" in spec:
+        lo, hi = (int(ipaddress.ip_address(p.strip())) for p in spec.split("-", 1))
+        return min(lo, hi), max(lo, hi)
+    if "/" in spec:
+        net = ipaddress.ip_network(spec, strict=False)
+        return int(net.network_address), int(net.broadcast_address)
+    addr = int(ipaddress.ip_address(spec))
+    return addr, addr
+
+
+class SubnetBitmap:
+    """서브넷 하나의 사용 비트맵. 주소는 정수로 주고받음."""
+
+    __slots__ = ("network", "base", "size", "bits", "free", "_hint")
+
+    def __init__(self, network: ipaddress.IPv4Network, reserved: Iterable[Tuple[int, int]] = ()):
+        self.network = network
+        self.base = int(network.network_address)
+        self.size = network.num_addresses
+        self.bits = bytearray((self.size + 7) // 8)
+        self.free = self.size
+        self._hint = 0  # 이 바이트 앞은 전부 사용 중
+        tail = len(self.bits) * 8 - self.size
+        if tail:  # /30 보다 작은 서브넷: 마지막 바이트의 남는 비트는 없는 주소
+            self.bits[-1] = (0xFF << (8 - tail)) & 0xFF
+        if network.prefixlen <= network.max_prefixlen - 2:
+            self.mark(self.base)
+            self.mark(self.base + self.size - 1)
+        for lo, hi in reserved:
+            for addr in range(max(lo, self.base), min(hi, self.base + self.size - 1) + 1):
+                self.mark(addr)
+
+    def __contains__(self, addr: int) -> bool:
+        return self.base <= addr < self.base + self.size
+
+    def mark(self, addr: int) -> bool:
+        """addr 을 사용 중으로 (이미 사용 중이었으면 False)."""
+        off = addr - self.base
+        byte, bit = off >> 3, 1 << (off & 7)
+        if self.bits[byte] & bit:
+            return False
+        self.bits[byte] |= bit
+        self.free -= 1
+        return True
+
+    def unmark(self, addr: int) -> bool:
+        off = addr - self.base
+        byte, bit = off >> 3, 1 << (off & 7)
+        if not self.bits[byte] & bit:
+            return False
+        self.bits[byte] &= ~bit & 0xFF
+        self.free += 1
+        if byte < self._hint:
+            self._hint = byte
+        return True
+
+    def take(self, n: int) -> List[int]:
+        """빈 주소 최대 n 개를 낮은 주소부터 사용 중으로 바꿔 반환."""
+        out: List[int] = []
+        bits = self.bits
+        while len(out) < n and self.free:
+            m = _NOT_FULL.search(bits, self._hint)
+            if m is None:
+                break
+            byte = m.start()
+            self._hint = byte
+            value = bits[byte]
+            for bit in _FREE_BITS[value]:
+                value |= 1 << bit
+                out.append(self.base + (byte << 3) + bit)
+                if len(out) == n:
+                    break
+            bits[byte] = value
+        self.free -= len(out)
+        return out
+
+    def take_contiguous(self, n: int) -> List[int]:
+        """연속된 빈 주소 n 개 (없으면 빈 리스트)."""
+        if n > self.free:
+            return []
+        if n <= 8:
+            pattern, offsets = _RUN_IN_BYTE[n]
+            m = pattern.search(self.bits, self._hint)
+            if m is None:
+                return []
+            byte = m.start()
+            start = (byte << 3) + offsets[self.bits[byte]]
+        else:
+            k = (n + 7) // 8
+            pattern = _ZERO_RUNS.get(k)
+            if pattern is None:
+                pattern = _ZERO_RUNS[k] = re.compile(b"\x00{%d}" % k)
+            m = pattern.search(self.bits, self._hint)
+            if m is None:
+                return []
+            start = m.start() << 3
+        out = [self.base + start + i for i in range(n)]
+        for addr in out:
+            self.mark(addr)
+        return out
+
+
+class IPPool:
+    """이름 붙은 풀: CIDR 여러 개 (서브넷마다 비트맵) + 공통 예약 범위."""
+
+    def __init__(self, name: str, cidrs: Sequence[str], reserved: Sequence[str] = ()):
+        self.name = name
+        ranges = [parse_range(r) for r in reserved]
+        nets = sorted((ipaddress.ip_network(c, strict=False) for c in cidrs), key=lambda n: int(n.network_address))
+        self.subnets = [SubnetBitmap(net, ranges) for net in nets]
+        self._bases = [s.base for s in self.subnets]
+        self.synced_id = 0  # DB 에서 읽은 마지막 할당 id (IPAddressManager._catch_up)
+
+    def _subnet(self, addr: int) -> Optional[SubnetBitmap]:
+        i = bisect.bisect_right(self._bases, addr) - 1
+        if i >= 0 and addr in self.subnets[i]:
+            return self.subnets[i]
+        return None
+
+    def mark(self, addr: int) -> bool:
+        subnet = self._subnet(addr)
+        return subnet.mark(addr) if subnet is not None else False
+
+    def unmark(self, addr: int) -> bool:
+        subnet = self._subnet(addr)
+        return subnet.unmark(addr) if subnet is not None else False
+
+    def take(self, n: int, contiguous: bool = True) -> List[int]:
+        """
+        빈 주소 n 개를 사용 중으로 바꿔 반환. contiguous 면 먼저 한 서브넷 안의 연속 구간을 찾고,
+        없으면 흩어진 주소로 채움. 전체가 모자라면 가져온 것을 되돌리고 빈 리스트.
+        """
+        if n <= 0:
+            return []
+        if contiguous and n > 1:
+            for subnet in self.subnets:
+                out = subnet.take_contiguous(n)
+                if out:
+                    return out
+        out: List[int] = []
+        for subnet in self.subnets:
+            if subnet.free:
+                out.extend(subnet.take(n - len(out)))
+                if len(out) == n:
+                    return out
+        for addr in out:
+            self.unmark(addr)
+        return []
+
+    @property
+    def free(self) -> int:
+        return sum(s.free for s in self.subnets)
+
+    @property
+    def size(self) -> int:
+        return sum(s.size for s in self.subnets)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": self.size,
+            "free": self.free,
+            "subnets": [{"cidr": str(s.network), "free": s.free} for s in self.subnets],
+        }
+
+
+class IPAddressManager:
+    """
+    pools: {"이름": {"cidrs": [...], "reserved": [...]}} (config.IPAM_POOLS).
+    풀 비트맵은 처음 쓸 때 DB 의 할당 내역으로 채움. DB 가 바뀌면(swap) invalidate 로 다시 읽게 함.
+    """
+
+    def __init__(self, allocation_model, pools: Dict[str, Dict[str, Any]], default_pool: str,
+                 prefer_contiguous: bool = True, max_retries: int = 3):
+        self.model = allocation_model
+        self.pool_config = pools
+        self.default_pool = default_pool
+        self.prefer_contiguous = prefer_contiguous
+        self.max_retries = max_retries
+        self._pools: Dict[str, IPPool] = {}
+        self._lock = threading.Lock()
+        self._insert_stmts: Dict[str, Any] = {}
+        # hot path 문장은 Core 테이블로 한 번만 만들어 둠 (매 호출 ORM 식 생성/캐시 키 계산 생략)
+        t = allocation_model.__table__
+        self._existing_stmt = (
+            select(t.c.address_int)
+            .where(t.c.project_id == bindparam("project_id"), t.c.pool == bindparam("pool"))
+            .order_by(t.c.address_int)
+        )
+        self._release_stmt = (
+            delete(t).where(t.c.project_id == bindparam("project_id")).returning(t.c.pool, t.c.address_int)
+        )
+
+    # ---------- public API ----------
+    def allocate(self, db, project_id: int, count: int, pool: Optional[str] = None,
+                 contiguous: Optional[bool] = None, commit: bool = True) -> List[str]:
+        """
+        project_id 에 IP count 개를 할당하고 (commit=True 면) commit. 주소 문자열 리스트 반환.
+        이미 이 풀에서 할당받은 프로젝트(재시도된 job)면 기존 주소를 그대로 반환.
+        모자라면 롤백 후 IPPoolExhausted.
+        """
+        name = pool or self.default_pool
+        if count <= 0:
+            return []
+        existing = db.execute(self._existing_stmt, {"project_id": project_id, "pool": name}).scalars().all()
+        if len(existing) >= count:
+            return [str(ipaddress.ip_address(a)) for a in existing[:count]]
+        contiguous = self.prefer_contiguous if contiguous is None else contiguous
+        claimed: List[int] = list(existing)
+        inserted: List[int] = []
+        pending: List[int] = []  # 비트맵에서 꺼냈지만 INSERT 결과를 아직 모르는 후보
+        try:
+            ipool = self._get_pool(db, name)
+            synced = reloaded = False
+            for _ in range(self.max_retries + 1):
+                need = count - len(claimed)
+                with self._lock:
+                    candidates = pending = ipool.take(need, contiguous=contiguous and not claimed)
+                if not candidates:
+                    if reloaded:
+                        break
+                    # 다른 워커가 반납한 주소는 DB 에서 다시 읽어야 보임
+                    ipool = self._load_pool(db, name)
+                    reloaded = True
+                    continue
+                got = self._insert(db, name, project_id, candidates)
+                # 돌아오지 않은 후보는 다른 워커가 가져간 주소 → 사용 중으로 둠
+                pending = []
+                inserted.extend(got)
+                claimed.extend(got)
+                if len(claimed) >= count:
+                    break
+                # 다른 워커가 먼저 가져간 후보가 있음 → 비트맵이 뒤처짐. 새 할당분만 읽고, 그래도 겹치면 전체 다시 읽기
+                if not synced:
+                    self._catch_up(db, ipool)
+                    synced = True
+                elif not reloaded:
+                    ipool = self._load_pool(db, name)
+                    reloaded = True
+            if len(claimed) < count:
+                raise IPPoolExhausted(f"IP 풀 '{name}' 부족 (요청 {count}개, 확보 {len(claimed)}개)")
+            if commit:
+                check_lease(db)
+                db.commit()
+        except Exception:
+            db.rollback()
+            with self._lock:
+                current = self._pools.get(name)
+                if current is not None:
+                    for addr in inserted + pending:
+                        current.unmark(addr)
+            raise
+        return [str(ipaddress.ip_address(a)) for a in sorted(claimed)]
+
+    def release(self, db, project_id: int, commit: bool = True) -> int:
+        """프로젝트의 IP 를 한 번에 반납 (DELETE ... RETURNING). 반납한 개수 반환."""
+        rows = db.execute(self._release_stmt, {"project_id": project_id}).all()
+        if commit:
+            db.commit()
+        if rows:
+            # 커밋 전에 비트맵을 비워도 안전: 롤백되면 다음 할당의 INSERT 충돌로 다시 사용 중이 됨
+            with self._lock:
+                for name, addr in rows:
+                    ipool = self._pools.get(name)
+                    if ipool is not None:
+                        ipool.unmark(addr)
+        return len(rows)
+
+    def addresses(self, db, project_id: int) -> List[str]:
+        m = self.model
+        rows = db.execute(select(m.address_int).where(m.project_id == project_id).order_by(m.address_int)).scalars().all()
+        return [str(ipaddress.ip_address(a)) for a in rows]
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._pools.clear()
+
+    def stats(self, db=None) -> Dict[str, Any]:
+        """로드된 풀의 비트맵 기준 크기/빈 주소 수 (db 를 주면 풀별 DB 할당 수도)."""
+        with self._lock:
+            out = {name: ipool.stats() for name, ipool in self._pools.items()}
+        if db is not None:
+            m = self.model
+            for name, n in db.execute(select(m.pool, func.count(m.id)).group_by(m.pool)).all():
+                out.setdefault(name, {})["allocated"] = n
+        return out
+
+    # ---------- internals ----------
+    def _build_pool(self, name: str) -> IPPool:
+        spec = self.pool_config.get(name)
+        if spec is None:
+            raise KeyError(f"IP 풀 '{name}' 이 설정에 없음 (IPAM_POOLS)")
+        return IPPool(name, spec["cidrs"], spec.get("reserved", ()))
+
+    def _get_pool(self, db, name: str) -> IPPool:
+        ipool = self._pools.get(name)
+        return ipool if ipool is not None else self._load_pool(db, name)
+
+    def _load_pool(self, db, name: str) -> IPPool:
+        """DB 의 할당 내역(같은 트랜잭션에서 방금 넣은 행 포함)으로 비트맵을 새로 만들어 교체."""
+        ipool = self._build_pool(name)
+        m = self.model
+        for row_id, addr in db.execute(select(m.id, m.address_int).where(m.pool == name)):
+            ipool.mark(addr)
+            ipool.synced_id = max(ipool.synced_id, row_id)
+        with self._lock:
+            self._pools[name] = ipool
+        return ipool
+
+    def _catch_up(self, db, ipool: IPPool) -> None:
+        """마지막으로 읽은 뒤 다른 워커가 추가한 할당(id 증가분)만 비트맵에 반영."""
+        m = self.model
+        rows = db.execute(
+            select(m.id, m.address_int).where(m.pool == ipool.name, m.id > ipool.synced_id)
+        ).all()
+        with self._lock:
+            for row_id, addr in rows:
+                ipool.mark(addr)
+                ipool.synced_id = max(ipool.synced_id, row_id)
+
+    def _insert(self, db, name: str, project_id: int, addrs: List[int]) -> List[int]:
+        """후보 주소를 한 문장으로 점유. 실제로 들어간(다른 워커와 겹치지 않은) 주소만 반환."""
+        rows = [{"pool": name, "address": str(ipaddress.ip_address(a)), "address_int": a, "project_id": project_id}
+                for a in addrs]
+        stmt = self._insert_stmt(db.bind.dialect.name)
+        if stmt is None:
+            db.execute(insert(self.model.__table__), rows)
+            return list(addrs)
+        # executemany + RETURNING (SQLAlchemy insertmanyvalues: 여러 행 VALUES 한 문장으로 묶임)
+        return list(db.execute(stmt, rows).scalars().all())
+
+    def _insert_stmt(self, dialect: str):
+        """dialect 별 INSERT ... ON CONFLICT DO NOTHING RETURNING (한 번 만들어 재사용 → 컴파일 캐시 적중)."""
+        if dialect in self._insert_stmts:
+            return self._insert_stmts[dialect]
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            dialect_insert = None
+        stmt = None
+        if dialect_insert is not None:
+            table = self.model.__table__
+            stmt = (
+                dialect_insert(table)
+                .on_conflict_do_nothing(index_elements=["pool", "address_int"])
+                .returning(table.c.address_int)
+            )
+        self._insert_stmts[dialect] = stmt
+        return stmt
@@ -0,0 +1,323 @@
+# -*- coding: utf-8 -*-
+"""
+DB 기반 provisioning 작업 큐 (lease/heartbeat).
+/api/provision 은 프로젝트와 같은 트랜잭션에 provision_jobs 행을 넣기만 하고,
+각 프로세스의 JobQueueWorker 가 lease 를 잡아(claim) 로컬 스케줄러(services.scheduler)로 실행.
+- claim: Postgres 는 SELECT ... FOR UPDATE SKIP LOCKED 로 워커끼리 막히지 않고 서로 다른 행을 가져감.
+  SQLite 는 쓰기가 직렬화되므로 같은 UPDATE ... WHERE id IN (SELECT ...) 문이 그대로 원자적.
+- heartbeat: 워커가 가진 모든 lease 를 UPDATE 한 번으로 연장. lease 를 잃은 job(다른 워커가 회수,
+  DELETE 로 취소)은 로컬에서 중단.
+- 프로세스가 죽으면 lease 가 만료되고 다른 워커(또는 재시작한 자신)가 다시 claim.
+  runner 가 예외로 끝나도 큐로 반납해 다시 claim (attempts 가 job_max_attempts 를 넘으면 FAILED).
+  실행은 at-least-once: heartbeat 가 lease_seconds 동안 한 번도 성공하지 못하면 로컬 실행을 취소하지만,
+  그 사이 다른 워커가 먼저 다시 claim 할 수 있음. 대신 runner 의 상태/로그/VM·IP 쓰기와 job 종료 기록은
+  lease 보유자만 commit 가능 (fencing, services.lease) → 이전 실행의 늦은 쓰기는 rollback 됨.
+- lease 시각은 모두 DB 시계 기준 (호스트 간 시계 차이 무관).
+- 시작 시 job 행 없이 PENDING/RUNNING 으로 남은 프로젝트(큐 도입 전 데이터 등)를 다시 큐에 넣음.
+ORM 클래스/세션 팩토리는 생성 시 주입 (순환 import 방지).
+"""
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from typing import Dict, Any, List, Optional
+
+from sqlalchemy import select, update, or_, and_
+from sqlalchemy.exc import IntegrityError
+
+from config import CONFIG
+from services.lease import Lease, db_now, db_now_plus
+from services.provisioner import update_provision_status
+
+logger = logging.getLogger("uvicorn.error")
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+
+def enqueue_job(db, job_model, project_id: int, payload: Dict[str, Any], template: str, priority: int = 0):
+    """job 행 추가 (commit 은 호출 측 - 프로젝트 INSERT 와 같은 트랜잭션)."""
+    now = db_now(db)
+    job = job_model(
+        project_id=project_id, payload=payload, template=template, priority=priority,
+        state=JOB_QUEUED, attempts=0, created_at=now, updated_at=now,
+    )
+    db.add(job)
+    return job
+
+
+def cancel_job(db, job_model, project_id: int) -> None:
+    """대기/실행 중인 job 을 cancelled 로 (commit 은 호출 측). 실행 중인 워커는 heartbeat 에서 감지."""
+    db.execute(
+        update(job_model)
+        .where(job_model.project_id == project_id, job_model.state.in_([JOB_QUEUED, JOB_RUNNING]))
+        .values(state=JOB_CANCELLED, lease_owner=None, updated_at=db_now(db))
+    )
+
+
+def claim_jobs(db, job_model, worker_id: str, limit: int, lease_seconds: float) -> List[Dict[str, Any]]:
+    """
+    실행 가능한 job(queued 또는 lease 만료된 running)을 최대 limit 개 원자적으로 claim.
+    priority 높은 순, 같은 priority 는 먼저 들어온 순.
+    """
+    if limit <= 0:
+        return []
+    now = db_now(db)
+    claimable = or_(
+        job_model.state == JOB_QUEUED,
+        and_(job_model.state == JOB_RUNNING, job_model.lease_expires_at < now),
+    )
+    candidates = (
+        select(job_model.id)
+        .where(claimable)
+        .order_by(job_model.priority.desc(), job_model.id)
+        .limit(limit)
+    )
+    if db.bind.dialect.name == "postgresql":
+        candidates = candidates.with_for_update(skip_locked=True)
+    stmt = (
+        update(job_model)
+        # 바깥 WHERE 에도 claimable 을 다시 걸어 잠금 대기 후 재평가되게 함 (Postgres READ COMMITTED)
+        .where(job_model.id.in_(candidates), claimable)
+        .values(
+            state=JOB_RUNNING,
+            lease_owner=worker_id,
+            lease_expires_at=db_now_plus(db, lease_seconds),
+            attempts=job_model.attempts + 1,
+            updated_at=now,
+        )
+        .returning(job_model.id, job_model.project_id, job_model.payload, job_model.template,
+                   job_model.priority, job_model.attempts)
+    )
+    rows = db.execute(stmt).all()
+    db.commit()
+    return [
+        {"id": r[0], "project_id": r[1], "payload": r[2] or {}, "template": r[3] or "single",
+         "priority": r[4] or 0, "attempts": r[5]}
+        for r in rows
+    ]
+
+
+def heartbeat(db, job_model, worker_id: str, job_ids: List[int], lease_seconds: float) -> List[int]:
+    """보유 lease 를 한 번에 연장하고, 더 이상 보유하지 않은 job id 목록을 반환."""
+    if not job_ids:
+        return []
+    db.execute(
+        update(job_model)
+        .where(job_model.lease_owner == worker_id, job_model.state == JOB_RUNNING)
+        .values(lease_expires_at=db_now_plus(db, lease_seconds), updated_at=db_now(db))
+    )
+    still_held = set(
+        db.execute(
+            select(job_model.id).where(
+                job_model.id.in_(job_ids),
+                job_model.lease_owner == worker_id,
+                job_model.state == JOB_RUNNING,
+            )
+        ).scalars()
+    )
+    db.commit()
+    return [jid for jid in job_ids if jid not in still_held]
+
+
+def finish_job(db, job_model, job_id: int, worker_id: str, state: str) -> bool:
+    """lease 보유자일 때만 최종 상태 기록 (queued 로 되돌리는 release 포함)."""
+    values = {"state": state, "lease_owner": None, "updated_at": db_now(db)}
+    if state == JOB_QUEUED:
+        values["lease_expires_at"] = None
+    res = db.execute(
+        update(job_model)
+        .where(job_model.id == job_id, job_model.lease_owner == worker_id, job_model.state == JOB_RUNNING)
+        .values(**values)
+    )
+    db.commit()
+    return res.rowcount > 0
+
+
+def recover_orphaned_projects(db, project_model, job_model) -> int:
+    """PENDING/RUNNING 인데 job 행이 없는 프로젝트를 다시 큐에 넣음. 추가한 개수 반환."""
+    active = [CONFIG["status_pending"], CONFIG["status_running"]]
+    orphans = db.execute(
+        select(project_model.id, project_model.template_type, project_model.details)
+        .outerjoin(job_model, job_model.project_id == project_model.id)
+        .where(project_model.status.in_(active), job_model.id.is_(None))
+    ).all()
+    recovered = 0
+    for project_id, template, details in orphans:
+        payload = (details or {}).get("input") if isinstance(details, dict) else None
+        try:
+            enqueue_job(db, job_model, project_id, payload or {}, template or "single")
+            db.commit()
+            recovered += 1
+        except IntegrityError:
+            # 다른 워커가 먼저 넣음
+            db.rollback()
+    return recovered
+
+
+class JobQueueWorker:
+    """프로세스당 하나. provision_jobs 를 claim 해서 로컬 스케줄러로 넘기고 lease 를 유지."""
+
+    def __init__(self, session_factory, job_model, project_model, log_model, scheduler):
+        self.session_factory = session_factory
+        self.job_model = job_model
+        self.project_model = project_model
+        self.log_model = log_model
+        self.scheduler = scheduler
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.lease_seconds = CONFIG["job_lease_seconds"]
+        self.heartbeat_seconds = CONFIG["job_heartbeat_seconds"]
+        self.poll_interval = CONFIG["job_poll_interval_seconds"]
+        self.max_attempts = CONFIG["job_max_attempts"]
+        self._held: Dict[int, int] = {}  # project_id -> job id
+        self._renewed_at: Dict[int, float] = {}  # job id -> 마지막으로 lease 를 확보/연장한 시각 (monotonic, 요청 직전 기준)
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = False
+
+    # ---------- DB 호출 (스레드에서 실행) ----------
+    def _with_session(self, func, *args):
+        db = self.session_factory()
+        try:
+            return func(db, *args)
+        finally:
+            db.close()
+
+    async def _db(self, func, *args):
+        return await asyncio.to_thread(self._with_session, func, *args)
+
+    # ---------- lifecycle ----------
+    async def start(self) -> None:
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self.scheduler.on_finish = self._on_job_finished
+        try:
+            recovered = await self._db(recover_orphaned_projects, self.project_model, self.job_model)
+            if recovered:
+                logger.warning("복구된 provisioning 작업 %d건 (job 없이 PENDING/RUNNING 상태)", recovered)
+        except Exception as e:
+            logger.error("orphan 프로젝트 복구 실패: %r", e)
+        self._tasks = [
+            asyncio.create_task(self._poll_loop()),
+            asyncio.create_task(self._heartbeat_loop()),
+        ]
+
+    async def stop(self) -> None:
+        """폴링 중단. 실행 중인 job 은 이후 scheduler.stop() 에서 취소되며 큐로 반납(release)됨."""
+        self._stopping = True
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self) -> None:
+        """새 job 이 들어왔음을 로컬 워커에 알림 (다음 폴링 주기를 기다리지 않음)."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"worker_id": self.worker_id, "held_leases": len(self._held)}
+
+    # ---------- loops ----------
+    async def _poll_loop(self) -> None:
+        while True:
+            try:
+                await self._claim_and_submit()
+            except Exception as e:
+                logger.error("job claim 실패: %r", e)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _claim_and_submit(self) -> None:
+        free = self.scheduler.free_slots()
+        if free <= 0:
+            return
+        requested_at = time.monotonic()
+        jobs = await self._db(claim_jobs, self.job_model, self.worker_id, free, self.lease_seconds)
+        for job in jobs:
+            if job["attempts"] > self.max_attempts:
+                await self._db(self._give_up, job)
+                continue
+            self._held[job["project_id"]] = job["id"]
+            self._renewed_at[job["id"]] = requested_at
+            self.scheduler.submit(
+                job["project_id"], job["payload"], template=job["template"], priority=job["priority"],
+                lease=Lease(self.job_model, job["id"], self.worker_id),
+            )
+
+    def _give_up(self, db, job: Dict[str, Any]) -> None:
+        if finish_job(db, self.job_model, job["id"], self.worker_id, JOB_FAILED):
+            msg = f"Error: provisioning 재시도 한도 초과 ({self.max_attempts}회)"
+            update_provision_status(
+                db, job["project_id"], CONFIG["status_failed"],
+                project_model=self.project_model,
+                log_model=self.log_model,
+                logs_append=[msg],
+                error={"message": msg},
+                log_level="ERROR",
+            )
+
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            if not self._held:
+                continue
+            await self.renew_leases()
+
+    async def renew_leases(self) -> None:
+        """
+        보유 lease 연장 한 번. 잃은 job 은 로컬 실행 취소.
+        DB 오류로 연장하지 못하면, 마지막 확보/연장 후 lease_seconds 가 지난 job 은 이미 만료된 것으로 보고 취소
+        (다른 워커가 다시 claim 했을 수 있음).
+        """
+        held = dict(self._held)
+        requested_at = time.monotonic()
+        try:
+            lost = await self._db(heartbeat, self.job_model, self.worker_id, list(held.values()), self.lease_seconds)
+        except Exception as e:
+            logger.error("job heartbeat 실패: %r", e)
+            lost = [job_id for job_id in held.values()
+                    if requested_at - self._renewed_at.get(job_id, requested_at) >= self.lease_seconds]
+            reason = "heartbeat 실패로 lease 만료"
+        else:
+            for job_id in held.values():
+                self._renewed_at[job_id] = requested_at
+            reason = "lease 상실"
+        lost_ids = set(lost)
+        for project_id, job_id in held.items():
+            if job_id in lost_ids and self._held.get(project_id) == job_id:
+                logger.warning("%s → 로컬 실행 중단 (project_id=%s, job_id=%s)", reason, project_id, job_id)
+                self._held.pop(project_id, None)
+                self._renewed_at.pop(job_id, None)
+                self.scheduler.cancel(project_id)
+
+    async def _on_job_finished(self, project_id: int, outcome: str) -> None:
+        job_id = self._held.pop(project_id, None)
+        if job_id is None:
+            return
+        self._renewed_at.pop(job_id, None)
+        self.notify()  # 슬롯이 비었으니 바로 다음 job claim
+        if outcome == "lost":
+            return  # 이미 다른 워커 소유 (finish_job 도 거부됨)
+        if outcome == "cancelled":
+            # 종료(shutdown) 중이면 다른 워커가 바로 가져가도록 반납, 아니면 사용자 취소
+            state = JOB_QUEUED if self._stopping else JOB_CANCELLED
+        elif outcome == "error":
+            # runner 가 예외로 끝남 (FAILED 기록조차 못 함) → 큐로 반납해 재시도.
+            # 다시 claim 될 때 attempts 가 max_attempts 를 넘으면 _give_up 이 job/프로젝트를 FAILED 로 기록
+            logger.warning("provisioning job 오류 → 재시도 대기 (project_id=%s, job_id=%s)", project_id, job_id)
+            state = JOB_QUEUED
+        else:
+            state = JOB_DONE
+        try:
+            await self._db(finish_job, self.job_model, job_id, self.worker_id, state)
+        except Exception as e:
+            logger.error("job 상태 기록 실패 (job_id=%s): %r", job_id, e)
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+provisioning job lease fencing + DB 시계.
+- JobQueueWorker 가 claim 한 job 은 스케줄러 task 의 contextvar 에 Lease(job 행, 워커 id)를 둠.
+  runner 의 DB 쓰기(상태/로그, VM·IP 점유)는 commit 직전에 check_lease() 로 그 lease 가 아직
+  이 워커 것이고 DB 시계로 만료 전인지 같은 트랜잭션에서 확인. 아니면 rollback 후 LeaseLost.
+  → heartbeat 가 끊겨 다른 워커가 job 을 다시 claim 한 뒤에는 이전 runner 의 쓰기가 반영되지 않음
+  (실행 자체는 at-least-once, 결과 기록은 lease 보유자만).
+- Postgres 는 job 행을 FOR UPDATE 로 잠가 commit 까지 다른 워커의 claim 을 막음.
+  SQLite 는 쓰기가 직렬화되므로 같은 트랜잭션 안의 확인으로 충분.
+- lease 시각은 DB 시계(db_now / db_now_plus)로만 계산 (호스트 간 시계 차이로 lease 가 일찍 만료되지 않게).
+  SQLite 는 UTC 'YYYY-MM-DD HH:MM:SS.SSS' 문자열 (문자열 비교 = 시간 비교).
+contextvar 는 asyncio.to_thread / AsyncSession.run_sync 로 실행되는 동기 함수에도 그대로 전달됨.
+"""
+import contextvars
+from datetime import timedelta
+from typing import Any, NamedTuple, Optional
+
+from sqlalchemy import func, select
+
+JOB_RUNNING = "running"
+
+_SQLITE_TS = "%Y-%m-%d %H:%M:%f"
+
+
+class LeaseLost(Exception):
+    """job lease 를 잃어 이 워커의 쓰기가 거부됨."""
+
+
+class Lease(NamedTuple):
+    job_model: Any
+    job_id: int
+    worker_id: str
+
+
+_current: contextvars.ContextVar = contextvars.ContextVar("cmp_job_lease", default=None)
+
+
+def bind_lease(lease: Optional[Lease]) -> None:
+    """현재 task context 의 lease 지정 (스케줄러가 job task 시작 시 호출)."""
+    _current.set(lease)
+
+
+def current_lease() -> Optional[Lease]:
+    return _current.get()
+
+
+def db_now(db):
+    """DB 서버의 현재 시각 SQL 식."""
+    if db.bind.dialect.name == "sqlite":
+        return func.strftime(_SQLITE_TS, "now")
+    return func.now()
+
+
+def db_now_plus(db, seconds: float):
+    """DB 서버 현재 시각 + seconds SQL 식."""
+    if db.bind.dialect.name == "sqlite":
+        return func.strftime(_SQLITE_TS, "now", f"{seconds:+.3f} seconds")
+    return func.now() + timedelta(seconds=seconds)
+
+
+def check_lease(db) -> None:
+    """
+    commit 직전에 호출. 현재 context 의 lease 가 유효하지 않으면 rollback 후 LeaseLost.
+    lease 가 없으면(스크립트, 관리 API 등 큐 밖의 호출) 아무것도 하지 않음.
+    """
+    lease = _current.get()
+    if lease is None:
+        return
+    m = lease.job_model
+    stmt = select(m.id).where(
+        m.id == lease.job_id,
+        m.lease_owner == lease.worker_id,
+        m.state == JOB_RUNNING,
+        m.lease_expires_at > db_now(db),
+    )
+    if db.bind.dialect.name == "postgresql":
+        stmt = stmt.with_for_update()
+    if db.execute(stmt).first() is None:
+        db.rollback()
+        raise LeaseLost(f"job {lease.job_id} lease 상실 (worker {lease.worker_id})")
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""
+모니터링 대시보드용 백그라운드 메트릭 폴러.
+고정 주기로 CPU/메모리 PromQL 을 한 번씩 평가해 {ip: {cpu, memory}} 맵을
+버전이 붙은 인메모리 스냅샷으로 보관. 요청은 Prometheus 대신 스냅샷을 읽고,
+스냅샷이 TTL 을 넘겼을 때 동시에 들어온 요청들은 하나의 refresh 를 공유.
+→ 대시보드를 보는 사람이 몇 명이든 Prometheus 부하는 주기당 쿼리 몇 개(점유 VM chunk 수)로 고정.
+refresh 결과는 히스토리 ring buffer(services.timeseries)에도 한 tick 으로 쌓음.
+Prometheus 에 닿지 못하면(PrometheusUnavailable) 직전 스냅샷을 그대로 둠: 버전/fetched_at 유지, 히스토리에도 안 쌓음
+→ 장애 동안 마지막 CPU/메모리 값이 유지되고 stale 로 표시됨.
+조회 범위는 점유 중인 풀 VM 의 IP 로 한정 (services.promql: instance matcher + CPU/메모리 합친 쿼리).
+IP 목록은 data_versions 가 바뀔 때만 DB 에서 다시 읽음 (WatchedInstances, 세션 팩토리/ORM 은 main 에서 주입).
+범위가 설정되지 않으면(bind_scope 전) 예전처럼 전체 인스턴스를 받아 파이썬에서 거름.
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, Any, Awaitable, Callable, Iterable, Optional
+
+from config import CONFIG
+from services.data_version import data_versions
+from services.prometheus import prometheus, parse_metrics, parse_range_metrics
+from services.promql import InstanceScope
+from services.resources import list_occupied_ips
+from services.timeseries import metric_history
+
+logger = logging.getLogger("uvicorn.error")
+
+CPU_QUERY = '100 - (avg by (instance) (rate(node_cpu_seconds_total{mode="idle"}[1m])) * 100)'
+MEM_QUERY = '(1 - (node_memory_MemAvailable_bytes / node_memory_MemTotal_bytes)) * 100'
+
+
+class MetricsSnapshot:
+    """불변 스냅샷: version 은 refresh 결과가 직전과 다를 때만 1 증가 (ETag 용)."""
+
+    __slots__ = ("version", "data", "fetched_at", "_fetched_monotonic")
+
+    def __init__(self, version: int, data: Dict[str, Dict[str, float]], fetched_at: float, fetched_monotonic: float):
+        self.version = version
+        self.data = data
+        self.fetched_at = fetched_at
+        self._fetched_monotonic = fetched_monotonic
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self._fetched_monotonic
+
+    def is_stale(self, ttl: float) -> bool:
+        return self.age > ttl
+
+
+async def fetch_metrics_map(scope: Optional[InstanceScope] = None) -> Dict[str, Dict[str, float]]:
+    """
+    {ip: {"cpu": .., "memory": ..}} 반환.
+    scope 가 있으면 그 IP 들만 chunk 쿼리로 동시에 평가 (IP 가 없으면 Prometheus 를 부르지 않음),
+    없으면 전체 인스턴스 CPU/메모리 쿼리 2개.
+    응답한 엔드포인트가 없으면 PrometheusUnavailable (빈 결과와 구분).
+    """
+    metrics_map: Dict[str, Dict[str, float]] = {}
+    if scope is not None:
+        for results in await asyncio.gather(*(prometheus.query(q, strict=True) for q in scope.queries)):
+            scope.parse(results, metrics_map)
+        return metrics_map
+    answers = await prometheus.query_many({"cpu": CPU_QUERY, "memory": MEM_QUERY}, strict=True)
+    parse_metrics(answers["cpu"], "cpu", metrics_map)
+    parse_metrics(answers["memory"], "memory", metrics_map)
+    return metrics_map
+
+
+async def fetch_series_map(ips: Iterable[str], start: float, end: float, step: float) -> Dict[str, Dict[str, Any]]:
+    """ips 의 CPU/메모리 range query (합친 chunk 쿼리를 동시에) → {ip: {"cpu": (ts, values), ...}}."""
+    scope = InstanceScope(ips, CONFIG["prometheus_instance_chunk_size"])
+    answers = await asyncio.gather(*(prometheus.query_range(q, start, end, step) for q in scope.queries))
+    series_map: Dict[str, Dict[str, Any]] = {}
+    for results in answers:
+        scope.parse_range(results, series_map)
+    return series_map
+
+
+class WatchedInstances:
+    """
+    폴러가 조회할 범위 = 점유 중인 풀 VM 의 IP.
+    data_versions 의 (epoch, version) 이 같으면 DB 를 다시 읽지 않고, IP 목록이 그대로면
+    InstanceScope(쿼리 문자열, instance → IP 인덱스)도 그대로 재사용. 버전을 모르면 매번 읽음.
+    """
+
+    def __init__(self, pool_model, session_factory, chunk_size: int, versions=data_versions):
+        self.pool_model = pool_model
+        self.session_factory = session_factory
+        self.chunk_size = chunk_size
+        self.versions = versions
+        self._scope: Optional[InstanceScope] = None
+        self._version = None
+        self._lock = asyncio.Lock()
+        self.loads = 0
+
+    def invalidate(self) -> None:
+        self._scope = None
+        self._version = None
+
+    async def get(self) -> InstanceScope:
+        version = self.versions.current
+        if self._scope is not None and version is not None and version == self._version:
+            return self._scope
+        async with self._lock:
+            version = self.versions.current
+            if self._scope is None or version is None or version != self._version:
+                self.loads += 1
+                async with self.session_factory() as db:
+                    ips = await db.run_sync(list_occupied_ips, self.pool_model)
+                if self._scope is None or tuple(dict.fromkeys(ips)) != self._scope.ips:
+                    self._scope = InstanceScope(ips, self.chunk_size)
+                self._version = version
+            return self._scope
+
+
+class MetricsPoller:
+    def __init__(self, interval: float, ttl: float, fetch=fetch_metrics_map, history=None):
+        self.interval = interval
+        self.ttl = ttl
+        self._fetch = fetch
+        self.history = history
+        self._scope: Optional[Callable[[], Awaitable[InstanceScope]]] = None
+        self._last_scope: Optional[InstanceScope] = None
+        self._snapshot: Optional[MetricsSnapshot] = None
+        self._version = 0
+        self._inflight: Optional[asyncio.Future] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def bind_scope(self, scope: Callable[[], Awaitable[InstanceScope]]) -> None:
+        """조회 범위 provider 주입 (예: WatchedInstances.get). refresh 마다 호출해 fetch 에 넘김."""
+        self._scope = scope
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning("⚠️ Metrics poller refresh 실패: %r", e)
+            await asyncio.sleep(self.interval)
+
+    async def refresh(self) -> MetricsSnapshot:
+        """single-flight: 진행 중인 refresh 가 있으면 그 결과를 함께 기다림."""
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._do_refresh())
+            self._inflight.add_done_callback(self._clear_inflight)
+        return await asyncio.shield(self._inflight)
+
+    def _clear_inflight(self, fut: asyncio.Future) -> None:
+        if self._inflight is fut:
+            self._inflight = None
+
+    async def _resolve_scope(self) -> Optional[InstanceScope]:
+        """조회 범위. provider 가 실패하면(DB 오류 등) 직전 범위로, 그것도 없으면 범위 없이(전체 조회 후 거름)."""
+        if self._scope is None:
+            return None
+        try:
+            self._last_scope = await self._scope()
+        except Exception as e:
+            logger.warning("⚠️ Metrics 조회 범위 갱신 실패, 직전 범위 사용: %r", e)
+        return self._last_scope
+
+    async def _do_refresh(self) -> MetricsSnapshot:
+        scope = await self._resolve_scope()
+        try:
+            data = await self._fetch(scope)
+        except Exception as e:
+            # 직전 스냅샷 유지 (버전/fetched_at 그대로 → stale 로 보임). 한 번도 성공 못 했으면 빈 스냅샷
+            logger.warning("⚠️ Metrics 조회 실패, 직전 스냅샷 유지: %r", e)
+            if self._snapshot is not None:
+                return self._snapshot
+            return MetricsSnapshot(self._version, {}, 0.0, float("-inf"))
+        # 값이 그대로면 버전 유지 (fetched_at 만 갱신) → my-resources ETag 가 폴링 주기마다 바뀌지 않음
+        if self._snapshot is None or data != self._snapshot.data:
+            self._version += 1
+        self._snapshot = MetricsSnapshot(self._version, data, time.time(), time.monotonic())
+        if self.history is not None:
+            self.history.append(data, ts=self._snapshot.fetched_at)
+        return self._snapshot
+
+    async def get(self) -> MetricsSnapshot:
+        """신선한 스냅샷 반환. 없거나 TTL 초과면 (공유) refresh 후 반환."""
+        snap = self._snapshot
+        if snap is not None and not snap.is_stale(self.ttl):
+            return snap
+        return await self.refresh()
+
+    def snapshot_meta(self, snap: MetricsSnapshot) -> Dict[str, Any]:
+        return {
+            "version": snap.version,
+            "fetched_at": snap.fetched_at,
+            "age_seconds": round(snap.age, 3),
+            "stale": snap.is_stale(self.ttl),
+        }
+
+
+metrics_poller = MetricsPoller(
+    interval=CONFIG["metrics_poll_interval_seconds"],
+    ttl=CONFIG["metrics_snapshot_ttl_seconds"],
+    history=metric_history,
+)
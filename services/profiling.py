@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+"""
+운영 중 느린 요청 진단 도구 (둘 다 기본 꺼짐, 꺼져 있으면 미들웨어/이벤트 자체를 설치하지 않음).
+
+1) 요청 프로파일링 (PROFILING_ENABLED)
+   - X-Profile: 1 헤더 또는 ?_profile=1 이 붙은 요청 + 관리자(X-Admin-Password)일 때만 cProfile 실행.
+   - 결과는 메모리(최근 PROFILE_KEEP 개)와, PROFILE_DIR 이 있으면 .prof 파일(snakeviz 등)로 저장.
+     응답 헤더 X-Profile-Id 로 id 를 알려주고 /api/admin/profiles/{id} 에서 pstats 요약을 조회.
+   - cProfile 은 스레드 단위라 같은 이벤트 루프에서 동시에 돌던 다른 요청/백그라운드 작업도 섞여 잡힘.
+     한 번에 하나만 프로파일링 (이미 진행 중이면 X-Profile-Skipped: busy).
+
+2) 느린 쿼리 로그 (SLOW_QUERY_THRESHOLD_MS > 0)
+   - 엔진 이벤트로 실행 시간이 임계값을 넘은 SQL 의 문장, 파라미터 형태(값 제외), 시간, 요청 라우트를 기록.
+   - 라우트는 요청마다 contextvar 에 넣은 ASGI scope 에서 읽음 (라우팅 후 scope["route"] 가 채워짐).
+     요청 밖(폴러, provisioning job)은 asyncio task 이름.
+"""
+import asyncio
+import contextvars
+import cProfile
+import io
+import itertools
+import logging
+import os
+import pstats
+import time
+import weakref
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from urllib.parse import parse_qs
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger("uvicorn.error")
+
+_current_scope: contextvars.ContextVar = contextvars.ContextVar("cmp_request_scope", default=None)
+
+
+def _origin() -> str:
+    """현재 SQL 을 실행한 요청의 "METHOD /route/{template}" (요청 밖이면 task 이름)."""
+    scope = _current_scope.get()
+    if scope is not None:
+        route = scope.get("route")
+        return f'{scope.get("method", "")} {getattr(route, "path", None) or scope.get("path", "")}'
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    return f"task:{task.get_name()}" if task is not None else "background"
+
+
+# ==========================================
+# 1) 요청 프로파일링
+# ==========================================
+class ProfileStore:
+    """최근 프로파일 보관 (id → pstats 데이터). directory 가 있으면 .prof 파일로도 저장."""
+
+    def __init__(self, keep: int, directory: Optional[str] = None):
+        self.keep = keep
+        self.directory = directory
+        self._profiles: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._ids = itertools.count(1)
+
+    def new_id(self) -> str:
+        return f"{int(time.time())}-{next(self._ids)}"
+
+    def add(self, profile_id: str, profiler: cProfile.Profile, meta: Dict[str, Any]) -> None:
+        stats = pstats.Stats(profiler)
+        entry = {"id": profile_id, **meta, "stats": stats}
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f"{profile_id}.prof")
+            stats.dump_stats(path)
+            entry["file"] = path
+        self._profiles[profile_id] = entry
+        while len(self._profiles) > self.keep:
+            self._profiles.popitem(last=False)
+
+    def list(self) -> List[Dict[str, Any]]:
+        return [{k: v for k, v in p.items() if k != "stats"} for p in reversed(self._profiles.values())]
+
+    def text(self, profile_id: str, sort: str = "cumulative", limit: int = 40) -> Optional[str]:
+        entry = self._profiles.get(profile_id)
+        if entry is None:
+            return None
+        out = io.StringIO()
+        stats = pstats.Stats(stream=out)
+        stats.add(entry["stats"])  # 저장된 Stats 의 정렬 상태를 바꾸지 않도록 복사본에서 정렬
+        stats.sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+
+def _profile_requested(scope) -> bool:
+    for name, value in scope["headers"]:
+        if name == b"x-profile" and value not in (b"", b"0"):
+            return True
+    qs = scope.get("query_string") or b""
+    if b"_profile" in qs:
+        return parse_qs(qs.decode("latin-1")).get("_profile", ["0"])[0] not in ("", "0")
+    return False
+
+
+class ProfilingMiddleware:
+    """
+    X-Profile / ?_profile 요청만 cProfile 로 감쌈. 그 외 요청의 비용은 헤더 목록 한 번 훑기.
+    authorize(headers) 는 관리자 여부를 돌려주는 코루틴 (main 에서 주입).
+    """
+
+    def __init__(self, app, store: ProfileStore, authorize: Callable[[Dict[str, str]], Awaitable[bool]]):
+        self.app = app
+        self.store = store
+        self.authorize = authorize
+        self._busy = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _profile_requested(scope):
+            await self.app(scope, receive, send)
+            return
+        headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope["headers"]}
+        if not await self.authorize(headers):
+            await self.app(scope, receive, send)
+            return
+        if self._busy:
+            await self.app(scope, receive, self._with_header(send, b"x-profile-skipped", b"busy"))
+            return
+
+        profile_id = self.store.new_id()
+        status = 500
+        inner_send = self._with_header(send, b"x-profile-id", profile_id.encode())
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await inner_send(message)
+
+        self._busy = True
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.disable()
+            self._busy = False
+            route = scope.get("route")
+            self.store.add(profile_id, profiler, {
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": getattr(route, "path", None),
+                "status": status,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+                "created_at": time.time(),
+            })
+            logger.info("프로파일 저장: %s %s → %s", scope["method"], scope["path"], profile_id)
+
+    @staticmethod
+    def _with_header(send, name: bytes, value: bytes):
+        async def wrapped(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": list(message.get("headers", [])) + [(name, value)]}
+            await send(message)
+        return wrapped
+
+
+# ==========================================
+# 2) 느린 쿼리 로그
+# ==========================================
+def params_shape(parameters: Any, executemany: bool = False) -> Any:
+    """파라미터 값 대신 형태만: {"name": "str", ...} / ["int", ...] / executemany 면 {"rows": n, "row": 형태}."""
+    if executemany and isinstance(parameters, (list, tuple)):
+        return {"rows": len(parameters), "row": params_shape(parameters[0]) if parameters else None}
+    if isinstance(parameters, dict):
+        return {str(k): type(v).__name__ for k, v in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(v).__name__ for v in parameters]
+    return type(parameters).__name__
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms: float, keep: int = 200, max_statement_chars: int = 2000):
+        self.threshold = threshold_ms / 1000.0
+        self.max_statement_chars = max_statement_chars
+        self.entries: deque = deque(maxlen=keep)
+        self._instrumented: "weakref.WeakSet[Engine]" = weakref.WeakSet()
+
+    def instrument(self, engine: Engine) -> None:
+        """DatabaseManager 의 swap listener 로 등록."""
+        if engine in self._instrumented:
+            return
+        self._instrumented.add(engine)
+        threshold = self.threshold
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _before(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("cmp_slow_start", []).append(time.perf_counter())
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def _after(conn, cursor, statement, parameters, context, executemany):
+            starts = conn.info.get("cmp_slow_start")
+            if not starts:
+                return
+            elapsed = time.perf_counter() - starts.pop()
+            if elapsed >= threshold:
+                self._record(engine, statement, parameters, executemany, elapsed)
+
+        @event.listens_for(engine, "handle_error")
+        def _error(context):
+            starts = context.connection.info.get("cmp_slow_start") if context.connection is not None else None
+            if starts:
+                starts.pop()
+
+    def _record(self, engine: Engine, statement: str, parameters, executemany: bool, elapsed: float) -> None:
+        entry = {
+            "at": time.time(),
+            "duration_ms": round(elapsed * 1000, 2),
+            "engine": engine.url.get_backend_name(),
+            "origin": _origin(),
+            "statement": " ".join(statement.split())[:self.max_statement_chars],
+            "params": params_shape(parameters, executemany),
+        }
+        self.entries.append(entry)
+        logger.warning("🐢 slow query %.1fms [%s] %s params=%s",
+                       entry["duration_ms"], entry["origin"], entry["statement"][:300], entry["params"])
+
+    def recent(self, limit: int = 50) -> List[Dict[str, Any]]:
+        return list(self.entries)[-limit:][::-1]
+
+
+class RequestContextMiddleware:
+    """느린 쿼리 로그의 origin 용: 요청 처리 동안 ASGI scope 를 contextvar 에 둠 (slow log 가 켜졌을 때만 설치)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _current_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_scope.reset(token)
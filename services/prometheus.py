@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+비동기 Prometheus 클라이언트.
+httpx.AsyncClient 하나를 공유해 keep-alive 커넥션 풀을 재사용하고,
+여러 PromQL 을 동시에 평가한다. 쿼리별 타임아웃과 엔드포인트별 서킷 브레이커를 두어
+느린 Prometheus 한 대가 이벤트 루프(/api/provision, /api/history 등)를 멈추지 않게 함.
+엔드포인트가 여러 개면 동시에 조회한 뒤 라벨 기준으로 결과를 병합.
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+import httpx
+import numpy as np
+
+from config import CONFIG
+from services.telemetry import PROMETHEUS_REQUEST_SECONDS, PROMETHEUS_ERRORS
+
+logger = logging.getLogger("uvicorn.error")
+# httpx 는 요청마다 INFO 로그를 남기므로 대시보드 폴링 시 로그가 넘침
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+class PrometheusUnavailable(Exception):
+    """strict 조회에서 모든 엔드포인트가 실패/타임아웃/서킷 오픈일 때."""
+
+
+class _CircuitBreaker:
+    """
+    연속 실패가 threshold 에 도달하면 reset_seconds 동안 해당 엔드포인트 호출을 건너뜀.
+    대기 시간이 지나면 호출 하나만 시험(half-open)으로 통과시키고, 그 결과가 나올 때까지 나머지는 계속 건너뜀.
+    """
+
+    def __init__(self, threshold: int, reset_seconds: float):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        now = time.monotonic()
+        if now - self.opened_at < self.reset_seconds:
+            return False
+        # half-open: 이 호출만 시험 통과. opened_at 을 당겨 두어 결과 전까지(또는 다시 reset_seconds 동안) 나머지는 차단
+        self.opened_at = now
+        return True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+
+
+class PrometheusClient:
+    """여러 Prometheus 엔드포인트에 대한 비동기 조회 + 결과 병합."""
+
+    def __init__(
+        self,
+        urls: List[str],
+        timeout: float,
+        max_connections: int,
+        breaker_failures: int,
+        breaker_reset_seconds: float,
+        transport: Optional[httpx.AsyncBaseTransport] = None,  # 테스트용 (httpx.MockTransport)
+    ):
+        self.urls = [u.rstrip("/") for u in urls]
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.transport = transport
+        self._breakers = {u: _CircuitBreaker(breaker_failures, breaker_reset_seconds) for u in self.urls}
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # 이벤트 루프 안에서 처음 사용할 때 생성 (import 시점에는 루프가 없음)
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+                transport=self.transport,
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _get_one(self, base_url: str, path: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """단일 엔드포인트 조회. 실패/타임아웃/서킷 오픈 시 None."""
+        breaker = self._breakers[base_url]
+        if not breaker.allow():
+            PROMETHEUS_ERRORS.labels(base_url, "circuit_open").inc()
+            return None
+        start = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(
+                self._get_client().get(f"{base_url}{path}", params=params),
+                timeout=self.timeout,
+            )
+            PROMETHEUS_REQUEST_SECONDS.labels(base_url, path).observe(time.perf_counter() - start)
+            if response.status_code == 200:
+                data = response.json()
+                if data.get("status") == "success":
+                    breaker.record_success()
+                    return data["data"]
+            breaker.record_failure()
+            PROMETHEUS_ERRORS.labels(base_url, "http").inc()
+            logger.warning("⚠️ Prometheus Query Error (%s): HTTP %s", base_url, response.status_code)
+        except Exception as e:
+            breaker.record_failure()
+            PROMETHEUS_REQUEST_SECONDS.labels(base_url, path).observe(time.perf_counter() - start)
+            PROMETHEUS_ERRORS.labels(base_url, "error").inc()
+            logger.warning("⚠️ Prometheus Query Error (%s): %r", base_url, e)
+        return None
+
+    async def _fan_out(self, path: str, params: Dict[str, Any], strict: bool = False) -> List[Dict[str, Any]]:
+        """
+        모든 엔드포인트를 동시에 조회하고 라벨셋 기준으로 중복을 제거해 병합.
+        strict 면 한 대도 응답하지 못했을 때 빈 리스트 대신 PrometheusUnavailable (결과 없음과 장애를 구분).
+        """
+        answers = await asyncio.gather(*(self._get_one(u, path, params) for u in self.urls))
+        if strict and all(data is None for data in answers):
+            raise PrometheusUnavailable(f"응답한 Prometheus 엔드포인트 없음 ({path})")
+        merged: List[Dict[str, Any]] = []
+        seen = set()
+        for data in answers:
+            if not data:
+                continue
+            for series in data.get("result") or []:
+                key = frozenset((series.get("metric") or {}).items())
+                if key in seen:
+                    continue
+                seen.add(key)
+                merged.append(series)
+        return merged
+
+    async def query(self, promql: str, strict: bool = False) -> List[Dict[str, Any]]:
+        """instant query. 실패 시 빈 리스트 (기존 query_prometheus 와 동일한 계약), strict 면 PrometheusUnavailable."""
+        return await self._fan_out("/api/v1/query", {"query": promql}, strict=strict)
+
+    async def query_range(self, promql: str, start: float, end: float, step: float) -> List[Dict[str, Any]]:
+        """range query (matrix). 실패 시 빈 리스트."""
+        return await self._fan_out(
+            "/api/v1/query_range",
+            {"query": promql, "start": f"{start:.3f}", "end": f"{end:.3f}", "step": f"{step:g}s"},
+        )
+
+    async def query_many(self, queries: Dict[str, str], strict: bool = False) -> Dict[str, List[Dict[str, Any]]]:
+        """여러 쿼리를 동시에 평가. 전체 지연은 가장 느린 쿼리 하나로 제한됨."""
+        names = list(queries)
+        results = await asyncio.gather(*(self.query(queries[n], strict=strict) for n in names))
+        return dict(zip(names, results))
+
+
+def instance_ip(instance: str) -> str:
+    """instance 라벨("ip:port") → ip."""
+    return instance.split(':')[0]
+
+
+def parse_metrics(results: List[Dict[str, Any]], metric_type: str, metrics_map: Dict[str, Dict[str, float]]) -> None:
+    """instant vector 결과를 {ip: {metric_type: 값}} 형태로 metrics_map 에 누적 (instance 의 포트 제거)."""
+    for res in results:
+        ip = instance_ip(res['metric'].get('instance', ''))
+        val = float(res['value'][1])
+        if ip not in metrics_map:
+            metrics_map[ip] = {}
+        metrics_map[ip][metric_type] = round(val, 1)
+
+
+def parse_range_metrics(
+    results: List[Dict[str, Any]],
+    metric_type: str,
+    series_map: Dict[str, Dict[str, Tuple[np.ndarray, np.ndarray]]],
+) -> None:
+    """range(matrix) 결과를 {ip: {metric_type: (timestamps, values)}} 로 series_map 에 누적 (parse_metrics 와 같은 ip 매핑)."""
+    for res in results:
+        ip = instance_ip(res['metric'].get('instance', ''))
+        points = res.get('values') or []
+        ts = np.fromiter((p[0] for p in points), dtype=np.float64, count=len(points))
+        values = np.array([p[1] for p in points], dtype=np.float64)  # "NaN" 문자열도 float 로 변환
+        series_map.setdefault(ip, {})[metric_type] = (ts, values)
+
+
+prometheus = PrometheusClient(
+    urls=CONFIG["prometheus_urls"],
+    timeout=CONFIG["prometheus_query_timeout_seconds"],
+    max_connections=CONFIG["prometheus_max_connections"],
+    breaker_failures=CONFIG["prometheus_breaker_failures"],
+    breaker_reset_seconds=CONFIG["prometheus_breaker_reset_seconds"],
+)
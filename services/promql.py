@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+범위를 좁힌(scoped) CPU/메모리 PromQL 빌더 + instance → IP 인덱스.
+- 기존 쿼리는 `avg by (instance)` 로 Prometheus 전체 인스턴스를 받아온 뒤 파이썬에서 사용자 IP 만 골랐음
+  → 응답 크기/파싱 시간이 데이터센터 규모에 비례.
+- 여기서는 selector 마다 instance=~"(ip1|ip2|...):.*" 를 넣어 서버에서 거르고,
+  CPU/메모리를 label_replace(..., "cmp_metric", ...) or ... 로 합쳐 한 쿼리로 평가.
+  IP 가 많으면 chunk_size 개씩 나눈 쿼리 여러 개 (URL 길이 / 정규식 크기 제한).
+- InstanceScope 는 IP 목록이 바뀔 때만 새로 만들고, 쿼리 문자열과 instance 라벨("ip:port") → IP 매핑을
+  재사용 (폴링 tick 마다 문자열 split 을 반복하지 않음). 범위 밖 instance 는 버림.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from services.prometheus import instance_ip
+
+METRIC_LABEL = "cmp_metric"
+
+_CPU = '100 - (avg by (instance) (rate(node_cpu_seconds_total{{mode="idle",{m}}}[1m])) * 100)'
+_MEM = 'avg by (instance) ((1 - (node_memory_MemAvailable_bytes{{{m}}} / node_memory_MemTotal_bytes{{{m}}})) * 100)'
+
+
+def instance_matcher(ips: Iterable[str]) -> str:
+    """instance 라벨이 ips 중 하나의 "ip:포트" 인 시리즈만 고르는 matcher (PromQL 정규식은 전체 일치)."""
+    # 정규식의 '.' 은 \. 로, PromQL 문자열 안에서는 다시 \\. 로 이스케이프
+    alternatives = "|".join(ip.replace(".", "\\\\.") for ip in ips)
+    return f'instance=~"({alternatives}):.*"'
+
+
+def usage_query(ips: Iterable[str]) -> str:
+    """ips 의 CPU/메모리 사용률(%)을 cmp_metric="cpu"|"memory" 라벨로 구분해 한 번에 돌려주는 쿼리."""
+    m = instance_matcher(ips)
+    return (
+        f'label_replace({_CPU.format(m=m)}, "{METRIC_LABEL}", "cpu", "", "")'
+        f' or label_replace({_MEM.format(m=m)}, "{METRIC_LABEL}", "memory", "", "")'
+    )
+
+
+class InstanceScope:
+    """조회 대상 IP 집합 + 미리 만든 chunk 쿼리 + instance → IP 인덱스."""
+
+    def __init__(self, ips: Iterable[str], chunk_size: int):
+        self.ips: Tuple[str, ...] = tuple(dict.fromkeys(ip for ip in ips if ip))
+        self._wanted = frozenset(self.ips)
+        size = max(1, chunk_size)
+        self.queries: List[str] = [usage_query(self.ips[i:i + size]) for i in range(0, len(self.ips), size)]
+        self._ip_of: Dict[str, Optional[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.ips)
+
+    def ip_of(self, instance: str) -> Optional[str]:
+        """instance 라벨 → 범위 안의 IP (범위 밖이면 None). 처음 본 라벨만 파싱."""
+        try:
+            return self._ip_of[instance]
+        except KeyError:
+            ip = instance_ip(instance)
+            ip = self._ip_of[instance] = ip if ip in self._wanted else None
+            return ip
+
+    def parse(self, results: List[Dict[str, Any]], metrics_map: Dict[str, Dict[str, float]]) -> None:
+        """usage_query instant 결과 → {ip: {"cpu": .., "memory": ..}} 에 누적."""
+        for res in results:
+            labels = res["metric"]
+            ip = self.ip_of(labels.get("instance", ""))
+            kind = labels.get(METRIC_LABEL)
+            if ip is None or kind is None:
+                continue
+            metrics_map.setdefault(ip, {})[kind] = round(float(res["value"][1]), 1)
+
+    def parse_range(self, results: List[Dict[str, Any]], series_map: Dict[str, Dict[str, Any]]) -> None:
+        """usage_query range 결과 → {ip: {"cpu": (timestamps, values), ...}} 에 누적."""
+        for res in results:
+            labels = res["metric"]
+            ip = self.ip_of(labels.get("instance", ""))
+            kind = labels.get(METRIC_LABEL)
+            if ip is None or kind is None:
+                continue
+            points = res.get("values") or []
+            ts = np.fromiter((p[0] for p in points), dtype=np.float64, count=len(points))
+            values = np.array([p[1] for p in points], dtype=np.float64)  # "NaN" 문자열도 float 로 변환
+            series_map.setdefault(ip, {})[kind] = (ts, values)
@@ -2,10 +2,28 @@
 """
 Provisioning 상태 전이 및 details(JSON) 저장.
 DB 세션은 호출 측에서 주입 (백그라운드 태스크에서는 새 세션 생성).
+로그는 details.logs 대신 append-only provision_logs 테이블에 (project_id, seq) 순서로 적재.
+상태 전이는 projects.status 컬럼과 details.status 를 함께 갱신 (details 를 읽는 history 화면 등과 일치),
+로그만 추가하는 호출은 details 를 다시 쓰지 않음.
+commit 후 상태/로그를 services.events 로 publish (SSE/WebSocket 구독자에게 push).
+COMPLETED 로 리소스가 기록되면 같은 트랜잭션에서 project_resources 행도 씀 (my-resources 조회용).
+같은 트랜잭션에서 데이터 버전(services.data_version)을 올려 폴링 API 의 ETag 를 무효화.
+큐의 job 으로 실행 중이면 commit 직전에 lease 를 확인 (services.lease, 잃었으면 rollback 후 LeaseLost).
 """
+from datetime import datetime
 from typing import Dict, Any, Optional, List
 
+from sqlalchemy import func, insert
+from sqlalchemy.exc import IntegrityError
+
 from config import CONFIG
+from services.events import provision_events
+from services.data_version import data_versions
+from services.lease import check_lease
+from services.resources import replace_project_resources
+
+# 로그 seq 충돌 시 트랜잭션을 다시 시도하는 횟수
+LOG_SEQ_RETRIES = 3
 
 
 def _get_details_copy(project) -> dict:
@@ -16,7 +34,6 @@ def _get_details_copy(project) -> dict:
     return {
         "input": {},
         "status": CONFIG["status_pending"],
-        "logs": [],
         "resources": None,
         "error": None,
         "config": {},
@@ -24,43 +41,151 @@ def _get_details_copy(project) -> dict:
     }
 
 
+def append_provision_logs(db, project_id: int, messages: List[str], log_model, level: str = "INFO") -> int:
+    """
+    로그 라인들을 provision_logs 에 한 번의 배치 INSERT 로 추가 (commit 은 호출 측).
+    seq 는 프로젝트별 1부터 증가; (project_id, seq) 유니크 인덱스로 MAX 조회가 인덱스 한 번.
+    다른 세션이 같은 프로젝트에 동시에 쓰면 IntegrityError → 호출 측은 retry_log_seq_conflict 로 감쌈.
+    마지막 seq 반환 (추가할 게 없으면 현재 마지막 seq).
+    """
+    last_seq = db.query(func.coalesce(func.max(log_model.seq), 0)).filter(
+        log_model.project_id == project_id
+    ).scalar()
+    if not messages:
+        return last_seq
+    now = datetime.now()
+    rows = [
+        {"project_id": project_id, "seq": last_seq + i, "ts": now, "level": level, "message": msg}
+        for i, msg in enumerate(messages, 1)
+    ]
+    db.execute(insert(log_model), rows)
+    return last_seq + len(rows)
+
+
+def retry_log_seq_conflict(db, fn, *args, retries: int = LOG_SEQ_RETRIES):
+    """
+    fn(db, *args) 로 트랜잭션 하나(로그 추가 ~ commit)를 실행. 동시에 같은 프로젝트 로그를 쓴 세션과
+    seq 가 겹쳐 (project_id, seq) 유니크 충돌이 나면 rollback 후 처음부터 다시 실행 (MAX(seq) 를 다시 읽음).
+    fn 은 읽기부터 commit 까지 전부 다시 해야 함 (savepoint 는 pysqlite 에서 바깥 트랜잭션과 섞여 쓰지 않음).
+    """
+    for attempt in range(retries + 1):
+        try:
+            return fn(db, *args)
+        except IntegrityError:
+            db.rollback()
+            if attempt == retries:
+                raise
+
+
+def get_provision_logs(db, project_id: int, log_model, since: int = 0, limit: int = 500) -> List[Dict[str, Any]]:
+    """seq > since 인 로그를 seq 오름차순으로 최대 limit 개."""
+    rows = (
+        db.query(log_model.seq, log_model.ts, log_model.level, log_model.message)
+        .filter(log_model.project_id == project_id, log_model.seq > since)
+        .order_by(log_model.seq)
+        .limit(limit)
+        .all()
+    )
+    return [{"seq": seq, "ts": ts, "level": level, "message": message} for seq, ts, level, message in rows]
+
+
 def update_provision_status(
     db,
     project_id: int,
     status: str,
     project_model,  # ProjectHistory 등 ORM 클래스 (순환 import 방지)
+    log_model=None,  # ProvisionLog ORM 클래스 (logs_append 사용 시 필수)
     logs_append: Optional[List[str]] = None,
     resources: Optional[Dict[str, Any]] = None,
     error: Optional[Dict[str, str]] = None,
     assigned_ip: Optional[str] = None,
+    log_level: str = "INFO",
+    resource_model=None,  # ProjectResource ORM 클래스 (있으면 COMPLETED 리소스를 project_resources 에 기록)
+    data_changed: bool = False,
 ):
     """
-    프로젝트의 provisioning 상태를 갱신하고 details에 반영.
-    - status: PENDING / RUNNING / COMPLETED / FAILED
-    - logs_append: 추가할 로그 라인 리스트 (기존 logs에 append)
-    - resources: 최종 리소스 JSON (alb_ip, web_url, db_vip, ssh_targets 등)
-    - error: 실패 시 { "message": "..." }
+    프로젝트의 provisioning 상태를 갱신.
+    - status: PENDING / RUNNING / COMPLETED / FAILED (바뀌었을 때만 projects.status 와 details.status 를 UPDATE)
+    - logs_append: 추가할 로그 라인 리스트 (provision_logs 에 배치 INSERT)
+    - resources: 최종 리소스 JSON (alb_ip, web_url, db_vip, ssh_targets 등) → details 에 반영
+    - error: 실패 시 { "message": "..." } → details 에 반영
     - assigned_ip: ProjectHistory.assigned_ip 에 쓸 값 (리소스 요약용)
+    - data_changed: 상태 밖의 조회 데이터(VM 점유 등)를 바꾼 직후면 True → 데이터 버전을 올림
+    데이터 버전(폴링 ETag)은 status / assigned_ip / resources / error 가 실제로 바뀔 때만 올림.
+    로그만 추가하는 호출(대부분)은 버전을 건드리지 않으므로 다른 프로젝트의 진행 로그가 304 를 깨지 않음.
     """
-    project = db.query(project_model).filter(project_model.id == project_id).first()
-    if not project:
+    if logs_append and log_model is None:
+        raise ValueError("logs_append 사용 시 log_model 필요")
+    new_logs = retry_log_seq_conflict(
+        db, _write_status, project_id, status, project_model, log_model, logs_append,
+        resources, error, assigned_ip, log_level, resource_model, data_changed,
+    )
+    if new_logs is None:
         return
+    _publish(project_id, status, new_logs, resources, error, assigned_ip)
 
-    details = _get_details_copy(project)
-    details["status"] = status
-    if logs_append is not None:
-        details["logs"] = details.get("logs") or []
-        details["logs"].extend(logs_append)
-    if resources is not None:
-        details["resources"] = resources
-    if error is not None:
-        details["error"] = error
 
-    project.details = details
-    project.status = status
-    if assigned_ip is not None:
-        project.assigned_ip = assigned_ip
+def _write_status(db, project_id, status, project_model, log_model, logs_append, resources, error,
+                  assigned_ip, log_level, resource_model, data_changed) -> Optional[List[Dict[str, Any]]]:
+    """update_provision_status 의 트랜잭션 (읽기 ~ commit). 추가한 로그 반환, 프로젝트가 없으면 None."""
+    current = db.query(project_model.status, project_model.assigned_ip).filter(
+        project_model.id == project_id
+    ).first()
+    if current is None:
+        db.rollback()
+        return None
+    values = {}
+    if current.status != status:
+        values["status"] = status
+    if assigned_ip is not None and current.assigned_ip != assigned_ip:
+        values["assigned_ip"] = assigned_ip
+    if values:
+        db.query(project_model).filter(project_model.id == project_id).update(
+            values, synchronize_session=False
+        )
+
+    new_logs: List[Dict[str, Any]] = []
+    if logs_append:
+        last_seq = append_provision_logs(db, project_id, logs_append, log_model, level=log_level)
+        ts = datetime.now().isoformat()
+        first_seq = last_seq - len(logs_append) + 1
+        new_logs = [
+            {"seq": first_seq + i, "ts": ts, "level": log_level, "message": msg}
+            for i, msg in enumerate(logs_append)
+        ]
+
+    if "status" in values or resources is not None or error is not None:
+        project = db.query(project_model).filter(project_model.id == project_id).first()
+        details = _get_details_copy(project)
+        details["status"] = status
+        if resources is not None:
+            details["resources"] = resources
+        if error is not None:
+            details["error"] = error
+        project.details = details
+        if resources is not None and resource_model is not None and status == CONFIG["status_completed"]:
+            replace_project_resources(db, project, resources, resource_model, status)
+    changed = bool(values) or resources is not None or error is not None or data_changed
+    version = data_versions.bump(db) if changed else None
+    check_lease(db)
     db.commit()
+    data_versions.observe(version)
+    return new_logs
+
+
+def _publish(project_id, status, new_logs, resources, error, assigned_ip) -> None:
+    """commit 된 변경을 구독자에게 전달. 종료 상태면 스트림도 닫힘."""
+    for log in new_logs:
+        provision_events.publish(project_id, "log", log)
+    data: Dict[str, Any] = {"status": status}
+    if assigned_ip is not None:
+        data["assigned_ip"] = assigned_ip
+    if resources is not None:
+        data["resources"] = resources
+    if error is not None:
+        data["error"] = error
+    final = status in (CONFIG["status_completed"], CONFIG["status_failed"])
+    provision_events.publish(project_id, "status", data, final=final)
 
 
 def get_project_details(db, project_id: int, project_model) -> Optional[Dict[str, Any]]:
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+모니터링(my-resources)용 조회.
+VM 목록과 소속 프로젝트 이름을 조인 + 컬럼 프로젝션 한 번으로 가져옴
+(VM 마다 ProjectHistory 를 다시 조회하던 N+1 제거, 큰 details JSON 은 읽지 않음).
+프로젝트 리소스(details.resources 의 alb_ip / web_url / db_vip / ssh_targets)는 COMPLETED 시점에
+project_resources 테이블로 한 번 펼쳐 두고, 조회는 (project_id, seq) 인덱스 순서로 한 번.
+기존 my-resources 와 같이 모든 프로젝트의 리소스를 보여줌 (owner 는 inventory 의 owner_<user> 그룹용).
+ORM 클래스는 호출 측에서 주입 (순환 import 방지).
+"""
+from typing import Dict, Any, List, Optional
+
+from sqlalchemy import delete, insert, select, exists
+from sqlalchemy.exc import IntegrityError
+
+from config import CONFIG
+
+
+def list_user_vms(db, user: str, pool_model, project_model) -> List[Dict[str, Any]]:
+    """
+    user 가 점유 중인 VM 의 (vm_name, ip_address, project_name) 목록.
+    프로젝트가 없거나 삭제된 경우 project_name 은 "Unknown Project".
+    SQL 문 1개: workload_test_pool LEFT JOIN projects (occupy_user, is_used 인덱스 사용)
+    """
+    rows = (
+        db.query(
+            pool_model.vm_name,
+            pool_model.ip_address,
+            project_model.service_name,
+        )
+        .outerjoin(project_model, project_model.id == pool_model.project_id)
+        .filter(pool_model.occupy_user == user, pool_model.is_used == True)
+        .order_by(pool_model.id)
+        .all()
+    )
+    return [
+        {
+            "vm_name": vm_name,
+            "ip_address": ip_address,
+            "project_name": service_name or "Unknown Project",
+        }
+        for vm_name, ip_address, service_name in rows
+    ]
+
+
+def list_occupied_ips(db, pool_model) -> List[str]:
+    """점유 중인 풀 VM 의 IP 목록 (메트릭 폴러가 Prometheus 에 물어볼 범위). is_used 인덱스 사용."""
+    rows = db.execute(
+        select(pool_model.ip_address)
+        .where(pool_model.is_used == True, pool_model.ip_address.isnot(None))
+        .order_by(pool_model.id)
+    ).scalars().all()
+    return list(rows)
+
+
+def resource_rows(project_id: int, project_name: Optional[str], owner: str, resources: Dict[str, Any],
+                  status: str) -> List[Dict[str, Any]]:
+    """details.resources → project_resources 행 목록 (ALB, Web, DB, SSH-1.. 순서, seq 로 보존)."""
+    entries = []
+    if resources.get("alb_ip"):
+        entries.append(("alb", "ALB", resources["alb_ip"], None))
+    if resources.get("web_url"):
+        entries.append(("web", "Web", resources["web_url"], None))
+    if resources.get("db_vip"):
+        entries.append(("db", "DB", resources["db_vip"], None))
+    for i, t in enumerate(resources.get("ssh_targets") or []):
+        host = t.get("host") if isinstance(t, dict) else str(t)
+        if host:
+            entries.append(("ssh", f"SSH-{i + 1}", host, t if isinstance(t, dict) else None))
+    # 표시용 상태: 완료된 프로젝트의 리소스는 Running, 그 외(백필된 진행 중/실패 프로젝트)는 프로젝트 상태
+    shown = "Running" if status == CONFIG["status_completed"] else status
+    return [
+        {
+            "project_id": project_id,
+            "seq": seq,
+            "kind": kind,
+            "name": name,
+            "address": address,
+            "owner": owner,
+            "project_name": project_name or "Unknown Project",
+            "status": shown,
+            "attrs": attrs,
+        }
+        for seq, (kind, name, address, attrs) in enumerate(entries, 1)
+    ]
+
+
+def project_owner(details: Any) -> str:
+    """프로젝트 소유자: 요청 입력의 userName (없으면 admin, ansible runner 의 VM 점유자와 같은 규칙)."""
+    inp = details.get("input") if isinstance(details, dict) else None
+    return (inp or {}).get("userName") or "admin"
+
+
+def replace_project_resources(db, project, resources: Dict[str, Any], resource_model, status: str) -> None:
+    """프로젝트의 리소스 행을 새로 씀 (commit 은 호출 측)."""
+    db.execute(delete(resource_model).where(resource_model.project_id == project.id))
+    rows = resource_rows(project.id, project.service_name, project_owner(project.details), resources, status)
+    if rows:
+        db.execute(insert(resource_model), rows)
+
+
+def list_project_resources(db, resource_model) -> List[Dict[str, Any]]:
+    """
+    모든 프로젝트의 리소스를 my-resources 형식으로 (details.resources 가 있는 프로젝트 전체를 보여주던 기존 범위).
+    SQL 1개 ((project_id, seq) unique 인덱스 순서).
+    """
+    m = resource_model
+    rows = db.execute(
+        select(m.name, m.address, m.project_name, m.status)
+        .order_by(m.project_id, m.seq)
+    ).all()
+    return [
+        {
+            "vm_name": name,
+            "ip_address": address,
+            "project_name": project_name,
+            "cpu_usage": 0,
+            "memory_usage": 0,
+            "status": status,
+        }
+        for name, address, project_name, status in rows
+    ]
+
+
+def backfill_project_resources(db, project_model, resource_model, batch_size: int = 500) -> int:
+    """
+    project_resources 도입 전 프로젝트의 details.resources 를 행으로 옮김 (이미 행이 있는 프로젝트는 건너뜀).
+    id keyset 으로 batch_size 개씩 읽고 배치마다 commit. 옮긴 프로젝트 수 반환.
+    행이 없는 프로젝트만 대상이라 여러 번 실행해도 안전 (중간에 실패했으면 다음 실행이 나머지를 옮김).
+    다른 워커가 같은 배치를 먼저 옮겨 unique 충돌이 나면 그 배치를 다시 읽음 (이미 옮겨진 프로젝트는 빠짐).
+    """
+    p, r = project_model, resource_model
+    moved = 0
+    last_id = 0
+    conflicts = 0
+    while True:
+        projects = db.execute(
+            select(p.id, p.service_name, p.status, p.details)
+            .where(p.id > last_id, p.details.isnot(None))
+            .where(~exists().where(r.project_id == p.id))
+            .order_by(p.id)
+            .limit(batch_size)
+        ).all()
+        if not projects:
+            return moved
+        rows = []
+        batch_moved = 0
+        for project_id, service_name, status, details in projects:
+            res = details.get("resources") if isinstance(details, dict) else None
+            if res:
+                status = status or details.get("status", "")
+                rows.extend(resource_rows(project_id, service_name, project_owner(details), res, status))
+                batch_moved += 1
+        try:
+            if rows:
+                db.execute(insert(r), rows)
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            conflicts += 1
+            if conflicts > 3:
+                raise
+            continue
+        moved += batch_moved
+        last_id = projects[-1][0]
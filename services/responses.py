@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+공통 응답 클래스.
+FastJSONResponse: orjson 이 있으면 직접 직렬화 (datetime 네이티브 지원, 표준 json 대비 수배 빠름),
+없으면 jsonable_encoder + 표준 JSONResponse 로 폴백.
+json_bytes: 같은 규칙의 직렬화만 (캐시해 둘 본문용).
+etag_matches: If-None-Match 헤더 비교 (조건부 GET 304 판단).
+"""
+from typing import Any, Iterable, Optional
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson 미설치 환경
+    orjson = None
+
+
+def json_bytes(content: Any) -> bytes:
+    """FastJSONResponse 와 같은 규칙으로 직렬화 (미리 만들어 캐시해 둘 응답 본문용)."""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+        return super().render(jsonable_encoder(content))
+
+
+def etag_matches(if_none_match: Optional[str], etags: Iterable[str]) -> bool:
+    """If-None-Match 헤더(목록, W/ 접두어, * 허용)가 etags 중 하나와 맞으면 True."""
+    if not if_none_match:
+        return False
+    etags = set(etags)
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == "*" or tag in etags:
+            return True
+    return False
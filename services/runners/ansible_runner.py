@@ -0,0 +1,416 @@
+# -*- coding: utf-8 -*-
+"""
+Ansible Provisioning Runner.
+run_mock_provisioning_async 와 같은 인터페이스로 실제 playbook 을 실행.
+- ansible-playbook 을 asyncio 서브프로세스로 띄우고, jsonl stdout callback 이 한 줄씩 내보내는
+  이벤트를 읽는 즉시 로그로 변환 (전체 출력을 메모리에 모으지 않음).
+- 로그는 하나의 기록 태스크(_LogSink)가 모아서 배치로 provision_logs 에 INSERT.
+- VM 생성 playbook 은 VM 마다 한 프로세스로, configure 단계는 target_vm_names 를 shard 로 나눠
+  동시에 실행 (project 당 ANSIBLE_MAX_PARALLEL 개까지) → 전체 시간 ≈ 가장 느린 VM.
+- 한 프로세스라도 실패하면 나머지를 중단하고 FAILED, 점유한 VM 은 반납.
+테스트는 CONFIG["ansible_playbook_cmd"] (또는 CMP_ANSIBLE_PLAYBOOK) 를
+fake_ansible_playbook.py 로 바꿔서 실행.
+"""
+import asyncio
+import json
+import logging
+import os
+import shlex
+import time
+from collections import deque
+from typing import Dict, Any, List, Optional, Tuple, Callable, Awaitable
+
+from config import CONFIG
+from services.data_version import data_versions
+from services.lease import LeaseLost, check_lease
+from services.provisioner import update_provision_status, append_provision_logs, retry_log_seq_conflict
+from services.runners.mock_runner import _run_db
+from services.telemetry import PROVISION_STEP_SECONDS
+
+logger = logging.getLogger("uvicorn.error")
+
+# playbook(*.yml) 이 있는 저장소 루트
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# 큰 task 결과(JSON 한 줄)도 읽을 수 있게 StreamReader 줄 길이 제한을 넉넉히
+_LINE_LIMIT = 16 * 1024 * 1024
+
+LogFunc = Callable[[str, str], Awaitable[None]]
+
+
+class PlaybookFailed(Exception):
+    """ansible-playbook 이 0 이 아닌 코드로 끝났거나 시간 초과."""
+
+
+# ==========================================
+# 단일 playbook 실행
+# ==========================================
+def playbook_command(playbook: str, extra_vars: Dict[str, Any], inventory: Optional[str] = None) -> List[str]:
+    cmd = shlex.split(os.environ.get("CMP_ANSIBLE_PLAYBOOK") or CONFIG["ansible_playbook_cmd"])
+    cmd.append(playbook if os.path.isabs(playbook) else os.path.join(_ROOT, playbook))
+    cmd += ["-e", json.dumps(extra_vars, ensure_ascii=False)]
+    if inventory:
+        cmd += ["-i", inventory]
+    return cmd
+
+
+def _host_results(event: Dict[str, Any]):
+    for host, result in (event.get("hosts") or {}).items():
+        yield host, result if isinstance(result, dict) else {}
+
+
+def event_to_log(event: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """jsonl callback 이벤트 하나 → [(level, message), ...]. 로그로 남길 필요 없는 이벤트는 []."""
+    kind = event.get("_event", "")
+    if kind == "v2_playbook_on_play_start":
+        return [("INFO", f"PLAY [{(event.get('play') or {}).get('name', '')}]")]
+    if kind == "v2_playbook_on_task_start":
+        return [("INFO", f"TASK [{(event.get('task') or {}).get('name', '')}]")]
+    if kind == "v2_runner_on_ok":
+        return [("INFO", f"{'changed' if r.get('changed') else 'ok'}: [{h}]") for h, r in _host_results(event)]
+    if kind == "v2_runner_on_failed":
+        return [("ERROR", f"failed: [{h}] {r.get('msg', '')}".rstrip()) for h, r in _host_results(event)]
+    if kind == "v2_runner_on_unreachable":
+        return [("ERROR", f"unreachable: [{h}] {r.get('msg', '')}".rstrip()) for h, r in _host_results(event)]
+    if kind == "v2_playbook_on_stats":
+        return [
+            ("INFO", f"RECAP [{h}] " + " ".join(f"{k}={v}" for k, v in sorted(s.items())))
+            for h, s in (event.get("stats") or {}).items()
+        ]
+    return []
+
+
+async def run_playbook(
+    playbook: str,
+    extra_vars: Dict[str, Any],
+    on_log: LogFunc,
+    inventory: Optional[str] = None,
+    label: str = "",
+    timeout: Optional[float] = None,
+) -> None:
+    """
+    ansible-playbook 한 번 실행. stdout 이벤트를 줄 단위로 on_log(level, message) 에 넘김.
+    실패/시간 초과 시 PlaybookFailed. 취소되면 프로세스를 종료시키고 CancelledError 전파.
+    """
+    env = dict(os.environ)
+    env.update({
+        "ANSIBLE_STDOUT_CALLBACK": CONFIG["ansible_stdout_callback"],
+        "ANSIBLE_LOAD_CALLBACK_PLUGINS": "1",
+        "ANSIBLE_NOCOLOR": "1",
+        "ANSIBLE_HOST_KEY_CHECKING": "False",
+        "PYTHONUNBUFFERED": "1",
+    })
+    prefix = f"[{label}] " if label else ""
+    proc = await asyncio.create_subprocess_exec(
+        *playbook_command(playbook, extra_vars, inventory),
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        cwd=_ROOT,
+        env=env,
+        limit=_LINE_LIMIT,
+    )
+    stderr_tail: deque = deque(maxlen=20)
+    started = time.perf_counter()
+
+    async def read_stdout():
+        async for raw in proc.stdout:
+            line = raw.decode("utf-8", errors="replace").strip()
+            if not line:
+                continue
+            try:
+                event = json.loads(line)
+            except ValueError:
+                # callback 이 아닌 출력 (경고 등)
+                await on_log("INFO", prefix + line)
+                continue
+            for level, message in event_to_log(event if isinstance(event, dict) else {}):
+                await on_log(level, prefix + message)
+
+    async def read_stderr():
+        async for raw in proc.stderr:
+            line = raw.decode("utf-8", errors="replace").strip()
+            if line:
+                stderr_tail.append(line)
+
+    async def communicate():
+        await asyncio.gather(read_stdout(), read_stderr())
+        await proc.wait()
+
+    try:
+        await asyncio.wait_for(communicate(), timeout)
+    except asyncio.TimeoutError:
+        raise PlaybookFailed(f"{prefix}{os.path.basename(playbook)} 시간 초과 ({timeout}s)")
+    finally:
+        if proc.returncode is None:
+            proc.terminate()
+            try:
+                await asyncio.wait_for(proc.wait(), 5)
+            except asyncio.TimeoutError:
+                proc.kill()
+                await proc.wait()
+        PROVISION_STEP_SECONDS.labels("ansible", os.path.basename(playbook)).observe(time.perf_counter() - started)
+    if proc.returncode != 0:
+        reason = stderr_tail[-1] if stderr_tail else "see logs"
+        raise PlaybookFailed(f"{prefix}{os.path.basename(playbook)} 실패 (rc={proc.returncode}): {reason}")
+
+
+async def run_all(coros) -> None:
+    """모두 동시에 실행. 하나라도 실패하면 나머지를 취소하고 첫 예외를 다시 올림."""
+    tasks = [asyncio.ensure_future(c) for c in coros]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+async def _bounded(sem: asyncio.Semaphore, coro):
+    async with sem:
+        return await coro
+
+
+# ==========================================
+# 실행 계획 (템플릿 → playbook 단계)
+# ==========================================
+def build_plan(project_id: int, input_spec: Dict[str, Any], vms: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """
+    단계 목록. 각 단계는 동시에 실행할 playbook 실행 목록 [{playbook, extra_vars, inventory, label}].
+    1) VM 생성: VM 마다 템플릿 playbook (+ config.jumphost 면 Windows 점프 호스트)
+    2) config.packages 가 있으면 configure playbook 을 ANSIBLE_SHARD_SIZE 대씩 나눠 실행
+    """
+    config = input_spec.get("config") or {}
+    template = config.get("template", "single")
+    deploy = CONFIG["ansible_template_playbooks"].get(template, CONFIG["ansible_default_playbook"])
+
+    create = [
+        {
+            "playbook": deploy,
+            "extra_vars": {"project_id": project_id, "target_vm_name": vm["vm_name"], "target_vm_ip": vm["ip_address"]},
+            "inventory": None,
+            "label": vm["vm_name"],
+        }
+        for vm in vms
+    ]
+    if config.get("jumphost"):
+        create.append({
+            "playbook": CONFIG["ansible_jumphost_playbook"],
+            "extra_vars": {"project_id": project_id},
+            "inventory": None,
+            "label": "jumphost",
+        })
+    phases = [create]
+
+    packages = config.get("packages") or []
+    if packages and vms:
+        size = max(1, CONFIG["ansible_shard_size"])
+        shards = [vms[i:i + size] for i in range(0, len(vms), size)]
+        phases.append([
+            {
+                "playbook": CONFIG["ansible_configure_playbook"],
+                "extra_vars": {
+                    "project_id": project_id,
+                    "target_vm_names": [vm["vm_name"] for vm in shard],
+                    "target_ip": shard[0]["ip_address"],
+                    "packages_to_install": packages,
+                },
+                # 쉼표로 끝나는 host 목록 = 인라인 inventory
+                "inventory": ",".join(vm["ip_address"] for vm in shard) + ",",
+                "label": f"configure {n + 1}/{len(shards)}",
+            }
+            for n, shard in enumerate(shards)
+        ])
+    return phases
+
+
+async def run_plan(phases: List[List[Dict[str, Any]]], on_log: LogFunc, max_parallel: Optional[int] = None) -> None:
+    """단계는 순서대로, 단계 안의 playbook 들은 최대 max_parallel 개씩 동시에."""
+    sem = asyncio.Semaphore(max_parallel or CONFIG["ansible_max_parallel"])
+    timeout = CONFIG["ansible_playbook_timeout_seconds"]
+    for runs in phases:
+        await run_all(
+            _bounded(sem, run_playbook(r["playbook"], r["extra_vars"], on_log, r["inventory"], r["label"], timeout))
+            for r in runs
+        )
+
+
+# ==========================================
+# DB 로그 기록
+# ==========================================
+class _LogSink:
+    """
+    여러 playbook 프로세스의 로그를 큐로 받아 한 태스크에서 배치로 기록
+    (AsyncSession 은 동시에 쓸 수 없으므로 DB 쓰기는 이 태스크만).
+    같은 level 끼리 flush_lines 줄 또는 flush_seconds 마다 update_provision_status 한 번.
+    """
+
+    def __init__(self, write: Callable[[str, List[str]], Awaitable[None]], flush_lines: int, flush_seconds: float):
+        self._write = write
+        self.flush_lines = flush_lines
+        self.flush_seconds = flush_seconds
+        # 가득 차면 put 이 기다림 → 파이프 읽기가 멈춰 ansible 쪽이 속도를 맞춤
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=10000)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def put(self, level: str, message: str) -> None:
+        await self._queue.put((level, message))
+
+    async def close(self) -> None:
+        """남은 로그를 기록하고 종료."""
+        if self._task is None:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    async def _run(self) -> None:
+        level, batch = "INFO", []
+        while True:
+            try:
+                item = await asyncio.wait_for(self._queue.get(), self.flush_seconds if batch else None)
+            except asyncio.TimeoutError:
+                await self._flush(level, batch)
+                batch = []
+                continue
+            if item is None:
+                await self._flush(level, batch)
+                return
+            if batch and item[0] != level:
+                await self._flush(level, batch)
+                batch = []
+            level = item[0]
+            batch.append(item[1])
+            if len(batch) >= self.flush_lines:
+                await self._flush(level, batch)
+                batch = []
+
+    async def _flush(self, level: str, batch: List[str]) -> None:
+        if not batch:
+            return
+        try:
+            await self._write(level, batch)
+        except Exception as e:
+            logger.error("provisioning 로그 기록 실패 (%d줄): %r", len(batch), e)
+
+
+def _with_session(session_factory, func, *args, **kwargs):
+    db = session_factory()
+    try:
+        return func(db, *args, **kwargs)
+    finally:
+        db.close()
+
+
+def _release_vms(db, allocator, project_id: int) -> int:
+    """lease 를 확인한 뒤 VM 반납 (다른 워커가 job 을 다시 claim 했으면 그 실행의 VM 을 건드리지 않음)."""
+    check_lease(db)
+    released = allocator.release(db, project_id, commit=False)
+    version = data_versions.bump(db) if released else None
+    db.commit()
+    data_versions.observe(version)
+    return released
+
+
+def _resources_from_vms(vms: List[Dict[str, Any]]) -> Dict[str, Any]:
+    first = vms[0]["ip_address"] if vms else ""
+    return {
+        "alb_ip": first,
+        "web_url": f"http://{first}" if first else None,
+        "db_vip": None,
+        "ssh_targets": [{"host": vm["ip_address"], "port": 22, "user": "root"} for vm in vms],
+        "vms": [{"vm_name": vm["vm_name"], "ip_address": vm["ip_address"]} for vm in vms],
+    }
+
+
+# ==========================================
+# Runner (services.scheduler 에서 호출)
+# ==========================================
+async def run_ansible_provisioning_async(project_id: int, input_spec: Dict[str, Any]) -> None:
+    """
+    WorkloadTestPool 에서 템플릿 크기만큼 VM 을 점유하고 playbook 단계를 실행.
+    VM 점유/반납은 동기 세션으로 스레드에서 (할당기의 SQLite 프로세스 락이 이벤트 루프를 막지 않게).
+    """
+    from main import AsyncSessionLocal, SessionLocal, ProjectHistory, ProvisionLog, ProjectResource, vm_allocator
+
+    db = AsyncSessionLocal()
+    vms: List[Dict[str, Any]] = []
+    completed = False
+
+    async def write(level: str, messages: List[str], status: Optional[str] = None, **kwargs) -> None:
+        await _run_db(
+            db, update_provision_status,
+            project_id, status or CONFIG["status_running"],
+            project_model=ProjectHistory,
+            log_model=ProvisionLog,
+            logs_append=messages,
+            log_level=level,
+            resource_model=ProjectResource,
+            **kwargs,
+        )
+
+    try:
+        config = input_spec.get("config") or {}
+        template = config.get("template", "single")
+        count = max(1, CONFIG["template_map"].get(template, 1))
+        user = input_spec.get("userName") or "admin"
+
+        await write("INFO", [f"Allocating {count} VM(s)..."], assigned_ip="")
+        vms = await asyncio.to_thread(_with_session, SessionLocal, vm_allocator.claim, project_id, user, count)
+        # VM 점유는 projects 행을 바꾸지 않으므로 직접 데이터 버전을 올림 (inventory / my-resources)
+        await write("INFO", ["Allocated: " + ", ".join(f"{vm['vm_name']}({vm['ip_address']})" for vm in vms)],
+                    data_changed=True)
+
+        phases = build_plan(project_id, input_spec, vms)
+        sink = _LogSink(write, CONFIG["ansible_log_flush_lines"], CONFIG["ansible_log_flush_seconds"])
+        sink.start()
+        try:
+            await run_plan(phases, sink.put)
+        finally:
+            await sink.close()
+
+        resources = _resources_from_vms(vms)
+        await write("INFO", ["Completed"], status=CONFIG["status_completed"],
+                    resources=resources, assigned_ip=resources["alb_ip"])
+        completed = True
+    except LeaseLost:
+        raise
+    except Exception as e:
+        await write("ERROR", [f"Error: {str(e)}"], status=CONFIG["status_failed"],
+                    error={"message": str(e)}, assigned_ip="")
+    finally:
+        if vms and not completed:
+            release = asyncio.to_thread(_with_session, SessionLocal, _release_vms, vm_allocator, project_id)
+            try:
+                await asyncio.shield(asyncio.ensure_future(release))
+            except LeaseLost as e:
+                logger.warning("VM 반납 생략: %s (project_id=%s)", e, project_id)
+        await db.close()
+
+
+async def run_playbook_for_project(project_id: int, playbook_name: str, extra_vars: Dict[str, Any]) -> None:
+    """playbook 하나를 실행하고 출력 로그를 프로젝트 provisioning 로그로 기록 (상태는 바꾸지 않음)."""
+    from main import AsyncSessionLocal, ProvisionLog
+
+    async with AsyncSessionLocal() as db:
+        async def write(level: str, messages: List[str]) -> None:
+            def append(session):
+                append_provision_logs(session, project_id, messages, ProvisionLog, level=level)
+                check_lease(session)
+                session.commit()
+            await _run_db(db, retry_log_seq_conflict, append)
+
+        sink = _LogSink(write, CONFIG["ansible_log_flush_lines"], CONFIG["ansible_log_flush_seconds"])
+        sink.start()
+        try:
+            await run_playbook(playbook_name, extra_vars, sink.put, label=os.path.basename(playbook_name),
+                               timeout=CONFIG["ansible_playbook_timeout_seconds"])
+        finally:
+            await sink.close()
+
+
+def run_ansible_provisioning_task(project_id: int, input_spec: Dict[str, Any]) -> None:
+    """동기 래퍼 (스크립트/하위 호환용). 앱에서는 services.scheduler 를 사용."""
+    asyncio.run(run_ansible_provisioning_async(project_id, input_spec))
@@ -5,24 +5,20 @@ Mock Provisioning Runner.
 나중에 Real Runner로 교체할 수 있도록 인터페이스 유지.
 """
 import asyncio
-import random
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 from config import CONFIG
+from services.lease import LeaseLost
 from services.provisioner import update_provision_status
+from services.telemetry import StepTimer
 
 
-def _make_mock_resources(service_name: str, project_id: int, template: str) -> Dict[str, Any]:
-    """하드코딩 설정으로 가짜 리소스 dict 생성."""
-    base = CONFIG["mock_ip_base"]
-    second = CONFIG["mock_ip_second"]
+def _make_mock_resources(service_name: str, ips: List[str]) -> Dict[str, Any]:
+    """IPAM 에서 할당받은 ips 와 하드코딩 설정으로 가짜 리소스 dict 생성."""
     slug = (service_name or "svc").replace(" ", "-").lower()[:20]
     web_url = CONFIG["mock_web_url_template"].format(service_slug=slug)
     db_vip = f"db-{slug}{CONFIG['mock_db_vip_suffix']}"
-
-    count = CONFIG["template_map"].get(template, 1)
-    ips = [f"{base}.{second}.{random.randint(1, 254)}" for _ in range(max(1, count))]
-    alb_ip = ips[0] if ips else f"{base}.{second}.1"
+    alb_ip = ips[0] if ips else ""
     ssh_targets = [{"host": ip, "port": 22, "user": "ubuntu"} for ip in ips]
 
     return {
@@ -33,65 +29,113 @@ def _make_mock_resources(service_name: str, project_id: int, template: str) -> D
     }
 
 
+async def _run_db(db, func, *args, **kwargs):
+    """
+    동기 서비스 함수 func(session, ...) 를 AsyncSession 위에서 실행 (run_sync: DB 대기 동안 이벤트 루프 양보).
+    job 이 취소되어도 진행 중인 DB 작업은 끝까지 마친 뒤 취소를 전파 (트랜잭션 도중 세션이 닫히지 않게).
+    """
+    fut = asyncio.ensure_future(db.run_sync(func, *args, **kwargs))
+    try:
+        return await asyncio.shield(fut)
+    except asyncio.CancelledError:
+        await fut
+        raise
+
+
+async def complete_mock_project(db, project_id: int, input_spec: Dict[str, Any]) -> None:
+    """IPAM 할당 + 가짜 리소스로 COMPLETED 기록 (mock / sim runner 공통 마지막 단계)."""
+    from main import ProjectHistory, ProvisionLog, ProjectResource, ipam
+
+    service_name = (input_spec.get("serviceName") or "Service")
+    config = input_spec.get("config") or {}
+    template = config.get("template", "single")
+    # 템플릿 VM 수만큼 IPAM 에서 할당 (풀이 모자라면 IPPoolExhausted → FAILED)
+    count = max(1, CONFIG["template_map"].get(template, 1))
+    ips = await _run_db(db, ipam.allocate, project_id, count)
+    resources = _make_mock_resources(service_name, ips)
+    assigned_ip = resources.get("alb_ip", "")
+
+    await _run_db(
+        db, update_provision_status,
+        project_id, CONFIG["status_completed"],
+        project_model=ProjectHistory,
+        log_model=ProvisionLog,
+        logs_append=[],
+        resources=resources,
+        assigned_ip=assigned_ip,
+        resource_model=ProjectResource,
+    )
+
+
+async def fail_mock_project(db, project_id: int, error: Exception) -> None:
+    """진행 중 트랜잭션을 버리고 할당한 IP 를 반납한 뒤 FAILED 기록 (mock / sim runner 공통)."""
+    from main import ProjectHistory, ProvisionLog, ipam
+
+    await db.rollback()
+    await _run_db(db, ipam.release, project_id, commit=False)
+    await _run_db(
+        db, update_provision_status,
+        project_id, CONFIG["status_failed"],
+        project_model=ProjectHistory,
+        log_model=ProvisionLog,
+        logs_append=[f"Error: {str(error)}"],
+        error={"message": str(error)},
+        assigned_ip="",
+        log_level="ERROR",
+    )
+
+
 async def run_mock_provisioning_async(project_id: int, input_spec: Dict[str, Any]) -> None:
     """
-    비동기 Mock provisioning 실행.
-    DB 갱신을 위해 실행 시점에 main에서 SessionLocal, ProjectHistory 를 import.
+    비동기 Mock provisioning 실행 (services.scheduler 가 앱 이벤트 루프에서 호출).
+    DB 갱신을 위해 실행 시점에 main에서 AsyncSessionLocal, ProjectHistory, ProvisionLog 를 import.
+    DB 호출은 비동기 세션(_run_db)으로 이벤트 루프를 막지 않음.
     """
-    from main import SessionLocal, ProjectHistory
+    from main import AsyncSessionLocal, ProjectHistory, ProvisionLog
 
-    db = SessionLocal()
+    db = AsyncSessionLocal()
+    timer = StepTimer("mock")
     try:
         status_run = CONFIG["status_running"]
-        status_ok = CONFIG["status_completed"]
-        status_fail = CONFIG["status_failed"]
         steps = CONFIG["mock_log_steps"]
         delay = CONFIG["mock_step_delay_seconds"]
 
-        update_provision_status(
-            db, project_id, status_run,
+        timer.step("step-0")
+        await _run_db(
+            db, update_provision_status,
+            project_id, status_run,
             project_model=ProjectHistory,
+            log_model=ProvisionLog,
             logs_append=[steps[0]],
             assigned_ip="",
         )
         await asyncio.sleep(delay)
 
         for i, msg in enumerate(steps[1:], 1):
-            update_provision_status(
-                db, project_id, status_run,
+            timer.step(f"step-{i}")
+            await _run_db(
+                db, update_provision_status,
+                project_id, status_run,
                 project_model=ProjectHistory,
+                log_model=ProvisionLog,
                 logs_append=[msg],
             )
             await asyncio.sleep(delay)
 
-        service_name = (input_spec.get("serviceName") or "Service")
-        config = input_spec.get("config") or {}
-        template = config.get("template", "single")
-        resources = _make_mock_resources(service_name, project_id, template)
-        assigned_ip = resources.get("alb_ip", "")
-
-        update_provision_status(
-            db, project_id, status_ok,
-            project_model=ProjectHistory,
-            logs_append=[],
-            resources=resources,
-            assigned_ip=assigned_ip,
-        )
+        timer.step("complete")
+        await complete_mock_project(db, project_id, input_spec)
+        timer.finish()
+    except LeaseLost:
+        raise  # 다른 워커가 job 을 가져감: FAILED 도 기록하지 않음
     except Exception as e:
-        update_provision_status(
-            db, project_id, CONFIG["status_failed"],
-            project_model=ProjectHistory,
-            logs_append=[f"Error: {str(e)}"],
-            error={"message": str(e)},
-            assigned_ip="",
-        )
+        await fail_mock_project(db, project_id, e)
     finally:
-        db.close()
+        await db.close()
 
 
 def run_mock_provisioning_task(project_id: int, input_spec: Dict[str, Any]) -> None:
     """
-    동기 래퍼: FastAPI BackgroundTasks 에서 호출.
+    동기 래퍼 (스크립트/하위 호환용). 앱에서는 services.scheduler 를 사용.
     asyncio.run 으로 비동기 Mock 실행.
     """
     asyncio.run(run_mock_provisioning_async(project_id, input_spec))
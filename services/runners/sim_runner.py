@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+"""
+Simulation Provisioning Runner (CONFIG["provision_runner"] = "sim").
+Mock runner 와 같은 DB 부작용(RUNNING 전이, provision_logs, IPAM 할당, resources/project_resources, FAILED 경로)을 내되
+단계 대기를 가상 시계로 압축해 수천~수만 건의 provisioning 폭주를 실제 영속 계층에 대해 몇 분 안에 재현.
+- 가상 시계 (SimClock)
+  - scaled: 가상 d초 = 실제 d / SIM_TIME_SCALE 초. job 사이 interleaving 은 비율 그대로 유지.
+  - discrete: 이산 사건 방식. 실행 중인 sim job 이 모두 가상 sleep 에서 기다리면(DB 작업 중인 job 이 없으면)
+    가장 이른 깨어날 시각으로 가상 시간을 바로 넘김 → 실제 대기 없이 가상 시각 순서대로 진행.
+    스케줄러 대기열/lease 대기는 실제 시간이라 가상 시간에 포함되지 않음.
+- 단계 프로파일 (SIM_STEP_PROFILES): 템플릿별 단계 목록 (없으면 "default").
+  단계마다 message, latency(분포), fail_rate, per_vm (VM 마다 지연을 뽑아 가장 느린 VM 까지 대기)
+- 지연 분포: 숫자(고정) 또는 {"dist": "fixed|uniform|normal|lognormal|exponential", ..., "max": 상한}
+- 실패 주입: 단계 fail_rate 와 전역 SIM_FAILURE_RATE 를 단계마다 적용. 걸리면 단계 도중 SimulatedFailure → FAILED 경로
+- 난수는 (SIM_SEED, project_id) 로 job 마다 따로 → interleaving 과 무관하게 같은 지연/실패가 재현됨
+"""
+import asyncio
+import heapq
+import itertools
+import math
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+from config import CONFIG
+from services.lease import LeaseLost
+from services.provisioner import update_provision_status
+from services.runners.mock_runner import _run_db, complete_mock_project, fail_mock_project
+from services.telemetry import StepTimer
+
+
+class SimulatedFailure(Exception):
+    """SIM_FAILURE_RATE / 단계 fail_rate 로 주입된 실패."""
+
+
+def sample_latency(spec: Any, rng: random.Random) -> float:
+    """지연 분포 spec 에서 가상 초 하나를 뽑음 (음수는 0)."""
+    if spec is None:
+        return 0.0
+    if isinstance(spec, (int, float)):
+        return max(0.0, float(spec))
+    dist = spec.get("dist", "fixed")
+    if dist == "fixed":
+        value = spec.get("value", 0.0)
+    elif dist == "uniform":
+        value = rng.uniform(spec["low"], spec["high"])
+    elif dist == "normal":
+        value = rng.gauss(spec["mean"], spec["stddev"])
+    elif dist == "lognormal":
+        value = rng.lognormvariate(math.log(spec["median"]), spec["sigma"])
+    elif dist == "exponential":
+        value = rng.expovariate(1.0 / spec["mean"])
+    else:
+        raise ValueError(f"unknown latency dist: {dist}")
+    if "max" in spec:
+        value = min(value, spec["max"])
+    return max(0.0, float(value))
+
+
+def step_profile(template: str) -> List[Dict[str, Any]]:
+    profiles = CONFIG["sim_step_profiles"]
+    return profiles.get(template) or profiles["default"]
+
+
+class SimClock:
+    """sim job 들이 공유하는 가상 시계. now() 는 가상 epoch 초."""
+
+    def __init__(self, mode: str = "scaled", time_scale: float = 60.0, settle_ticks: int = 3):
+        self.configure(mode, time_scale)
+        self.settle_ticks = settle_ticks
+
+    def configure(self, mode: str, time_scale: float) -> None:
+        if mode not in ("scaled", "discrete"):
+            raise ValueError(f"unknown sim clock mode: {mode}")
+        self.mode = mode
+        self.time_scale = max(float(time_scale), 1e-9)
+        self._origin_real = time.monotonic()
+        self._origin_virtual = time.time()
+        self._now = self._origin_virtual
+        self._heap: List[tuple] = []
+        self._seq = itertools.count()
+        self._active = 0
+        self._advancer: Optional[asyncio.Task] = None
+
+    def now(self) -> float:
+        if self.mode == "discrete":
+            return self._now
+        return self._origin_virtual + (time.monotonic() - self._origin_real) * self.time_scale
+
+    def elapsed(self) -> float:
+        """시계를 만든(configure) 뒤 흐른 가상 초."""
+        return self.now() - self._origin_virtual
+
+    @asynccontextmanager
+    async def job(self):
+        """sim job 실행 구간 (discrete: 가상 sleep 밖에 있는 job 이 하나라도 있으면 시간을 넘기지 않음)."""
+        self._active += 1
+        try:
+            yield
+        finally:
+            self._active -= 1
+            self._kick()
+
+    async def sleep(self, seconds: float) -> None:
+        if seconds <= 0:
+            await asyncio.sleep(0)
+            return
+        if self.mode != "discrete":
+            await asyncio.sleep(seconds / self.time_scale)
+            return
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._heap, (self._now + seconds, next(self._seq), fut))
+        self._active -= 1
+        self._kick()
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.cancelled():  # 깨우기 전에 취소됨 (깨운 경우 _advance 가 이미 active 를 올림)
+                self._active += 1
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "time_scale": self.time_scale,
+            "virtual_elapsed_seconds": round(self.elapsed(), 3),
+            "active_jobs": self._active,
+            "pending_wakeups": len(self._heap),
+        }
+
+    # ---------- discrete ----------
+    def _kick(self) -> None:
+        if self.mode == "discrete" and self._heap and (self._advancer is None or self._advancer.done()):
+            self._advancer = asyncio.ensure_future(self._advance_loop())
+
+    async def _advance_loop(self) -> None:
+        while self._heap:
+            # 방금 깨운 job / 새로 시작한 job 이 실행될 기회를 몇 tick 줌
+            for _ in range(self.settle_ticks):
+                await asyncio.sleep(0)
+            if self._active > 0:
+                return  # 다음 sleep/job 종료 때 다시 _kick
+            self._advance()
+
+    def _advance(self) -> None:
+        """가장 이른 깨어날 시각으로 이동해 그 시각의 sleep 을 모두 깨움."""
+        while self._heap and self._heap[0][2].done():
+            heapq.heappop(self._heap)
+        if not self._heap:
+            return
+        at = self._heap[0][0]
+        self._now = max(self._now, at)
+        while self._heap and self._heap[0][0] <= at:
+            _, _, fut = heapq.heappop(self._heap)
+            if not fut.done():
+                self._active += 1
+                fut.set_result(None)
+
+
+class SimStats:
+    """sim job 결과 집계 (가상 소요 시간 기준)."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.started = 0
+        self.outcomes: Dict[str, int] = {}
+        self.failed_steps: Dict[str, int] = {}
+        self._durations: List[float] = []
+
+    def record(self, outcome: str, virtual_seconds: float, failed_step: Optional[str] = None) -> None:
+        self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+        if failed_step is not None:
+            self.failed_steps[failed_step] = self.failed_steps.get(failed_step, 0) + 1
+        self._durations.append(virtual_seconds)
+
+    def summary(self) -> Dict[str, Any]:
+        d = sorted(self._durations)
+
+        def pct(p: float) -> float:
+            return round(d[min(len(d) - 1, int(p * len(d)))], 3) if d else 0.0
+
+        return {
+            "started": self.started,
+            "outcomes": dict(self.outcomes),
+            "failed_steps": dict(self.failed_steps),
+            "virtual_duration_seconds": {"p50": pct(0.5), "p95": pct(0.95), "max": round(d[-1], 3) if d else 0.0},
+        }
+
+
+sim_clock = SimClock(CONFIG["sim_clock_mode"], CONFIG["sim_time_scale"])
+sim_stats = SimStats()
+
+
+async def run_sim_provisioning_async(project_id: int, input_spec: Dict[str, Any]) -> None:
+    """
+    가상 시계 위의 Mock provisioning (services.scheduler 가 호출, 인터페이스는 mock runner 와 같음).
+    단계 로그/상태 전이 → (실패 주입 시 FAILED) → IPAM 할당 + COMPLETED 는 mock runner 의 공통 함수 사용.
+    """
+    from main import AsyncSessionLocal, ProjectHistory, ProvisionLog
+
+    config = input_spec.get("config") or {}
+    template = config.get("template", "single")
+    steps = step_profile(template)
+    vm_count = max(1, CONFIG["template_map"].get(template, 1))
+    rng = random.Random(f"{CONFIG['sim_seed']}:{project_id}")
+    global_fail = CONFIG["sim_failure_rate"]
+
+    db = AsyncSessionLocal()
+    timer = StepTimer("sim")
+    sim_stats.started += 1
+    started = sim_clock.now()
+    current = None
+    try:
+        async with sim_clock.job():
+            for i, step in enumerate(steps):
+                current = step["message"]
+                timer.step(f"step-{i}")
+                await _run_db(
+                    db, update_provision_status,
+                    project_id, CONFIG["status_running"],
+                    project_model=ProjectHistory,
+                    log_model=ProvisionLog,
+                    logs_append=[step["message"]],
+                    **({"assigned_ip": ""} if i == 0 else {}),
+                )
+                if step.get("per_vm"):
+                    delay = max(sample_latency(step.get("latency"), rng) for _ in range(vm_count))
+                else:
+                    delay = sample_latency(step.get("latency"), rng)
+                fail_rate = 1.0 - (1.0 - step.get("fail_rate", 0.0)) * (1.0 - global_fail)
+                if rng.random() < fail_rate:
+                    await sim_clock.sleep(delay * rng.random())
+                    raise SimulatedFailure(f"{step['message']} failed (simulated)")
+                await sim_clock.sleep(delay)
+
+            current = None
+            timer.step("complete")
+            await complete_mock_project(db, project_id, input_spec)
+            timer.finish()
+        sim_stats.record("completed", sim_clock.now() - started)
+    except LeaseLost:
+        raise
+    except Exception as e:
+        sim_stats.record("failed", sim_clock.now() - started, failed_step=current or "complete")
+        await fail_mock_project(db, project_id, e)
+    finally:
+        await db.close()
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+Provisioning 스케줄러.
+BackgroundTasks 스레드풀에서 asyncio.run 으로 job 마다 이벤트 루프를 새로 만들던 방식 대신
+앱 이벤트 루프 위에서 작업 큐 + 동시 실행 제한으로 runner 코루틴을 실행.
+- 전역 동시 실행 수 + 템플릿별(TEMPLATE_MAP 키) 동시 실행 수 제한
+- 우선순위 (priority 값이 클수록 먼저), 같은 우선순위는 제출 순서
+- 취소: 대기 중이면 큐에서 제거, 실행 중이면 task.cancel()
+- 큐 길이/대기 시간 조회 (stats)
+- on_finish(project_id, outcome) 훅: job 종료 시 호출 (outcome: done / cancelled / error / lost)
+- submit(lease=...) 로 받은 job lease(services.lease)는 job task 의 contextvar 로 두어 runner 의 DB 쓰기를 fencing.
+  쓰기가 LeaseLost 로 거부되면 outcome "lost" (다른 워커가 job 을 가져감).
+runner 는 기존 인터페이스 그대로: async def runner(project_id, input_spec) -> None
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import deque
+from typing import Dict, Any, Optional, Callable, Awaitable, List
+
+from config import CONFIG
+from services.lease import Lease, LeaseLost, bind_lease
+from services.runners.mock_runner import run_mock_provisioning_async
+from services.telemetry import PROVISION_JOB_SECONDS
+
+logger = logging.getLogger("uvicorn.error")
+
+Runner = Callable[[int, Dict[str, Any]], Awaitable[None]]
+
+
+class ProvisionJob:
+    __slots__ = ("project_id", "input_spec", "template", "priority", "lease", "enqueued_at", "started_at", "task", "cancelled")
+
+    def __init__(self, project_id: int, input_spec: Dict[str, Any], template: str, priority: int,
+                 lease: Optional[Lease] = None):
+        self.project_id = project_id
+        self.input_spec = input_spec
+        self.template = template
+        self.priority = priority
+        self.lease = lease
+        self.enqueued_at = time.monotonic()
+        self.started_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        self.cancelled = False
+
+
+class ProvisioningScheduler:
+    def __init__(
+        self,
+        runner: Runner,
+        max_concurrency: int,
+        template_limits: Dict[str, int],
+        default_template_limit: int,
+    ):
+        self.runner = runner
+        self.max_concurrency = max_concurrency
+        self.template_limits = dict(template_limits)
+        self.default_template_limit = default_template_limit
+        self._heap: List[tuple] = []
+        self._seq = itertools.count()
+        self._queued: Dict[int, ProvisionJob] = {}
+        self._running: Dict[int, ProvisionJob] = {}
+        self._running_by_template: Dict[str, int] = {}
+        self._recent_waits: deque = deque(maxlen=200)
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self.on_finish: Optional[Callable[[int, str], Awaitable[None]]] = None
+
+    # ---------- lifecycle ----------
+    async def start(self) -> None:
+        if self._dispatcher is None:
+            self._wakeup = asyncio.Event()
+            self._dispatcher = asyncio.create_task(self._dispatch_loop())
+            if self._heap:
+                self._wakeup.set()
+
+    async def stop(self) -> None:
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            try:
+                await self._dispatcher
+            except asyncio.CancelledError:
+                pass
+            self._dispatcher = None
+        tasks = [job.task for job in self._running.values() if job.task is not None]
+        for t in tasks:
+            t.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        # 시작 못 한 job 도 on_finish 로 알려 lease 를 반납하게 함
+        for project_id in list(self._queued):
+            job = self._queued.pop(project_id)
+            job.cancelled = True
+            if self.on_finish is not None:
+                await self.on_finish(project_id, "cancelled")
+        self._heap.clear()
+
+    # ---------- public API ----------
+    def submit(self, project_id: int, input_spec: Dict[str, Any], template: str = "single", priority: int = 0,
+               lease: Optional[Lease] = None) -> ProvisionJob:
+        job = ProvisionJob(project_id, input_spec, template, priority, lease)
+        self._queued[project_id] = job
+        heapq.heappush(self._heap, (-priority, next(self._seq), job))
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job
+
+    def cancel(self, project_id: int) -> bool:
+        """대기 중이면 큐에서 제외, 실행 중이면 task 취소. 해당 job 이 없으면 False."""
+        job = self._queued.pop(project_id, None)
+        if job is not None:
+            job.cancelled = True  # heap 에서는 dispatch 시 건너뜀
+            if self.on_finish is not None:
+                asyncio.ensure_future(self.on_finish(project_id, "cancelled"))
+            return True
+        job = self._running.get(project_id)
+        if job is not None and job.task is not None:
+            job.cancelled = True
+            job.task.cancel()
+            return True
+        return False
+
+    def has_job(self, project_id: int) -> bool:
+        """이 프로세스에서 대기/실행 중인 job 인지 (이벤트 스트림이 push 를 기다릴지 DB 를 폴링할지 판단)."""
+        return project_id in self._queued or project_id in self._running
+
+    def free_slots(self) -> int:
+        """더 받아도 바로(또는 곧) 실행 가능한 job 수 (전역 한도 - 실행 중 - 대기 중)."""
+        return self.max_concurrency - len(self._running) - len(self._queued)
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        queued = list(self._queued.values())
+        waits = list(self._recent_waits)
+        queued_by_template: Dict[str, int] = {}
+        for job in queued:
+            queued_by_template[job.template] = queued_by_template.get(job.template, 0) + 1
+        return {
+            "max_concurrency": self.max_concurrency,
+            "queue_depth": len(queued),
+            "running": len(self._running),
+            "queued_by_template": queued_by_template,
+            "running_by_template": {k: v for k, v in self._running_by_template.items() if v},
+            "template_limits": self.template_limits,
+            "oldest_wait_seconds": round(max((now - j.enqueued_at for j in queued), default=0.0), 3),
+            "avg_wait_seconds": round(sum(waits) / len(waits), 3) if waits else 0.0,
+            "max_wait_seconds": round(max(waits), 3) if waits else 0.0,
+        }
+
+    # ---------- internals ----------
+    def _template_limit(self, template: str) -> int:
+        return self.template_limits.get(template, self.default_template_limit)
+
+    def _pick_next(self) -> Optional[ProvisionJob]:
+        """템플릿 여유가 있는 가장 높은 우선순위 job. 막힌 템플릿 job 은 건너뛰고 다시 넣음."""
+        skipped = []
+        picked = None
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            job = entry[2]
+            if job.cancelled or self._queued.get(job.project_id) is not job:
+                continue
+            if self._running_by_template.get(job.template, 0) >= self._template_limit(job.template):
+                skipped.append(entry)
+                continue
+            picked = job
+            break
+        for entry in skipped:
+            heapq.heappush(self._heap, entry)
+        return picked
+
+    async def _dispatch_loop(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while len(self._running) < self.max_concurrency:
+                job = self._pick_next()
+                if job is None:
+                    break
+                self._start(job)
+
+    def _start(self, job: ProvisionJob) -> None:
+        del self._queued[job.project_id]
+        job.started_at = time.monotonic()
+        self._recent_waits.append(job.started_at - job.enqueued_at)
+        self._running[job.project_id] = job
+        self._running_by_template[job.template] = self._running_by_template.get(job.template, 0) + 1
+        job.task = asyncio.create_task(self._run(job))
+
+    async def _run(self, job: ProvisionJob) -> None:
+        outcome = "done"
+        bind_lease(job.lease)  # 이 task(와 task 가 넘기는 스레드/run_sync)에서만 보임
+        try:
+            await self.runner(job.project_id, job.input_spec)
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            logger.info("provisioning job 취소됨 (project_id=%s)", job.project_id)
+        except LeaseLost as e:
+            outcome = "lost"
+            logger.warning("provisioning job 중단: %s (project_id=%s)", e, job.project_id)
+        except Exception as e:
+            outcome = "error"
+            logger.error("provisioning job 실패 (project_id=%s): %r", job.project_id, e)
+        finally:
+            PROVISION_JOB_SECONDS.labels(job.template, outcome).observe(time.monotonic() - job.started_at)
+            self._running.pop(job.project_id, None)
+            self._running_by_template[job.template] -= 1
+            if self._wakeup is not None:
+                self._wakeup.set()
+        if self.on_finish is not None:
+            try:
+                await self.on_finish(job.project_id, outcome)
+            except Exception as e:
+                logger.error("on_finish 처리 실패 (project_id=%s): %r", job.project_id, e)
+
+
+def _configured_runner() -> Runner:
+    """CONFIG["provision_runner"]: "ansible" 이면 실제 playbook 실행, "sim" 이면 가상 시계 Mock, 그 외 Mock."""
+    if CONFIG["provision_runner"] == "ansible":
+        from services.runners.ansible_runner import run_ansible_provisioning_async
+        return run_ansible_provisioning_async
+    if CONFIG["provision_runner"] == "sim":
+        from services.runners.sim_runner import run_sim_provisioning_async
+        return run_sim_provisioning_async
+    return run_mock_provisioning_async
+
+
+provision_scheduler = ProvisioningScheduler(
+    runner=_configured_runner(),
+    max_concurrency=CONFIG["provision_max_concurrency"],
+    template_limits=CONFIG["provision_template_concurrency"],
+    default_template_limit=CONFIG["provision_default_template_concurrency"],
+)
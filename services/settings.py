@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+SystemSetting(settings 테이블, 단일 행) 인메모리 캐시.
+- 읽기(로그인 비밀번호, 점검 모드/공지, 관리자 확인)는 캐시된 스냅샷만 보고 DB 를 치지 않음.
+- 변경은 update() 로만: 같은 UPDATE 에서 version 을 1 올리고 로컬 캐시를 즉시 교체.
+- 다른 워커/프로세스의 변경은 백그라운드 루프가 check_interval 마다 version 한 컬럼만 읽어 감지,
+  달라졌을 때만 행 전체를 다시 읽음.
+- DB 교체(SQLite 폴백 → PostgreSQL 복귀) 시 invalidate() 로 다음 읽기에서 다시 로드.
+ORM 클래스/세션 팩토리는 생성 시 주입 (순환 import 방지).
+"""
+import asyncio
+import logging
+from types import MappingProxyType
+from typing import Dict, Any, Mapping, Optional
+
+from sqlalchemy import select, update, insert, func
+
+logger = logging.getLogger("uvicorn.error")
+
+
+class SettingsCache:
+    def __init__(self, setting_model, session_factory, check_interval: float):
+        self.setting_model = setting_model
+        self.session_factory = session_factory  # AsyncSession 팩토리
+        self.check_interval = check_interval
+        self._snapshot: Optional[Mapping[str, Any]] = None
+        self._version: Optional[int] = None
+        self._inflight: Optional[asyncio.Future] = None
+        self._task: Optional[asyncio.Task] = None
+        # 행이 없을 때 쓰는 값: 모델 컬럼의 (상수) 기본값
+        self._defaults = {
+            c.name: (c.default.arg if c.default is not None and not callable(c.default.arg) else None)
+            for c in setting_model.__table__.columns
+        }
+
+    # ---------- lifecycle ----------
+    async def start(self) -> None:
+        try:
+            await self.reload()
+        except Exception as e:
+            logger.warning("⚠️ 설정 로드 실패 (요청 시 재시도): %r", e)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_interval)
+            try:
+                await self._check_version()
+            except Exception as e:
+                logger.warning("⚠️ 설정 version 확인 실패: %r", e)
+
+    # ---------- 읽기 ----------
+    async def get(self) -> Mapping[str, Any]:
+        """현재 설정 (읽기 전용 매핑). 캐시가 비었을 때만 DB 조회 (동시 요청은 한 번의 로드를 공유)."""
+        snap = self._snapshot
+        if snap is not None:
+            return snap
+        return await self.reload()
+
+    def invalidate(self) -> None:
+        """다음 get() 에서 다시 로드 (스레드에서 호출해도 됨)."""
+        self._snapshot = None
+        self._version = None
+
+    async def reload(self) -> Mapping[str, Any]:
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._load())
+            self._inflight.add_done_callback(self._clear_inflight)
+        return await asyncio.shield(self._inflight)
+
+    def _clear_inflight(self, fut: asyncio.Future) -> None:
+        if self._inflight is fut:
+            self._inflight = None
+
+    async def _load(self) -> Mapping[str, Any]:
+        async with self.session_factory() as db:
+            row = (await db.execute(select(self.setting_model).order_by(self.setting_model.id).limit(1))).scalar()
+        return self._install(self._row_to_dict(row) if row is not None else None)
+
+    async def _check_version(self) -> None:
+        m = self.setting_model
+        async with self.session_factory() as db:
+            version = (await db.execute(select(m.version).order_by(m.id).limit(1))).scalar()
+        if version != self._version:
+            logger.info("설정 변경 감지 (version %s → %s), 다시 로드", self._version, version)
+            await self.reload()
+
+    def _row_to_dict(self, row) -> Dict[str, Any]:
+        return {c.name: getattr(row, c.name) for c in self.setting_model.__table__.columns}
+
+    def _install(self, values: Optional[Dict[str, Any]]) -> Mapping[str, Any]:
+        merged = dict(self._defaults)
+        if values:
+            merged.update(values)
+        self._version = values.get("version") if values else None
+        self._snapshot = MappingProxyType(merged)
+        return self._snapshot
+
+    # ---------- 변경 ----------
+    async def update(self, db, values: Dict[str, Any]) -> Mapping[str, Any]:
+        """
+        설정 행을 갱신(없으면 생성)하고 version 을 올린 뒤 로컬 캐시를 교체.
+        다른 워커는 다음 version 확인 때 반영.
+        """
+        m = self.setting_model
+        columns = list(m.__table__.columns)
+        row = (await db.execute(
+            update(m)
+            .where(m.id == select(m.id).order_by(m.id).limit(1).scalar_subquery())
+            .values(**values, version=func.coalesce(m.version, 0) + 1)
+            .returning(*columns)
+        )).first()
+        if row is None:
+            row = (await db.execute(insert(m).values(**values, version=1).returning(*columns))).first()
+        await db.commit()
+        return self._install(dict(zip([c.name for c in columns], row)))
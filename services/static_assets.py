@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+UI 템플릿(templates/*.html) 정적 제공.
+- 시작 시 한 번 읽어서 메모리에 보관하고 gzip / brotli(설치된 경우) 변형과 strong ETag 를 미리 계산.
+  요청마다 디스크를 읽거나 압축하지 않음.
+- Accept-Encoding 에 맞는 변형을 골라 보내고 (br > gzip > 원본), If-None-Match 가 맞으면 304.
+- reload=True (개발용) 이면 요청 때 파일 mtime 을 확인해 바뀐 파일만 다시 읽음.
+- 페이지 라우트(/, /history 등)는 no-cache (매번 ETag 재검증 → 보통 304),
+  /templates 마운트는 긴 max-age.
+"""
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import threading
+from typing import Dict, Optional
+
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+
+from services.responses import etag_matches
+
+try:
+    import brotli
+except ImportError:  # 선택 의존성: 없으면 gzip 만
+    brotli = None
+
+logger = logging.getLogger("uvicorn.error")
+
+PAGE_CACHE_CONTROL = "no-cache"
+
+
+class Asset:
+    __slots__ = ("path", "mtime", "media_type", "variants")
+
+    def __init__(self, path: str, mtime: float, body: bytes):
+        self.path = path
+        self.mtime = mtime
+        self.media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        digest = hashlib.sha256(body).hexdigest()[:20]
+        # encoding -> (body, 표현별 strong ETag). 압축본이 원본보다 작을 때만 보관
+        self.variants: Dict[str, tuple] = {"identity": (body, f'"{digest}"')}
+        gz = gzip.compress(body, compresslevel=9, mtime=0)
+        if len(gz) < len(body):
+            self.variants["gzip"] = (gz, f'"{digest}-gz"')
+        if brotli is not None:
+            br = brotli.compress(body, quality=11)
+            if len(br) < len(body):
+                self.variants["br"] = (br, f'"{digest}-br"')
+
+    def etags(self):
+        return {etag for _, etag in self.variants.values()}
+
+
+def _accepted_encodings(header: str):
+    """Accept-Encoding → q>0 인 인코딩 이름 집합."""
+    accepted = set()
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if q > 0:
+            accepted.add(name)
+    return accepted
+
+
+class AssetStore:
+    def __init__(self, directory: str, reload: bool = False):
+        self.directory = directory
+        self.reload = reload
+        self._assets: Dict[str, Asset] = {}
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        """디렉터리의 파일을 전부 읽어 압축 변형까지 준비 (lifespan 에서 스레드로 호출)."""
+        count = 0
+        for root, _, files in os.walk(self.directory):
+            for filename in files:
+                rel = os.path.relpath(os.path.join(root, filename), self.directory).replace(os.sep, "/")
+                if self._load_one(rel) is not None:
+                    count += 1
+        logger.info("템플릿 %d개 로드 (brotli=%s)", count, brotli is not None)
+
+    def _load_one(self, name: str) -> Optional[Asset]:
+        path = os.path.join(self.directory, name)
+        try:
+            mtime = os.stat(path).st_mtime
+            with open(path, "rb") as f:
+                body = f.read()
+        except OSError:
+            return None
+        asset = Asset(path, mtime, body)
+        with self._lock:
+            self._assets[name] = asset
+        return asset
+
+    def get(self, name: str) -> Optional[Asset]:
+        asset = self._assets.get(name)
+        if asset is None:
+            # load() 전(lifespan 없이 쓰는 경우) 또는 새 파일
+            if os.path.normpath(name).startswith(("..", "/")):
+                return None
+            return self._load_one(name)
+        if self.reload:
+            try:
+                if os.stat(asset.path).st_mtime != asset.mtime:
+                    asset = self._load_one(name) or asset
+            except OSError:
+                return None
+        return asset
+
+    def response(self, name: str, headers, cache_control: str = PAGE_CACHE_CONTROL) -> Optional[Response]:
+        """요청 헤더에 맞는 Response (200 / 304). 없는 파일이면 None."""
+        asset = self.get(name)
+        if asset is None:
+            return None
+        accepted = _accepted_encodings(headers.get("accept-encoding", ""))
+        encoding = next((e for e in ("br", "gzip") if e in accepted and e in asset.variants), "identity")
+        body, etag = asset.variants[encoding]
+        out_headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+
+        if_none_match = headers.get("if-none-match")
+        # 같은 내용의 다른 인코딩 ETag 도 유효 (캐시가 다른 변형을 갖고 있어도 재전송 불필요)
+        if etag_matches(if_none_match, asset.etags()):
+            return Response(status_code=304, headers=out_headers)
+        if encoding != "identity":
+            out_headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type=asset.media_type, headers=out_headers)
+
+
+class CachedStaticFiles(StaticFiles):
+    """/templates 마운트: AssetStore 에 있는 파일은 압축/ETag 로, 긴 Cache-Control 과 함께 제공."""
+
+    def __init__(self, *, store: AssetStore, max_age: int, **kwargs):
+        super().__init__(directory=store.directory, **kwargs)
+        self.store = store
+        self.cache_control = f"public, max-age={max_age}"
+
+    async def get_response(self, path: str, scope) -> Response:
+        if scope["method"] in ("GET", "HEAD"):
+            resp = self.store.response(path, Headers(scope=scope), cache_control=self.cache_control)
+            if resp is not None:
+                return resp
+        resp = await super().get_response(path, scope)
+        resp.headers.setdefault("Cache-Control", self.cache_control)
+        return resp
@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""
+백엔드 자체 계측 (/metrics, Prometheus text format).
+- HTTP: 라우트 템플릿(/api/provision/{project_id}) 단위 지연 histogram. 순수 ASGI 미들웨어라
+  요청당 비용은 perf_counter 두 번 + observe 한 번.
+- DB: 엔진마다 SQLAlchemy 이벤트로 SQL 문 종류(SELECT/INSERT/...)별 실행 수·지연, 에러 수,
+  풀 checkout 대기 시간. 풀 크기/사용 중/overflow 는 scrape 시점에 읽음 (hot path 비용 없음).
+- Provisioning: 스케줄러 대기열 깊이/실행 수(scrape 시점), runner 단계별 소요 시간, job 전체 소요 시간.
+- Prometheus 클라이언트: 엔드포인트별 호출 지연과 실패 사유별 수.
+- SQLite 폴백 여부 (cmp_db_fallback).
+값은 프로세스 단위 (uvicorn 워커가 여러 개면 워커마다 따로 집계됨).
+scrape 시점에 읽는 값은 bind_* 로 대상 객체를 주입 (순환 import 방지).
+"""
+import time
+import weakref
+from typing import Optional
+
+from prometheus_client import CollectorRegistry, Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import ProcessCollector, PlatformCollector
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+registry = CollectorRegistry(auto_describe=True)
+ProcessCollector(registry=registry)
+PlatformCollector(registry=registry)
+
+# 초 단위 bucket: 빠른 API(ms)부터 느린 스트림/쿼리까지
+_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+_STEP_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "cmp_http_request_duration_seconds", "HTTP 요청 처리 시간 (응답 완료까지)",
+    ["method", "route", "status"], buckets=_LATENCY_BUCKETS, registry=registry,
+)
+SQL_STATEMENT_SECONDS = Histogram(
+    "cmp_db_statement_duration_seconds", "SQL 문 실행 시간",
+    ["engine", "statement"], buckets=_LATENCY_BUCKETS, registry=registry,
+)
+SQL_ERRORS = Counter("cmp_db_statement_errors", "실패한 SQL 문 수", ["engine"], registry=registry)
+DB_POOL_WAIT_SECONDS = Histogram(
+    "cmp_db_pool_checkout_wait_seconds", "커넥션 풀 checkout 대기 시간",
+    ["engine"], buckets=_LATENCY_BUCKETS, registry=registry,
+)
+PROVISION_STEP_SECONDS = Histogram(
+    "cmp_provision_step_duration_seconds", "provisioning runner 단계별 소요 시간",
+    ["runner", "step"], buckets=_STEP_BUCKETS, registry=registry,
+)
+PROVISION_JOB_SECONDS = Histogram(
+    "cmp_provision_job_duration_seconds", "provisioning job 실행 시간 (시작~종료)",
+    ["template", "outcome"], buckets=_STEP_BUCKETS, registry=registry,
+)
+PROMETHEUS_REQUEST_SECONDS = Histogram(
+    "cmp_prometheus_request_duration_seconds", "Prometheus API 호출 시간",
+    ["endpoint", "path"], buckets=_LATENCY_BUCKETS, registry=registry,
+)
+PROMETHEUS_ERRORS = Counter(
+    "cmp_prometheus_request_errors", "Prometheus API 호출 실패 수 (reason: http / error / circuit_open)",
+    ["endpoint", "reason"], registry=registry,
+)
+
+
+# ==========================================
+# HTTP
+# ==========================================
+class MetricsMiddleware:
+    """라우트 템플릿별 요청 지연. 매칭되지 않은 경로는 route="unmatched" (카디널리티 제한)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUEST_SECONDS.labels(scope["method"], path, str(status)).observe(time.perf_counter() - start)
+
+
+def metrics_response_body() -> bytes:
+    return generate_latest(registry)
+
+
+METRICS_CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+
+# ==========================================
+# DB
+# ==========================================
+_STATEMENT_KINDS = {"SELECT", "INSERT", "UPDATE", "DELETE", "BEGIN", "COMMIT", "ROLLBACK", "PRAGMA", "CREATE", "ALTER"}
+
+
+def _statement_kind(statement: str) -> str:
+    head = statement.lstrip()[:10].split(None, 1)
+    kind = head[0].upper() if head else ""
+    return kind if kind in _STATEMENT_KINDS else "OTHER"
+
+
+def _engine_label(engine: Engine) -> str:
+    return engine.url.get_backend_name() + ("+async" if engine.dialect.is_async else "")
+
+
+_instrumented: "weakref.WeakSet[Engine]" = weakref.WeakSet()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """동기 Engine(또는 AsyncEngine.sync_engine)에 SQL/풀 계측을 건다. DatabaseManager 의 swap listener 로 등록."""
+    if engine in _instrumented:
+        return
+    _instrumented.add(engine)
+    label = _engine_label(engine)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("cmp_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("cmp_query_start")
+        if starts:
+            SQL_STATEMENT_SECONDS.labels(label, _statement_kind(statement)).observe(time.perf_counter() - starts.pop())
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        starts = context.connection.info.get("cmp_query_start") if context.connection is not None else None
+        if starts:
+            starts.pop()
+        SQL_ERRORS.labels(label).inc()
+
+    # 풀 checkout 대기: 풀에는 "checkout 시작" 이벤트가 없으므로 _do_get 을 감싸서 측정.
+    # dispose() 로 풀이 새로 만들어지면 계측이 빠지지만, dispose 는 교체되어 버려지는 엔진에서만 일어남.
+    pool = engine.pool
+    do_get = pool._do_get
+    wait = DB_POOL_WAIT_SECONDS.labels(label)
+
+    def _timed_do_get():
+        start = time.perf_counter()
+        try:
+            return do_get()
+        finally:
+            wait.observe(time.perf_counter() - start)
+
+    pool._do_get = _timed_do_get
+
+
+class _StateCollector:
+    """scrape 시점에 읽는 상태값 (DB 풀, 폴백 여부, 스케줄러 대기열)."""
+
+    def __init__(self):
+        self.db_manager = None
+        self.scheduler = None
+        self.job_worker = None
+
+    def collect(self):
+        manager = self.db_manager
+        if manager is not None:
+            yield GaugeMetricFamily("cmp_db_fallback", "SQLite 폴백으로 동작 중이면 1", value=1 if manager.on_fallback else 0)
+            pool_size = GaugeMetricFamily("cmp_db_pool_size", "커넥션 풀 크기 (pool_size)", labels=["engine"])
+            checked_out = GaugeMetricFamily("cmp_db_pool_checked_out", "사용 중인 커넥션 수", labels=["engine"])
+            overflow = GaugeMetricFamily("cmp_db_pool_overflow", "pool_size 를 넘어 연 커넥션 수 (음수면 아직 안 연 슬롯)", labels=["engine"])
+            for engine in manager._engines():
+                label = _engine_label(engine)
+                pool = engine.pool
+                if hasattr(pool, "checkedout"):
+                    pool_size.add_metric([label], pool.size())
+                    checked_out.add_metric([label], pool.checkedout())
+                    overflow.add_metric([label], pool.overflow())
+            yield pool_size
+            yield checked_out
+            yield overflow
+        if self.scheduler is not None:
+            stats = self.scheduler.stats()
+            yield GaugeMetricFamily("cmp_provision_queue_depth", "스케줄러 대기 job 수", value=stats["queue_depth"])
+            yield GaugeMetricFamily("cmp_provision_running", "실행 중인 provisioning job 수", value=stats["running"])
+            yield GaugeMetricFamily("cmp_provision_oldest_wait_seconds", "가장 오래 기다린 job 의 대기 시간", value=stats["oldest_wait_seconds"])
+        if self.job_worker is not None:
+            yield GaugeMetricFamily("cmp_provision_held_leases", "이 워커가 잡고 있는 job lease 수", value=self.job_worker.stats()["held_leases"])
+
+
+_state = _StateCollector()
+registry.register(_state)
+
+
+def bind_database(db_manager) -> None:
+    _state.db_manager = db_manager
+    db_manager.add_swap_listener(instrument_engine)
+
+
+def bind_scheduler(scheduler, job_worker=None) -> None:
+    _state.scheduler = scheduler
+    _state.job_worker = job_worker
+
+
+# ==========================================
+# Provisioning
+# ==========================================
+class StepTimer:
+    """runner 단계 시간 측정: timer.step("name") 을 부를 때마다 직전 단계 소요 시간을 기록."""
+
+    __slots__ = ("runner", "_name", "_start")
+
+    def __init__(self, runner: str):
+        self.runner = runner
+        self._name: Optional[str] = None
+        self._start = 0.0
+
+    def step(self, name: Optional[str]) -> None:
+        now = time.perf_counter()
+        if self._name is not None:
+            PROVISION_STEP_SECONDS.labels(self.runner, self._name).observe(now - self._start)
+        self._name = name
+        self._start = now
+
+    def finish(self) -> None:
+        self.step(None)
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+모니터링 히스토리용 인메모리 시계열 ring buffer (NumPy).
+- 메트릭 폴러가 주기마다 받은 {ip: {cpu, memory}} 맵을 한 열(tick)로 추가.
+  모든 시리즈가 같은 시각에 샘플링되므로 timestamp ring 하나를 공유하고,
+  값은 (시리즈 수 x capacity) float32 행렬 → tick 추가 = 열 하나 쓰기.
+- capacity = 보관 시간 / 폴링 주기 로 고정 → 시리즈당 메모리 고정 (4 bytes x capacity).
+  해당 tick 에 값이 없으면 NaN.
+- 윈도우 집계(min/max/avg/p95)는 선택한 시리즈 전체를 한 번에 nan* 연산으로 계산.
+- 이벤트 루프(폴러, 요청 핸들러)에서만 접근하므로 락 없음.
+"""
+import math
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from config import CONFIG
+
+METRICS = ("cpu", "memory")
+
+# 윈도우 이름 → 초
+WINDOWS = {"1m": 60, "5m": 300, "1h": 3600}
+
+SeriesKey = Tuple[str, str]  # (ip, metric)
+
+
+class MetricHistory:
+    def __init__(self, retention_seconds: float, interval_seconds: float, initial_series: int = 64):
+        self.capacity = max(2, int(math.ceil(retention_seconds / interval_seconds)) + 1)
+        self._ts = np.full(self.capacity, np.nan, dtype=np.float64)
+        self._values = np.full((initial_series, self.capacity), np.nan, dtype=np.float32)
+        self._rows: Dict[SeriesKey, int] = {}
+        self._free: List[int] = list(range(initial_series - 1, -1, -1))
+        self._head = 0  # 다음에 쓸 열
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def series_count(self) -> int:
+        return len(self._rows)
+
+    # ---------- 쓰기 ----------
+    def append(self, data: Dict[str, Dict[str, float]], ts: Optional[float] = None) -> None:
+        """폴러 스냅샷 하나 = tick 하나. 이번 tick 에 없는 시리즈는 NaN."""
+        ts = time.time() if ts is None else ts
+        col = self._head
+        self._values[:, col] = np.nan
+        if data:
+            rows = []
+            vals = []
+            for ip, metrics in data.items():
+                for metric, value in metrics.items():
+                    rows.append(self._row_for((ip, metric)))
+                    vals.append(value)
+            self._values[np.asarray(rows, dtype=np.intp), col] = np.asarray(vals, dtype=np.float32)
+        self._ts[col] = ts
+        self._head = (col + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def _row_for(self, key: SeriesKey) -> int:
+        row = self._rows.get(key)
+        if row is not None:
+            return row
+        if not self._free:
+            self._reclaim()
+        if not self._free:
+            self._grow()
+        row = self._free.pop()
+        self._rows[key] = row
+        return row
+
+    def _reclaim(self) -> None:
+        """보관 기간 내내 값이 없던 시리즈(사라진 인스턴스)의 행을 재사용."""
+        empty = np.isnan(self._values).all(axis=1)
+        for key, row in list(self._rows.items()):
+            if empty[row]:
+                del self._rows[key]
+                self._free.append(row)
+
+    def _grow(self) -> None:
+        old = self._values.shape[0]
+        grown = np.full((old * 2, self.capacity), np.nan, dtype=np.float32)
+        grown[:old] = self._values
+        self._values = grown
+        self._free.extend(range(old * 2 - 1, old - 1, -1))
+
+    # ---------- 읽기 ----------
+    def _window_columns(self, seconds: float, now: Optional[float] = None) -> np.ndarray:
+        """최근 seconds 안의 열 인덱스 (시간순)."""
+        if self._count == 0:
+            return np.empty(0, dtype=np.intp)
+        order = (np.arange(self._head - self._count, self._head) % self.capacity).astype(np.intp)
+        now = time.time() if now is None else now
+        return order[self._ts[order] >= now - seconds]
+
+    def _rows_for(self, keys: Iterable[SeriesKey]) -> Tuple[List[SeriesKey], np.ndarray]:
+        known = [k for k in keys if k in self._rows]
+        return known, np.asarray([self._rows[k] for k in known], dtype=np.intp)
+
+    def window(self, ips: Iterable[str], seconds: float, metrics: Iterable[str] = METRICS,
+               now: Optional[float] = None) -> Dict[str, object]:
+        """최근 seconds 구간의 원본 포인트: {"timestamps": [...], "series": {ip: {metric: [값 또는 None]}}}."""
+        cols = self._window_columns(seconds, now)
+        keys = [(ip, m) for ip in ips for m in metrics]
+        known, rows = self._rows_for(keys)
+        block = self._values[np.ix_(rows, cols)] if len(rows) and len(cols) else np.empty((len(rows), len(cols)), np.float32)
+        series: Dict[str, Dict[str, list]] = {}
+        for i, (ip, metric) in enumerate(known):
+            values = block[i]
+            series.setdefault(ip, {})[metric] = [None if math.isnan(v) else round(v, 2) for v in values.tolist()]
+        return {"timestamps": self._ts[cols].tolist(), "series": series}
+
+    def aggregates(self, ips: Iterable[str], windows: Dict[str, float] = WINDOWS,
+                   metrics: Iterable[str] = METRICS, now: Optional[float] = None) -> Dict[str, Dict[str, dict]]:
+        """{ip: {metric: {window: {min, max, avg, p95, samples}}}}. 값이 없는 윈도우는 None."""
+        keys = [(ip, m) for ip in ips for m in metrics]
+        known, rows = self._rows_for(keys)
+        out: Dict[str, Dict[str, dict]] = {}
+        if not len(rows):
+            return out
+        now = time.time() if now is None else now
+        stats_by_window = {}
+        for name, seconds in windows.items():
+            cols = self._window_columns(seconds, now)
+            if not len(cols):
+                stats_by_window[name] = None
+                continue
+            block = self._values[np.ix_(rows, cols)].astype(np.float64)
+            samples = np.count_nonzero(~np.isnan(block), axis=1)
+            block[samples == 0] = 0.0  # 전부 NaN 인 행은 nan* 경고 방지용으로 채우고 결과는 버림
+            stats_by_window[name] = (
+                samples,
+                np.nanmin(block, axis=1),
+                np.nanmax(block, axis=1),
+                np.nanmean(block, axis=1),
+                np.nanpercentile(block, 95, axis=1),
+            )
+        for i, (ip, metric) in enumerate(known):
+            per_window = {}
+            for name, stats in stats_by_window.items():
+                if stats is None or not stats[0][i]:
+                    per_window[name] = None
+                    continue
+                samples, mn, mx, avg, p95 = stats
+                per_window[name] = {
+                    "min": round(float(mn[i]), 2),
+                    "max": round(float(mx[i]), 2),
+                    "avg": round(float(avg[i]), 2),
+                    "p95": round(float(p95[i]), 2),
+                    "samples": int(samples[i]),
+                }
+            out.setdefault(ip, {})[metric] = per_window
+        return out
+
+    def memory_bytes(self) -> int:
+        return int(self._values.nbytes + self._ts.nbytes)
+
+
+metric_history = MetricHistory(
+    retention_seconds=CONFIG["metrics_history_retention_seconds"],
+    interval_seconds=CONFIG["metrics_poll_interval_seconds"],
+)
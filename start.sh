@@ -15,7 +15,10 @@ UVICORN_BIN=$(which uvicorn)
 pkill -f uvicorn || true
 
 # 5. 백그라운드 실행 (입출력 완전 차단)
-nohup $UVICORN_BIN main:app --host 0.0.0.0 --port 8000 </dev/null > uvicorn.log 2>&1 &
+# provisioning 작업은 DB 큐(provision_jobs)에서 lease 로 나눠 가짐. 실행은 at-least-once
+# (lease 가 만료되면 다른 워커가 다시 실행할 수 있음), 상태/로그/VM 기록은 lease 보유자만 반영(fencing)
+UVICORN_WORKERS=${UVICORN_WORKERS:-1}
+nohup $UVICORN_BIN main:app --host 0.0.0.0 --port 8000 --workers $UVICORN_WORKERS </dev/null > uvicorn.log 2>&1 &
 
 # 6. 실행 확인 (약간의 대기 후)
 sleep 2
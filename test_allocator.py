@@ -0,0 +1,93 @@
+"""
+VM 할당기(services.allocator) 테스트 (임시 SQLite 파일).
+- 여러 스레드(와 별도 할당기 = 다른 워커)가 동시에 claim 해도 같은 VM 이 두 번 나가지 않는지 (free-list 사용/미사용)
+- claim / release 결과가 WorkloadTestPool.is_used / project_id / occupy_user 와 일치하는지
+- 모자라면 VMPoolExhausted 와 함께 아무것도 점유하지 않는지
+
+    python -m pytest -q test_allocator.py
+"""
+import threading
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from main import Base, WorkloadTestPool
+from services.allocator import VMAllocator, VMPoolExhausted
+
+POOL_SIZE = 24
+
+
+@pytest.fixture
+def factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    with factory() as db:
+        db.add_all([WorkloadTestPool(vm_name=f"WKLD-{i}", ip_address=f"192.168.40.{i + 1}", is_used=False)
+                    for i in range(POOL_SIZE)])
+        db.commit()
+    return factory
+
+
+def _pool_state(factory):
+    with factory() as db:
+        return {r.id: (r.is_used, r.project_id, r.occupy_user) for r in db.query(WorkloadTestPool)}
+
+
+@pytest.mark.parametrize("use_cache", [False, True])
+def test_concurrent_claims_never_share_a_vm(factory, use_cache):
+    allocators = [VMAllocator(WorkloadTestPool, use_cache=use_cache, cache_refill_size=4) for _ in range(2)]
+    claims = {}
+    errors = []
+    barrier = threading.Barrier(10)
+
+    def worker(project_id):
+        allocator = allocators[project_id % 2]
+        barrier.wait()
+        try:
+            with factory() as db:
+                claims[project_id] = allocator.claim(db, project_id, f"user{project_id}", 2)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(pid,)) for pid in range(1, 11)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors
+    ids = [vm["id"] for vms in claims.values() for vm in vms]
+    assert len(ids) == 20 and len(set(ids)) == 20
+    state = _pool_state(factory)
+    for pid, vms in claims.items():
+        for vm in vms:
+            assert state[vm["id"]] == (True, pid, f"user{pid}")
+    assert sum(1 for used, _, _ in state.values() if used) == 20
+
+
+@pytest.mark.parametrize("use_cache", [False, True])
+def test_release_then_claim_matches_pool_rows(factory, use_cache):
+    allocator = VMAllocator(WorkloadTestPool, use_cache=use_cache, cache_refill_size=4)
+    with factory() as db:
+        first = allocator.claim(db, 1, "alice", 3)
+        allocator.claim(db, 2, "bob", POOL_SIZE - 3)
+        with pytest.raises(VMPoolExhausted):
+            allocator.claim(db, 3, "carol", 1)
+
+        assert allocator.release(db, 1) == 3
+        state = _pool_state(factory)
+        for vm in first:
+            assert state[vm["id"]] == (False, None, None)
+        assert allocator.free_count(db) == 3
+
+        with pytest.raises(VMPoolExhausted):
+            allocator.claim(db, 3, "carol", 4)  # 3대뿐 → 아무것도 점유하지 않음
+        assert allocator.free_count(db) == 3
+        again = allocator.claim(db, 3, "carol", 3)
+
+    assert sorted(vm["id"] for vm in again) == sorted(vm["id"] for vm in first)
+    state = _pool_state(factory)
+    assert all(state[vm["id"]] == (True, 3, "carol") for vm in again)
+    assert sum(1 for _, pid, _ in state.values() if pid == 2) == POOL_SIZE - 3
@@ -0,0 +1,80 @@
+"""
+Ansible runner 테스트 (fake_ansible_playbook.py 사용, 실제 ansible 불필요).
+- jsonl 이벤트가 줄 단위로 로그가 되는지
+- VM 8대 배포가 순차 합계가 아니라 가장 느린 VM 정도의 시간에 끝나는지
+- 한 VM 이 실패하면 PlaybookFailed 로 전체가 실패하는지
+
+    python -m pytest -q test_ansible_runner.py
+    python test_ansible_runner.py
+"""
+import asyncio
+import sys
+import time
+
+import pytest
+
+from config import CONFIG
+from services.runners.ansible_runner import build_plan, run_plan, PlaybookFailed
+
+TASK_DELAY = 0.3
+VMS = [{"vm_name": f"WKLD-{i}", "ip_address": f"192.168.40.{i + 1}"} for i in range(8)]
+
+
+def _use_fake_ansible(mp):
+    mp.setitem(CONFIG, "ansible_playbook_cmd", f"{sys.executable} fake_ansible_playbook.py")
+    mp.delenv("CMP_ANSIBLE_PLAYBOOK", raising=False)
+    mp.setenv("FAKE_ANSIBLE_TASK_DELAY", str(TASK_DELAY))
+    mp.setenv("FAKE_ANSIBLE_TASKS", "3")
+    mp.delenv("FAKE_ANSIBLE_FAIL_HOST", raising=False)
+
+
+@pytest.fixture(autouse=True)
+def fake_ansible(monkeypatch):
+    _use_fake_ansible(monkeypatch)
+
+
+def _run(vms):
+    logs = []
+
+    async def on_log(level, message):
+        logs.append((level, message))
+
+    spec = {"config": {"template": "enterprise", "packages": ["nginx"]}}
+    t0 = time.perf_counter()
+    try:
+        asyncio.run(run_plan(build_plan(1, spec, vms), on_log, max_parallel=len(vms)))
+        error = None
+    except PlaybookFailed as e:
+        error = e
+    return time.perf_counter() - t0, logs, error
+
+
+def test_parallel_fan_out():
+    elapsed, logs, error = _run(VMS)
+    assert error is None
+    # 생성 단계(VM 8개 동시) + configure 단계(shard 1개): 각 3 task * 0.3s
+    serial = (len(VMS) + 1) * 3 * TASK_DELAY
+    assert elapsed < serial / 2, f"{elapsed:.2f}s (순차 실행 시 {serial:.2f}s)"
+    assert ("INFO", "[WKLD-0] TASK [task 1]") in logs
+    assert ("INFO", "[WKLD-7] changed: [WKLD-7]") in logs
+    assert any(m.startswith("[configure 1/1] RECAP [192.168.40.8]") for _, m in logs)
+
+
+def test_failure_stops_plan(monkeypatch):
+    monkeypatch.setenv("FAKE_ANSIBLE_FAIL_HOST", "WKLD-3")
+    _, logs, error = _run(VMS)
+    assert isinstance(error, PlaybookFailed)
+    assert "rc=2" in str(error)
+    assert ("ERROR", "[WKLD-3] failed: [WKLD-3] simulated failure") in logs
+    # 생성 단계에서 실패 → configure 단계는 실행되지 않음
+    assert not any(m.startswith("[configure") for _, m in logs)
+
+
+if __name__ == "__main__":
+    with pytest.MonkeyPatch.context() as mp:
+        _use_fake_ansible(mp)
+        elapsed, logs, _ = _run(VMS)
+        print(f"[INFO] {len(VMS)} VMs + configure: {elapsed:.2f}s, {len(logs)} log lines")
+        test_parallel_fan_out()
+        test_failure_stops_plan(mp)
+    print("[SUCCESS] ansible runner")
@@ -0,0 +1,65 @@
+"""
+폴링 ETag 용 데이터 버전(services.data_version) 테스트 (임시 SQLite 파일).
+- 다른 프로젝트가 로그만 남기면 버전이 그대로라 If-None-Match 가 계속 맞는지 (304 유지)
+- 상태가 실제로 바뀌면 버전이 올라 ETag 가 달라지는지
+
+    python -m pytest -q test_data_version.py
+"""
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import services.provisioner as provisioner
+from main import Base, DataVersion, ProjectHistory, ProvisionLog
+from services.data_version import DataVersionTracker, PROJECTS
+from services.provisioner import update_provision_status
+from services.responses import etag_matches
+
+
+@pytest.fixture
+def versions(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'versions.db'}")
+    Base.metadata.create_all(bind=engine)
+    tracker = DataVersionTracker(PROJECTS, check_interval=60)
+    tracker.bind(DataVersion, None)
+    tracker.ensure_row(engine)
+    monkeypatch.setattr(provisioner, "data_versions", tracker)
+    factory = sessionmaker(bind=engine)
+    with factory() as db:
+        db.add_all([ProjectHistory(service_name=f"svc{i}", status="RUNNING", details={}) for i in (1, 2)])
+        db.commit()
+        # 첫 버전을 알도록 한 번 상태 변경
+        update_provision_status(db, 1, "PENDING", project_model=ProjectHistory)
+    return tracker, factory
+
+
+def test_unrelated_logs_keep_etag(versions):
+    tracker, factory = versions
+    etag = tracker.etag("h")
+    assert etag is not None
+
+    with factory() as db:
+        for i in range(3):
+            update_provision_status(db, 2, "RUNNING", project_model=ProjectHistory,
+                                    log_model=ProvisionLog, logs_append=[f"step {i}"])
+        update_provision_status(db, 2, "RUNNING", project_model=ProjectHistory, assigned_ip=None)
+    assert etag_matches(etag, [tracker.etag("h")])
+
+    with factory() as db:
+        update_provision_status(db, 2, "COMPLETED", project_model=ProjectHistory,
+                                log_model=ProvisionLog, logs_append=["done"], assigned_ip="10.0.0.5")
+        assert db.get(ProjectHistory, 2).assigned_ip == "10.0.0.5"
+    assert not etag_matches(etag, [tracker.etag("h")])
+
+
+def test_resources_and_explicit_changes_bump(versions):
+    tracker, factory = versions
+    with factory() as db:
+        before = tracker.current
+        update_provision_status(db, 1, "PENDING", project_model=ProjectHistory,
+                                resources={"alb_ip": "10.0.0.9"})
+        after_resources = tracker.current
+        update_provision_status(db, 1, "PENDING", project_model=ProjectHistory,
+                                log_model=ProvisionLog, logs_append=["Allocated: vm1"], data_changed=True)
+        after_explicit = tracker.current
+    assert before[1] < after_resources[1] < after_explicit[1]
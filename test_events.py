@@ -0,0 +1,83 @@
+"""
+provisioning 이벤트 스트림(services.events) 테스트 (DB 대신 메모리 로더).
+- Last-Event-ID(로그 seq) 이후만 재생하고, job 이 다른 워커에 있으면 DB 폴링으로 새 로그/최종 상태를 받는지
+- 로컬 push 에서 seq 가 건너뛰면 DB 에서 채워 순서대로, 중복 없이 전달하는지
+
+    python -m pytest -q test_events.py
+"""
+import asyncio
+
+from services.events import ProjectEventStream, ProvisionEventBroker
+
+
+class FakeProject:
+    def __init__(self, status="RUNNING"):
+        self.status = status
+        self.logs = []
+
+    def log(self, message):
+        entry = {"seq": len(self.logs) + 1, "ts": None, "level": "INFO", "message": message}
+        self.logs.append(entry)
+        return entry
+
+    async def load(self, project_id, since, limit):
+        return self.status, "", [l for l in self.logs if l["seq"] > since][:limit]
+
+
+async def _collect(stream, keepalive=5.0):
+    out = []
+    async for evt in stream.events(keepalive):
+        if evt is not None:
+            out.append((evt.id, evt.event, evt.data.get("message") or evt.data.get("status")))
+    return out
+
+
+def test_resume_from_seq_and_poll_remote_job():
+    project = FakeProject()
+    for i in range(1, 4):
+        project.log(f"line {i}")
+
+    async def scenario():
+        broker = ProvisionEventBroker(buffer_size=16)
+        stream = ProjectEventStream(7, since=1, load=project.load, is_local=lambda pid: False,
+                                    broker=broker, poll_interval=0.01, page_size=2)
+        assert await stream.open()
+        task = asyncio.ensure_future(_collect(stream))
+        await asyncio.sleep(0.05)
+        project.log("line 4")
+        project.status = "COMPLETED"
+        events = await asyncio.wait_for(task, 2)
+        stream.close()
+        assert broker.subscriber_count(7) == 0
+        return events
+
+    assert asyncio.run(scenario()) == [
+        (2, "log", "line 2"), (3, "log", "line 3"), (None, "status", "RUNNING"),
+        (4, "log", "line 4"), (None, "status", "COMPLETED"),
+    ]
+
+
+def test_local_push_fills_gaps_from_db():
+    project = FakeProject()
+    project.log("line 1")
+
+    async def scenario():
+        broker = ProvisionEventBroker(buffer_size=16)
+        stream = ProjectEventStream(7, since=0, load=project.load, is_local=lambda pid: True,
+                                    broker=broker, poll_interval=0.01)
+        assert await stream.open()
+        task = asyncio.ensure_future(_collect(stream))
+        broker.publish(7, "log", project.log("line 2"))
+        project.log("line 3")  # 다른 경로로 기록되어 push 되지 않음
+        broker.publish(7, "log", project.log("line 4"))
+        broker.publish(7, "log", project.logs[1])  # 중복
+        project.status = "COMPLETED"
+        broker.publish(7, "status", {"status": "COMPLETED", "resources": {"alb_ip": "10.0.0.1"}}, final=True)
+        return await asyncio.wait_for(task, 2)
+
+    assert asyncio.run(scenario()) == [
+        (1, "log", "line 1"), (None, "status", "RUNNING"),
+        (2, "log", "line 2"), (3, "log", "line 3"), (4, "log", "line 4"),
+        (None, "status", "COMPLETED"),
+    ]
+
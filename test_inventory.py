@@ -0,0 +1,71 @@
+"""
+Ansible 동적 inventory(services.inventory) 테스트 (SQLite 메모리 DB).
+- 풀 VM / ssh target 이 project / template / tier / owner 그룹과 _meta.hostvars 로 나오는지
+- ansible runner 처럼 ssh target 주소가 점유 VM 과 같으면 한 호스트로 합쳐지는지
+- 프로젝트별 부분 inventory 가 그 프로젝트 호스트만 담는지
+
+    python -m pytest -q test_inventory.py
+"""
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from main import Base, ProjectHistory, ProjectResource, WorkloadTestPool
+from services.inventory import build_inventory, subset_inventory
+from services.resources import replace_project_resources
+
+
+def _inventory():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    k8s = ProjectHistory(service_name="kube", status="COMPLETED", template_type="k8s_small",
+                         details={"input": {"userName": "kim"}})
+    web = ProjectHistory(service_name="shop web", status="COMPLETED", template_type="single",
+                         details={"input": {"userName": "lee"}})
+    db.add_all([k8s, web])
+    db.flush()
+    db.add_all([
+        WorkloadTestPool(vm_name="WKLD-1", ip_address="192.168.40.1", is_used=True, project_id=web.id, occupy_user="lee"),
+        WorkloadTestPool(vm_name="WKLD-2", ip_address="192.168.40.2", is_used=False),
+    ])
+    replace_project_resources(db, k8s, {
+        "alb_ip": "10.99.0.2",
+        "ssh_targets": [{"host": f"10.99.0.{i}", "port": 22, "user": "ubuntu"} for i in (2, 3, 4)],
+    }, ProjectResource, "COMPLETED")
+    replace_project_resources(db, web, {
+        "alb_ip": "192.168.40.1",
+        "web_url": "http://192.168.40.1",
+        "ssh_targets": [{"host": "192.168.40.1", "port": 2222, "user": "root"}],
+    }, ProjectResource, "COMPLETED")
+    db.commit()
+    inv = build_inventory(db, WorkloadTestPool, ProjectHistory, ProjectResource)
+    return inv, k8s.id, web.id
+
+
+def test_groups_and_hostvars():
+    inv, k8s_id, web_id = _inventory()
+    hostvars = inv["_meta"]["hostvars"]
+    assert inv[f"project_{k8s_id}"]["hosts"] == ["10.99.0.2", "10.99.0.3", "10.99.0.4"]
+    assert inv[f"project_{k8s_id}"]["vars"]["alb_ip"] == "10.99.0.2"
+    assert inv["tier_control_plane"]["hosts"] == ["10.99.0.2"]
+    assert inv["tier_worker"]["hosts"] == ["10.99.0.3", "10.99.0.4"]
+    assert inv["template_k8s_small"]["hosts"] == inv[f"project_{k8s_id}"]["hosts"]
+    assert inv["owner_kim"]["hosts"] == inv[f"project_{k8s_id}"]["hosts"]
+    assert hostvars["10.99.0.3"]["ansible_user"] == "ubuntu" and hostvars["10.99.0.3"]["cmp_tier"] == "worker"
+    # ssh target 이 점유 VM 과 같은 주소 → VM 호스트(WKLD-1)에 합쳐짐
+    assert inv[f"project_{web_id}"]["hosts"] == ["WKLD-1"]
+    assert "192.168.40.1" not in hostvars
+    assert hostvars["WKLD-1"]["ansible_port"] == 2222 and hostvars["WKLD-1"]["cmp_tier"] == "web"
+    assert inv["workload_pool"]["hosts"] == ["WKLD-1", "WKLD-2"]
+    assert inv["pool_free"]["hosts"] == ["WKLD-2"]
+    assert set(inv["all"]["children"]) == set(inv) - {"all", "_meta"}
+
+
+def test_project_subset():
+    inv, k8s_id, web_id = _inventory()
+    group = f"project_{web_id}"
+    sub = subset_inventory(inv, inv[group]["hosts"], keep_vars_of=group)
+    assert set(sub["_meta"]["hostvars"]) == {"WKLD-1"}
+    assert f"project_{k8s_id}" not in sub and "pool_free" not in sub
+    assert sub["workload_pool"]["hosts"] == ["WKLD-1"]
+    assert sub[group]["vars"]["web_url"] == "http://192.168.40.1"
@@ -0,0 +1,86 @@
+"""
+IPAM(services.ipam) 테스트 (SQLite 메모리 DB).
+- 예약 주소(네트워크/브로드캐스트/예약 범위)는 할당되지 않고, 템플릿 크기만큼 연속 주소가 나오는지
+- 반납한 주소를 다시 쓰고, 다른 워커(별도 manager)가 먼저 점유한 주소는 충돌 없이 건너뛰는지
+- 풀이 모자라면 IPPoolExhausted 와 함께 아무것도 남기지 않는지
+- INSERT 가 예외로 끝나면 비트맵에서 꺼낸 후보도 다시 비워지는지
+
+    python -m pytest -q test_ipam.py
+"""
+import ipaddress
+
+import pytest
+from sqlalchemy import create_engine, select, func
+from sqlalchemy.orm import sessionmaker
+
+from main import Base, IpAllocation
+from services.ipam import IPAddressManager, IPPool, IPPoolExhausted
+
+POOLS = {"t": {"cidrs": ["10.1.0.0/29", "10.2.0.0/16"], "reserved": ["10.1.0.1", "10.2.0.0-10.2.0.9"]}}
+
+
+def _session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)()
+
+
+def test_bitmap_reserved_and_contiguous():
+    pool = IPPool("p", ["10.0.0.0/24"], reserved=["10.0.0.1-10.0.0.3"])
+    assert pool.free == 256 - 2 - 3
+    first = pool.take(3)  # 바이트 안의 연속 구간 (.4~.6)
+    assert pool.take(5, contiguous=True)[0] == int(ipaddress.ip_address("10.0.0.8"))  # 다음 바이트로 넘어감
+    assert [str(ipaddress.ip_address(a)) for a in first] == ["10.0.0.4", "10.0.0.5", "10.0.0.6"]
+    assert [str(ipaddress.ip_address(a)) for a in pool.take(2, contiguous=False)] == ["10.0.0.7", "10.0.0.13"]
+    pool.unmark(first[1])
+    assert pool.take(1) == [first[1]]
+    taken = pool.take(pool.free, contiguous=False)
+    assert len(set(taken)) == len(taken) and pool.free == 0
+    assert pool.take(1) == []
+
+
+def test_allocate_release_and_conflicts():
+    db = _session()
+    a = IPAddressManager(IpAllocation, POOLS, default_pool="t")
+    ips = a.allocate(db, project_id=1, count=3)
+    # 10.1.0.0/29: .0/.7 자동 예약, .1 예약 → 연속 3개는 .2~.4
+    assert ips == ["10.1.0.2", "10.1.0.3", "10.1.0.4"]
+    assert a.allocate(db, project_id=1, count=3) == ips  # 재시도된 job 은 같은 주소
+
+    # 다른 워커: 자기 비트맵은 비어 있지만 INSERT 충돌로 걸러져 겹치지 않음
+    b = IPAddressManager(IpAllocation, POOLS, default_pool="t")
+    other = b.allocate(db, project_id=2, count=5)
+    assert not set(other) & set(ips)
+    assert "10.2.0.5" not in other
+
+    assert a.release(db, project_id=1) == 3
+    assert a.allocate(db, project_id=3, count=1) == ["10.1.0.2"]
+    assert db.execute(select(func.count(IpAllocation.id))).scalar() == 6
+
+
+def test_exhausted_rolls_back():
+    db = _session()
+    small = {"s": {"cidrs": ["10.9.0.0/29"]}}
+    ipam = IPAddressManager(IpAllocation, small, default_pool="s")
+    assert len(ipam.allocate(db, project_id=1, count=4)) == 4
+    with pytest.raises(IPPoolExhausted):
+        ipam.allocate(db, project_id=2, count=3)
+    assert db.execute(select(func.count(IpAllocation.id))).scalar() == 4
+    assert ipam.stats()["s"]["free"] == 2
+    assert len(ipam.allocate(db, project_id=2, count=2)) == 2
+
+
+def test_insert_error_returns_candidates(monkeypatch):
+    db = _session()
+    small = {"s": {"cidrs": ["10.9.0.0/29"]}}
+    ipam = IPAddressManager(IpAllocation, small, default_pool="s")
+
+    def broken_insert(*args):
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(ipam, "_insert", broken_insert)
+    with pytest.raises(RuntimeError):
+        ipam.allocate(db, project_id=1, count=3)
+    assert ipam.stats()["s"]["free"] == 6
+    monkeypatch.undo()
+    assert len(ipam.allocate(db, project_id=1, count=6)) == 6
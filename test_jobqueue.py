@@ -0,0 +1,148 @@
+"""
+provisioning 작업 큐(services.jobqueue) lease / fencing 테스트 (임시 SQLite 파일).
+- lease 가 만료되어 다른 워커가 다시 claim 하면 이전 워커의 heartbeat / finish / runner 쓰기가 모두 거부되는지
+- heartbeat 가 lease_seconds 동안 실패하면 로컬 실행이 취소되는지 (실행 중 lease 상실)
+- runner 가 예외로 끝난 job 은 done 이 아니라 큐로 돌아가 재시도되고, 한도를 넘으면 job/프로젝트가 FAILED 인지
+
+    python -m pytest -q test_jobqueue.py
+"""
+import asyncio
+import contextvars
+
+import pytest
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+
+import services.jobqueue as jobqueue
+from main import Base, ProjectHistory, ProvisionLog, ProvisionQueueJob
+from services.jobqueue import (
+    JobQueueWorker, claim_jobs, enqueue_job, finish_job, heartbeat, JOB_DONE, JOB_FAILED, JOB_QUEUED,
+)
+from services.lease import Lease, LeaseLost, bind_lease, db_now_plus
+from services.provisioner import update_provision_status
+from services.scheduler import ProvisioningScheduler
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'queue.db'}")
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    with factory() as db:
+        project = ProjectHistory(service_name="svc", status="PENDING", details={})
+        db.add(project)
+        db.flush()
+        enqueue_job(db, ProvisionQueueJob, project.id, {}, "single")
+        db.commit()
+    return factory
+
+
+def _expire_leases(db):
+    db.execute(update(ProvisionQueueJob).values(lease_expires_at=db_now_plus(db, -1)))
+    db.commit()
+
+
+def _write_status(db, lease, project_id, message):
+    def run():
+        bind_lease(lease)
+        update_provision_status(db, project_id, "RUNNING", project_model=ProjectHistory,
+                                log_model=ProvisionLog, logs_append=[message])
+    contextvars.copy_context().run(run)
+
+
+def test_stale_worker_is_fenced_after_reclaim(session_factory):
+    with session_factory() as db:
+        [job] = claim_jobs(db, ProvisionQueueJob, "worker-a", 10, lease_seconds=30)
+        lease_a = Lease(ProvisionQueueJob, job["id"], "worker-a")
+        _write_status(db, lease_a, job["project_id"], "a: step 1")
+
+        _expire_leases(db)
+        [again] = claim_jobs(db, ProvisionQueueJob, "worker-b", 10, lease_seconds=30)
+        assert again["id"] == job["id"] and again["attempts"] == 2
+        lease_b = Lease(ProvisionQueueJob, job["id"], "worker-b")
+
+        assert heartbeat(db, ProvisionQueueJob, "worker-a", [job["id"]], 30) == [job["id"]]
+        with pytest.raises(LeaseLost):
+            _write_status(db, lease_a, job["project_id"], "a: step 2")
+        _write_status(db, lease_b, job["project_id"], "b: step 1")
+        assert not finish_job(db, ProvisionQueueJob, job["id"], "worker-a", JOB_DONE)
+        assert finish_job(db, ProvisionQueueJob, job["id"], "worker-b", JOB_DONE)
+
+        messages = [m for (m,) in db.query(ProvisionLog.message).order_by(ProvisionLog.seq)]
+        assert messages == ["a: step 1", "b: step 1"]
+
+
+def test_failed_heartbeats_cancel_local_run(session_factory, monkeypatch):
+    finished = []
+
+    def broken_heartbeat(*args):
+        raise RuntimeError("db down")
+
+    async def scenario():
+        started = asyncio.Event()
+
+        async def runner(project_id, input_spec):
+            started.set()
+            await asyncio.sleep(60)
+
+        async def on_finish(project_id, outcome):
+            finished.append(outcome)
+
+        scheduler = ProvisioningScheduler(runner, max_concurrency=4, template_limits={}, default_template_limit=4)
+        worker = JobQueueWorker(session_factory, ProvisionQueueJob, ProjectHistory, ProvisionLog, scheduler)
+        worker.lease_seconds = 0.2
+        scheduler.on_finish = on_finish
+        await scheduler.start()
+        await worker._claim_and_submit()
+        await asyncio.wait_for(started.wait(), 5)
+
+        monkeypatch.setattr(jobqueue, "heartbeat", broken_heartbeat)
+        await worker.renew_leases()  # 아직 lease_seconds 전 → 계속 실행
+        assert worker.stats()["held_leases"] == 1 and not finished
+        await asyncio.sleep(0.25)
+        await worker.renew_leases()
+        await asyncio.sleep(0.05)
+        assert worker.stats()["held_leases"] == 0
+        assert finished == ["cancelled"]
+        await scheduler.stop()
+
+    asyncio.run(scenario())
+
+
+def test_runner_error_is_retried_then_failed(session_factory):
+    runs = []
+
+    async def scenario():
+        finished = asyncio.Event()
+
+        async def runner(project_id, input_spec):
+            runs.append(project_id)
+            raise RuntimeError("runner crashed")
+
+        scheduler = ProvisioningScheduler(runner, max_concurrency=4, template_limits={}, default_template_limit=4)
+        worker = JobQueueWorker(session_factory, ProvisionQueueJob, ProjectHistory, ProvisionLog, scheduler)
+        worker.max_attempts = 2
+
+        async def on_finish(project_id, outcome):
+            await worker._on_job_finished(project_id, outcome)
+            finished.set()
+
+        scheduler.on_finish = on_finish
+        await scheduler.start()
+        states = []
+        for _ in range(2):
+            finished.clear()
+            await worker._claim_and_submit()
+            await asyncio.wait_for(finished.wait(), 5)
+            with session_factory() as db:
+                states.append(db.query(ProvisionQueueJob.state, ProvisionQueueJob.attempts).one())
+        await worker._claim_and_submit()  # 세 번째 claim: 한도 초과 → 실행하지 않고 FAILED
+        await scheduler.stop()
+        return states
+
+    states = asyncio.run(scenario())
+    assert states == [(JOB_QUEUED, 1), (JOB_QUEUED, 2)]
+    assert len(runs) == 2
+    with session_factory() as db:
+        assert db.query(ProvisionQueueJob.state).scalar() == JOB_FAILED
+        assert db.query(ProjectHistory.status).scalar() == "FAILED"
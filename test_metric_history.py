@@ -0,0 +1,60 @@
+"""
+모니터링 히스토리 ring buffer 테스트 (Prometheus 불필요).
+- capacity 를 넘겨도 메모리가 고정이고 최근 포인트만 남는지
+- 윈도우 집계(min/max/avg/p95)가 NumPy 기준값과 같은지
+- 빠진 샘플은 None, 사라진 인스턴스의 행은 재사용되는지
+
+    python -m pytest -q test_metric_history.py
+"""
+import numpy as np
+
+from services.timeseries import MetricHistory
+
+NOW = 1_700_000_000.0
+
+
+def _fill(history, ticks, interval=5.0, ips=("10.0.0.1", "10.0.0.2")):
+    for t in range(ticks):
+        ts = NOW - (ticks - 1 - t) * interval
+        history.append({ip: {"cpu": float(t + i), "memory": 50.0} for i, ip in enumerate(ips)}, ts=ts)
+
+
+def test_ring_wraps_with_fixed_memory():
+    h = MetricHistory(retention_seconds=60, interval_seconds=5)
+    _fill(h, 5)
+    size = h.memory_bytes()
+    _fill(h, 100)
+    assert h.memory_bytes() == size
+    assert len(h) == h.capacity
+    out = h.window(["10.0.0.1"], seconds=3600, now=NOW)
+    assert out["series"]["10.0.0.1"]["cpu"] == [float(t) for t in range(100 - h.capacity, 100)]
+    assert out["timestamps"][-1] == NOW
+
+
+def test_window_aggregates_match_numpy():
+    h = MetricHistory(retention_seconds=3600, interval_seconds=5)
+    _fill(h, 720)
+    agg = h.aggregates(["10.0.0.2", "10.0.0.9"], now=NOW)
+    assert "10.0.0.9" not in agg
+    last_5m = np.arange(720 - 61, 720, dtype=np.float64) + 1  # ts >= NOW - 300 → 61 포인트
+    stats = agg["10.0.0.2"]["cpu"]["5m"]
+    assert stats["samples"] == 61
+    assert stats["min"] == last_5m.min() and stats["max"] == last_5m.max()
+    assert stats["avg"] == round(last_5m.mean(), 2)
+    assert stats["p95"] == round(float(np.percentile(last_5m, 95)), 2)
+    assert agg["10.0.0.2"]["memory"]["1h"]["avg"] == 50.0
+
+
+def test_missing_samples_and_row_reuse():
+    h = MetricHistory(retention_seconds=20, interval_seconds=5, initial_series=2)
+    h.append({"10.0.0.1": {"cpu": 1.0}}, ts=NOW - 5)
+    h.append({}, ts=NOW)
+    assert h.window(["10.0.0.1"], 60, metrics=("cpu",), now=NOW)["series"]["10.0.0.1"]["cpu"] == [1.0, None]
+    assert h.aggregates(["10.0.0.1"], windows={"1m": 60}, metrics=("cpu",), now=NOW)["10.0.0.1"]["cpu"]["1m"]["samples"] == 1
+    # 10.0.0.1 이 보관 기간 동안 안 보이면 그 행을 새 인스턴스가 재사용 (행렬이 커지지 않음)
+    for i in range(h.capacity):
+        h.append({"10.0.0.2": {"cpu": 2.0}}, ts=NOW + 5 * (i + 1))
+    size = h.memory_bytes()
+    h.append({"10.0.0.2": {"cpu": 2.0}, "10.0.0.3": {"cpu": 3.0}}, ts=NOW + 100)
+    assert h.memory_bytes() == size
+    assert h.series_count == 2
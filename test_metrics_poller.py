@@ -0,0 +1,130 @@
+"""
+메트릭 폴러(services.metrics_poller) 테스트 (fetch 는 가짜 코루틴 / httpx.MockTransport).
+- single-flight: 동시에 들어온 get() 들이 fetch 한 번을 공유하는지
+- TTL: 신선한 동안은 fetch 없이 같은 스냅샷, TTL 이 지나면 다시 fetch
+- Prometheus 장애: 직전 스냅샷(값/버전/fetched_at)을 유지하고 stale 로 보이며 히스토리에 빈 tick 을 쌓지 않는지
+- 값이 그대로인 refresh 는 버전을 올리지 않는지 (my-resources ETag 가 폴링 주기마다 바뀌지 않음)
+
+    python -m pytest -q test_metrics_poller.py
+"""
+import asyncio
+
+import httpx
+import pytest
+
+import services.metrics_poller as metrics_poller
+from services.metrics_poller import MetricsPoller, fetch_metrics_map
+from services.prometheus import PrometheusClient, PrometheusUnavailable
+
+
+class FakeHistory:
+    def __init__(self):
+        self.ticks = []
+
+    def append(self, data, ts):
+        self.ticks.append(data)
+
+
+class FakeFetch:
+    def __init__(self):
+        self.calls = 0
+        self.down = False
+
+    async def __call__(self, scope):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if self.down:
+            raise PrometheusUnavailable("down")
+        return {"10.0.0.1": {"cpu": float(self.calls), "memory": 50.0}}
+
+
+def test_single_flight_and_ttl():
+    fetch = FakeFetch()
+
+    async def scenario():
+        poller = MetricsPoller(interval=60, ttl=0.1, fetch=fetch)
+        snaps = await asyncio.gather(*(poller.get() for _ in range(10)))
+        assert fetch.calls == 1 and all(s is snaps[0] for s in snaps)
+        assert await poller.get() is snaps[0]  # TTL 안: fetch 없음
+        await asyncio.sleep(0.15)
+        fresh = await poller.get()
+        assert fetch.calls == 2 and fresh.version == snaps[0].version + 1
+        assert fresh.data["10.0.0.1"]["cpu"] == 2.0
+
+    asyncio.run(scenario())
+
+
+def test_outage_keeps_previous_snapshot():
+    fetch = FakeFetch()
+    history = FakeHistory()
+
+    async def scenario():
+        poller = MetricsPoller(interval=60, ttl=0.05, fetch=fetch, history=history)
+        good = await poller.get()
+        fetch.down = True
+        await asyncio.sleep(0.06)
+        during = await poller.get()
+        assert during is good
+        assert during.data == {"10.0.0.1": {"cpu": 1.0, "memory": 50.0}}
+        assert poller.snapshot_meta(during)["stale"]
+        assert len(history.ticks) == 1
+
+        fetch.down = False
+        recovered = await poller.get()
+        assert recovered.version == good.version + 1
+        assert not poller.snapshot_meta(recovered)["stale"]
+
+    asyncio.run(scenario())
+
+
+def test_outage_before_first_snapshot_is_empty_and_stale():
+    fetch = FakeFetch()
+    fetch.down = True
+
+    async def scenario():
+        poller = MetricsPoller(interval=60, ttl=5, fetch=fetch)
+        snap = await poller.get()
+        assert snap.data == {} and snap.version == 0
+        assert poller.snapshot_meta(snap)["stale"]
+
+    asyncio.run(scenario())
+
+
+def test_fetch_reports_unreachable_prometheus(monkeypatch):
+    client = PrometheusClient(["http://prom-a:9090"], timeout=1.0, max_connections=2, breaker_failures=3,
+                              breaker_reset_seconds=60, transport=httpx.MockTransport(lambda r: httpx.Response(503)))
+    monkeypatch.setattr(metrics_poller, "prometheus", client)
+
+    async def scenario():
+        try:
+            with pytest.raises(PrometheusUnavailable):
+                await fetch_metrics_map()
+            # 장애가 아니라 "결과 없음" 이면 빈 맵
+            client.transport = httpx.MockTransport(
+                lambda r: httpx.Response(200, json={"status": "success", "data": {"result": []}}))
+            await client.aclose()
+            assert await fetch_metrics_map() == {}
+        finally:
+            await client.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_unchanged_values_keep_version():
+    values = {"10.0.0.1": {"cpu": 10.0, "memory": 50.0}}
+    history = FakeHistory()
+
+    async def fetch(scope):
+        return {ip: dict(v) for ip, v in values.items()}
+
+    async def scenario():
+        poller = MetricsPoller(interval=60, ttl=0, fetch=fetch, history=history)
+        first = await poller.refresh()
+        second = await poller.refresh()
+        assert second.version == first.version and second.fetched_at >= first.fetched_at
+        values["10.0.0.1"]["cpu"] = 11.0
+        third = await poller.refresh()
+        assert third.version == first.version + 1
+        assert len(history.ticks) == 3
+
+    asyncio.run(scenario())
@@ -0,0 +1,115 @@
+"""
+my-resources 읽기 경로의 SQL 문 개수 회귀 테스트.
+VM 이 1대든 200대든 list_user_vms 는 SQL 1개로 끝나야 함 (N+1 방지).
+프로젝트 리소스도 project_resources 백필 후 list_project_resources 한 번(SQL 1개)으로 조회.
+소유자와 무관하게 details.resources 가 있는 모든 프로젝트가 나옴 (기존 my-resources 범위).
+백필은 스키마 초기화마다 행이 없는 프로젝트를 확인하므로 중간에 끊긴 백필도 다음 시작에서 마무리.
+
+    python -m pytest -q test_my_resources_queries.py
+    python test_my_resources_queries.py
+"""
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from main import Base, ProjectHistory, ProjectResource, WorkloadTestPool, _init_schema
+from services.resources import list_user_vms, list_project_resources, backfill_project_resources
+
+
+def _count_statements(vm_count: int) -> int:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    for i in range(vm_count):
+        project = ProjectHistory(service_name=f"svc-{i}", status="COMPLETED", details={})
+        db.add(project)
+        db.flush()
+        db.add(WorkloadTestPool(
+            vm_name=f"WKLD-{i}", ip_address=f"192.168.40.{i % 250}",
+            is_used=True, project_id=project.id, occupy_user="admin",
+        ))
+    # 프로젝트가 삭제된 VM 도 하나 섞음 → "Unknown Project"
+    db.add(WorkloadTestPool(vm_name="WKLD-X", ip_address="192.168.41.1", is_used=True, project_id=99999, occupy_user="admin"))
+    db.commit()
+    db.expunge_all()
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    rows = list_user_vms(db, "admin", WorkloadTestPool, ProjectHistory)
+    assert len(rows) == vm_count + 1
+    assert rows[-1]["project_name"] == "Unknown Project"
+    db.close()
+    return len(statements)
+
+
+def test_list_user_vms_constant_statements():
+    assert _count_statements(1) == _count_statements(200) == 1
+
+
+
+def _resources(i: int) -> dict:
+    return {
+        "alb_ip": f"10.99.0.{i}",
+        "web_url": f"https://svc-{i}.mock.example.com",
+        "db_vip": None,
+        "ssh_targets": [{"host": f"10.99.0.{i}", "port": 22, "user": "ubuntu"}, {"host": f"10.99.1.{i}"}],
+    }
+
+
+def test_backfill_and_project_resources():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    for i in range(1, 121):
+        owner = "admin" if i % 3 else "other"
+        db.add(ProjectHistory(
+            service_name=f"svc-{i}", status="COMPLETED" if i % 2 else "RUNNING",
+            details={"input": {"userName": owner}, "resources": _resources(i)},
+        ))
+    db.add(ProjectHistory(service_name="no-resources", status="FAILED", details={"resources": None}))
+    db.commit()
+
+    assert backfill_project_resources(db, ProjectHistory, ProjectResource, batch_size=50) == 120
+    # 다시 실행해도 중복 없음
+    assert backfill_project_resources(db, ProjectHistory, ProjectResource) == 0
+    assert db.query(ProjectResource).count() == 120 * 4
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    rows = list_project_resources(db, ProjectResource)
+    assert len(statements) == 1
+    # 다른 사용자(other) 프로젝트도 포함 (기존 my-resources 와 같은 범위)
+    assert len(rows) == 120 * 4
+    assert {r["project_name"] for r in rows if r["vm_name"] == "ALB"} == {f"svc-{i}" for i in range(1, 121)}
+    assert [r["vm_name"] for r in rows[:4]] == ["ALB", "Web", "SSH-1", "SSH-2"]
+    assert rows[0] == {"vm_name": "ALB", "ip_address": "10.99.0.1", "project_name": "svc-1",
+                       "cpu_usage": 0, "memory_usage": 0, "status": "Running"}
+    assert rows[4]["status"] == "RUNNING"  # svc-2: 완료 전 프로젝트는 프로젝트 상태 그대로
+    db.close()
+
+
+def test_schema_init_finishes_partial_backfill(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'backfill.db'}")
+    Base.metadata.create_all(bind=engine)  # project_resources 는 이미 있음
+    db = sessionmaker(bind=engine)()
+    for i in range(1, 4):
+        db.add(ProjectHistory(service_name=f"svc-{i}", status="COMPLETED",
+                              details={"input": {"userName": "admin"}, "resources": _resources(i)}))
+    db.commit()
+    # 지난 시작에서 첫 프로젝트만 옮기고 끊긴 상태
+    backfill_project_resources(db, ProjectHistory, ProjectResource, batch_size=1)
+    db.query(ProjectResource).filter(ProjectResource.project_id != 1).delete()
+    db.commit()
+
+    _init_schema(engine)
+    assert sorted({pid for (pid,) in db.query(ProjectResource.project_id)}) == [1, 2, 3]
+    assert db.query(ProjectResource).count() == 3 * 4
+    _init_schema(engine)
+    assert db.query(ProjectResource).count() == 3 * 4
+    db.close()
+
+
+if __name__ == "__main__":
+    for n in (1, 200):
+        print(f"[INFO] VMs={n}: SQL statements={_count_statements(n)}")
+    test_list_user_vms_constant_statements()
+    print("[SUCCESS] constant statement count")
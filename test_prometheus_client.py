@@ -0,0 +1,96 @@
+"""
+비동기 Prometheus 클라이언트(services.prometheus) 테스트 (httpx.MockTransport, 실제 Prometheus 불필요).
+- 서킷 브레이커: threshold 연속 실패로 열리고, reset_seconds 뒤에는 시험 호출 하나만 통과하는지
+- 엔드포인트 여러 개: 결과를 라벨셋 기준으로 중복 없이 병합하고, 한 대가 실패해도 나머지 결과를 쓰는지
+- 타임아웃/실패: 빈 리스트를 돌려주고, 브레이커가 열린 뒤에는 엔드포인트를 부르지 않는지
+
+    python -m pytest -q test_prometheus_client.py
+"""
+import asyncio
+import time
+
+import httpx
+
+from services.prometheus import PrometheusClient, _CircuitBreaker
+
+A = "http://prom-a:9090"
+B = "http://prom-b:9090"
+
+
+def _series(instance, value):
+    return {"metric": {"instance": instance}, "value": [0, str(value)]}
+
+
+def _ok(result):
+    return httpx.Response(200, json={"status": "success", "data": {"resultType": "vector", "result": result}})
+
+
+def _client(handler, urls=(A, B), timeout=1.0, failures=2, reset=60.0):
+    return PrometheusClient(list(urls), timeout=timeout, max_connections=4, breaker_failures=failures,
+                            breaker_reset_seconds=reset, transport=httpx.MockTransport(handler))
+
+
+def test_breaker_half_open_admits_one_probe(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    breaker = _CircuitBreaker(threshold=2, reset_seconds=10)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    now[0] += 10
+    assert breaker.allow()  # 시험 호출
+    assert not breaker.allow() and not breaker.allow()  # 결과 전까지 나머지는 차단
+    breaker.record_failure()  # 시험 실패 → 다시 reset_seconds 대기
+    now[0] += 5
+    assert not breaker.allow()
+    now[0] += 5
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.allow() and breaker.allow()
+
+
+def test_fan_out_merges_and_tolerates_one_failure():
+    def handler(request):
+        if request.url.host == "prom-a":
+            return _ok([_series("10.0.0.1:9100", 1), _series("10.0.0.2:9100", 2)])
+        if request.url.params["query"] == "down_b":
+            return httpx.Response(503)
+        return _ok([_series("10.0.0.2:9100", 2), _series("10.0.0.3:9100", 3)])
+
+    async def scenario():
+        client = _client(handler)
+        try:
+            merged = await client.query("up")
+            partial = await client.query("down_b")
+        finally:
+            await client.aclose()
+        return merged, partial
+
+    merged, partial = asyncio.run(scenario())
+    assert [s["metric"]["instance"] for s in merged] == ["10.0.0.1:9100", "10.0.0.2:9100", "10.0.0.3:9100"]
+    assert [s["metric"]["instance"] for s in partial] == ["10.0.0.1:9100", "10.0.0.2:9100"]
+
+
+def test_timeout_opens_breaker_and_skips_endpoint():
+    calls = []
+
+    async def handler(request):
+        calls.append(request.url.host)
+        await asyncio.sleep(1)
+        return _ok([])
+
+    async def scenario():
+        client = _client(handler, urls=(A,), timeout=0.05, failures=2)
+        try:
+            results = [await client.query("up") for _ in range(4)]
+        finally:
+            await client.aclose()
+        return results
+
+    t0 = time.perf_counter()
+    results = asyncio.run(scenario())
+    assert results == [[], [], [], []]
+    assert calls == ["prom-a", "prom-a"]  # 두 번 실패 후 브레이커가 열려 호출하지 않음
+    assert time.perf_counter() - t0 < 0.5
@@ -0,0 +1,80 @@
+"""
+범위를 좁힌 PromQL 빌더(services.promql) 테스트 (Prometheus 불필요).
+- instance matcher 가 IP 의 '.' 을 이스케이프하고 chunk_size 개씩 쿼리를 나누는지
+- 합친 쿼리 결과가 cmp_metric 라벨로 cpu/memory 에 나뉘고 범위 밖 instance 는 버려지는지
+- 범위 provider 가 실패해도(DB 오류) 폴러가 직전 범위로 계속 조회하는지
+
+    python -m pytest -q test_promql.py
+"""
+import asyncio
+import re
+
+from services.metrics_poller import MetricsPoller
+from services.promql import InstanceScope, instance_matcher, usage_query
+
+
+def _as_regex(matcher: str) -> str:
+    # PromQL 문자열 리터럴의 \\ → \ (Prometheus 가 정규식에 넘기는 값)
+    return re.fullmatch(r'instance=~"(.*)"', matcher).group(1).replace("\\\\", "\\")
+
+
+def test_matcher_and_chunks():
+    regex = _as_regex(instance_matcher(["10.0.0.1", "10.0.0.2"]))
+    assert re.fullmatch(regex, "10.0.0.1:9100")
+    assert not re.fullmatch(regex, "10.0.0.10:9100")
+    assert not re.fullmatch(regex, "10x0x0x1:9100")
+
+    ips = [f"10.1.0.{i}" for i in range(1, 8)] + ["10.1.0.1", ""]
+    scope = InstanceScope(ips, chunk_size=3)
+    assert len(scope) == 7
+    assert len(scope.queries) == 3
+    assert scope.queries[0] == usage_query(["10.1.0.1", "10.1.0.2", "10.1.0.3"])
+    assert scope.queries[0].count('instance=~"(10\\\\.1\\\\.0\\\\.1|') == 3
+    assert InstanceScope([], chunk_size=3).queries == []
+
+
+def test_parse_labelled_results():
+    scope = InstanceScope(["10.0.0.1", "10.0.0.2"], chunk_size=50)
+    results = [
+        {"metric": {"instance": "10.0.0.1:9100", "cmp_metric": "cpu"}, "value": [0, "12.345"]},
+        {"metric": {"instance": "10.0.0.1:9100", "cmp_metric": "memory"}, "value": [0, "40.06"]},
+        {"metric": {"instance": "10.0.0.2:9100", "cmp_metric": "cpu"}, "value": [0, "NaN"]},
+        {"metric": {"instance": "10.9.9.9:9100", "cmp_metric": "cpu"}, "value": [0, "99"]},
+    ]
+    metrics_map = {}
+    scope.parse(results, metrics_map)
+    assert metrics_map["10.0.0.1"] == {"cpu": 12.3, "memory": 40.1}
+    assert list(metrics_map) == ["10.0.0.1", "10.0.0.2"]
+    assert scope.ip_of("10.9.9.9:9100") is None
+
+    series_map = {}
+    scope.parse_range([
+        {"metric": {"instance": "10.0.0.2:9100", "cmp_metric": "memory"}, "values": [[1, "1.5"], [2, "NaN"]]},
+    ], series_map)
+    ts, values = series_map["10.0.0.2"]["memory"]
+    assert ts.tolist() == [1.0, 2.0] and values[0] == 1.5
+
+
+def test_poller_keeps_previous_scope_on_scope_error():
+    scope = InstanceScope(["10.0.0.1"], chunk_size=50)
+    calls = []
+
+    async def provider():
+        calls.append(None)
+        if len(calls) > 1:
+            raise RuntimeError("db down")
+        return scope
+
+    async def fetch(s):
+        return {"scope": s}
+
+    async def scenario():
+        poller = MetricsPoller(interval=60, ttl=0, fetch=fetch)
+        poller.bind_scope(provider)
+        first = await poller.refresh()
+        second = await poller.refresh()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first.data["scope"] is scope and second.data["scope"] is scope
+    assert second is not first  # 직전 범위로 다시 조회함 (값이 같아 버전은 유지)
@@ -0,0 +1,89 @@
+"""
+provision_logs 적재(services.provisioner) 테스트 (임시 SQLite 파일).
+- 여러 번 나눠 쓴 로그가 프로젝트별로 seq 1.. 빈틈없이 쌓이고 since 로 이어 읽히는지
+- 다른 세션이 같은 seq 를 먼저 쓰면(MAX(seq) 조회와 INSERT 사이) 충돌 후 다시 시도해 뒤 seq 로 들어가는지
+- 상태만 바뀌어도 details.status 가 projects.status 와 같게 유지되는지 (details 를 읽는 history 화면)
+
+    python -m pytest -q test_provision_logs.py
+"""
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from main import Base, ProjectHistory, ProvisionLog
+from services.provisioner import get_provision_logs, update_provision_status
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'logs.db'}")
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as db:
+        db.add_all([ProjectHistory(service_name=f"svc{i}", status="RUNNING", details={}) for i in (1, 2)])
+        db.commit()
+    return engine
+
+
+def _log(db, project_id, *messages):
+    update_provision_status(db, project_id, "RUNNING", project_model=ProjectHistory,
+                            log_model=ProvisionLog, logs_append=list(messages))
+
+
+def test_seq_per_project_and_since(engine):
+    with sessionmaker(bind=engine)() as db:
+        _log(db, 1, "a1", "a2")
+        _log(db, 2, "b1")
+        _log(db, 1, "a3")
+        _log(db, 1, "a4", "a5", "a6")
+
+        logs = get_provision_logs(db, 1, ProvisionLog)
+        assert [(l["seq"], l["message"]) for l in logs] == [(i, f"a{i}") for i in range(1, 7)]
+        assert [l["seq"] for l in get_provision_logs(db, 2, ProvisionLog)] == [1]
+        page = get_provision_logs(db, 1, ProvisionLog, since=2, limit=3)
+        assert [l["message"] for l in page] == ["a3", "a4", "a5"]
+
+
+def test_concurrent_writer_conflict_is_retried(engine):
+    factory = sessionmaker(bind=engine)
+    raced = []
+
+    def other_writer_first(conn, cursor, statement, parameters, context, executemany):
+        # db 가 MAX(seq) 를 읽은 뒤 INSERT 직전에 다른 세션이 같은 프로젝트 로그를 commit
+        if statement.startswith("INSERT INTO provision_logs") and not raced:
+            raced.append(True)
+            with factory() as other:
+                _log(other, 1, "other")
+
+    with factory() as db:
+        _log(db, 1, "first")
+        event.listen(engine, "before_cursor_execute", other_writer_first)
+        try:
+            _log(db, 1, "mine 1", "mine 2")
+        finally:
+            event.remove(engine, "before_cursor_execute", other_writer_first)
+
+        logs = get_provision_logs(db, 1, ProvisionLog)
+        assert [(l["seq"], l["message"]) for l in logs] == [
+            (1, "first"), (2, "other"), (3, "mine 1"), (4, "mine 2"),
+        ]
+
+
+def test_status_change_keeps_details_in_sync(engine):
+    with sessionmaker(bind=engine)() as db:
+        project = db.get(ProjectHistory, 1)
+        project.status = "PENDING"
+        project.details = {"input": {"userName": "alice"}, "status": "PENDING"}
+        db.commit()
+        update_provision_status(db, 1, "RUNNING", project_model=ProjectHistory)
+        db.expire_all()
+        assert db.get(ProjectHistory, 1).details["status"] == "RUNNING"
+        _log(db, 1, "step")
+        update_provision_status(db, 1, "FAILED", project_model=ProjectHistory, error={"message": "boom"})
+        db.expire_all()
+        project = db.get(ProjectHistory, 1)
+        assert project.status == "FAILED"
+        assert project.details == {"input": {"userName": "alice"}, "status": "FAILED", "error": {"message": "boom"}}
+
+        update_provision_status(db, 1, "RUNNING", project_model=ProjectHistory)
+        db.expire_all()
+        assert db.get(ProjectHistory, 1).details["status"] == "RUNNING"
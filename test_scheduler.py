@@ -0,0 +1,75 @@
+"""
+provisioning 스케줄러(services.scheduler) 테스트 (runner 는 이벤트를 기다리는 가짜 코루틴).
+- 전역 동시 실행 수와 템플릿별 한도를 넘지 않고, 막힌 템플릿 job 은 건너뛰어 다른 job 을 먼저 실행하는지
+- priority 가 큰 job 이 먼저, 같은 priority 는 제출 순서로 시작하는지
+- 대기 중 취소는 시작 없이 on_finish("cancelled")
+
+    python -m pytest -q test_scheduler.py
+"""
+import asyncio
+
+from services.scheduler import ProvisioningScheduler
+
+
+def test_limits_priority_and_cancel():
+    started = []
+    finished = {}
+    peak = {"all": 0, "ha": 0}
+
+    async def scenario():
+        release = {pid: asyncio.Event() for pid in range(1, 8)}
+        running = {"all": 0, "ha": 0}
+
+        async def runner(project_id, input_spec):
+            started.append(project_id)
+            template = input_spec["template"]
+            running["all"] += 1
+            running[template] = running.get(template, 0) + 1
+            peak["all"] = max(peak["all"], running["all"])
+            peak["ha"] = max(peak["ha"], running["ha"])
+            try:
+                await release[project_id].wait()
+            finally:
+                running["all"] -= 1
+                running[template] -= 1
+
+        async def on_finish(project_id, outcome):
+            finished[project_id] = outcome
+
+        scheduler = ProvisioningScheduler(runner, max_concurrency=3, template_limits={"ha": 1},
+                                          default_template_limit=2)
+        scheduler.on_finish = on_finish
+        for pid, template, priority in [(1, "ha", 0), (2, "ha", 0), (3, "single", 0), (4, "single", 0),
+                                        (5, "single", 5), (6, "single", 0), (7, "ha", 9)]:
+            scheduler.submit(pid, {"template": template}, template=template, priority=priority)
+        assert scheduler.cancel(7)
+        await scheduler.start()
+
+        async def settle():
+            for _ in range(5):
+                await asyncio.sleep(0)
+
+        await settle()
+        # 5(priority 5) → 1(ha 한도 1 차지) → 2 는 ha 막힘 → 3 (single 2개, 전역 3개)
+        assert started == [5, 1, 3]
+        assert scheduler.stats()["queued_by_template"] == {"ha": 1, "single": 2}
+
+        release[5].set()
+        await settle()
+        assert started == [5, 1, 3, 4]  # ha 는 아직 막힘, single 여유 1
+
+        release[1].set()
+        await settle()
+        assert started == [5, 1, 3, 4, 2]
+
+        for pid in (2, 3, 4):
+            release[pid].set()
+        await settle()
+        release[6].set()
+        await settle()
+        await scheduler.stop()
+
+    asyncio.run(scenario())
+    assert started == [5, 1, 3, 4, 2, 6]
+    assert peak == {"all": 3, "ha": 1}
+    assert finished == {7: "cancelled", **{pid: "done" for pid in range(1, 7)}}
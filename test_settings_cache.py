@@ -0,0 +1,76 @@
+"""
+설정 캐시(services.settings) / 관리자 비밀번호 비교 테스트 (임시 SQLite 파일).
+- 한 워커가 update() 로 바꾼 설정을 다른 워커의 캐시가 version 컬럼 확인으로 반영하는지
+- version 이 그대로면 행 전체를 다시 읽지 않는지
+- 비ASCII 비밀번호는 TypeError(500) 없이 불일치, 비워 둔/NULL 비밀번호는 기본값으로 바뀌지 않는지
+- settings 행이 없을 때만 기본 비밀번호 "1234"
+
+    python -m pytest -q test_settings_cache.py
+"""
+import asyncio
+
+from sqlalchemy import create_engine, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from main import Base, SystemSetting, _password_matches
+from services.settings import SettingsCache
+
+
+def test_change_picked_up_through_version_column(tmp_path):
+    path = tmp_path / "settings.db"
+    Base.metadata.create_all(bind=create_engine(f"sqlite:///{path}"))
+
+    async def scenario():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        worker_a = SettingsCache(SystemSetting, factory, check_interval=60)
+        worker_b = SettingsCache(SystemSetting, factory, check_interval=60)
+        assert (await worker_b.get())["system_notice"] == ""
+
+        async with factory() as db:
+            await worker_a.update(db, {"system_notice": "점검 예정"})
+        assert (await worker_a.get())["system_notice"] == "점검 예정"
+        assert (await worker_b.get())["system_notice"] == ""  # 아직 version 확인 전
+
+        loads = []
+        original = worker_b._load
+        worker_b._load = lambda: loads.append(1) or original()
+        await worker_b._check_version()
+        assert (await worker_b.get())["system_notice"] == "점검 예정"
+        await worker_b._check_version()  # version 그대로 → 다시 읽지 않음
+        assert len(loads) == 1
+        await engine.dispose()
+
+    asyncio.run(scenario())
+
+
+def test_password_compare():
+    assert not _password_matches("1234", None)  # NULL 컬럼: 기존과 같이 모두 거부
+    assert not _password_matches("관리자🔑", None)
+    assert _password_matches("관리자🔑", "관리자🔑")
+    assert not _password_matches("1234", "")
+    assert not _password_matches("", "")
+    assert not _password_matches(None, "1234")
+
+
+def test_default_password_only_without_row(tmp_path):
+    path = tmp_path / "settings.db"
+    Base.metadata.create_all(bind=create_engine(f"sqlite:///{path}"))
+
+    async def scenario():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        cache = SettingsCache(SystemSetting, factory, check_interval=60)
+        without_row = (await cache.get())["admin_password"]
+        async with factory() as db:
+            db.add(SystemSetting())
+            await db.flush()
+            await db.execute(update(SystemSetting).values(admin_password=None))
+            await db.commit()
+        null_column = (await cache.reload())["admin_password"]
+        await engine.dispose()
+        return without_row, null_column
+
+    without_row, null_column = asyncio.run(scenario())
+    assert _password_matches("1234", without_row)
+    assert null_column is None and not _password_matches("1234", null_column)
@@ -0,0 +1,46 @@
+"""
+sim runner 가상 시계/지연 분포 테스트 (DB 불필요).
+- discrete 시계: 실제 대기 없이 가상 시각 순서대로 깨어나고, 가상 경과 시간이 가장 긴 job 과 같은지
+- 지연 분포: 같은 시드면 같은 값, max 상한, 잘못된 분포 이름은 ValueError
+
+    python -m pytest -q test_sim_runner.py
+"""
+import asyncio
+import random
+import time
+
+import pytest
+
+from services.runners.sim_runner import SimClock, sample_latency
+
+
+def test_discrete_clock_orders_by_virtual_time():
+    clock = SimClock("discrete")
+    woke = []
+
+    async def job(name, delays):
+        async with clock.job():
+            for d in delays:
+                await clock.sleep(d)
+                woke.append((name, round(clock.elapsed(), 6)))
+
+    async def main():
+        await asyncio.gather(job("a", [3600, 60]), job("b", [10, 10, 10]), job("c", [1800]))
+
+    t0 = time.perf_counter()
+    asyncio.run(main())
+    assert time.perf_counter() - t0 < 2.0
+    assert woke == [("b", 10), ("b", 20), ("b", 30), ("c", 1800), ("a", 3600), ("a", 3660)]
+    assert clock.stats()["active_jobs"] == 0 and clock.stats()["pending_wakeups"] == 0
+
+
+def test_sample_latency_distributions():
+    spec = {"dist": "lognormal", "median": 90.0, "sigma": 0.5, "max": 120.0}
+    a = [sample_latency(spec, random.Random("0:7")) for _ in range(3)]
+    assert a[0] == a[1] == a[2]
+    values = [sample_latency(spec, random.Random(i)) for i in range(500)]
+    assert max(values) <= 120.0 and min(values) > 0
+    assert sample_latency(5, random.Random()) == 5.0
+    assert sample_latency({"dist": "normal", "mean": -100, "stddev": 1}, random.Random()) == 0.0
+    with pytest.raises(ValueError):
+        sample_latency({"dist": "pareto"}, random.Random())